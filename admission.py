@@ -0,0 +1,309 @@
+"""
+Admission Control for AutoPMO
+
+Bounds the number of LLM requests in flight. Calls beyond the current
+concurrency limit wait in a bounded queue; new work is rejected early (with a
+retry-after hint) when the queue is full or its estimated wait exceeds the
+queue-wait SLO.
+
+The concurrency limit adapts with AIMD on observed LLM latency: it grows by
+about one slot per round trip while latency stays near the recent minimum and
+is cut multiplicatively when latency inflates or calls time out.
+
+Admission is decided per request, not per call: the first LLM call inside an
+``admission_scope()`` may be rejected, later calls of the same (already
+admitted) request only queue, ahead of new work, so shedding never abandons
+half-finished requests.
+
+Waiting calls are served per tenant by weighted fair queuing (see
+``fair_scheduler``), with per-tenant concurrency quotas. Queue bounds and the
+wait estimate used for shedding are per tenant share, so a tenant flooding
+the queue is shed before others are.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from .fair_scheduler import DEFAULT_TENANT, FairQueue, TenantPolicy
+from .metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_LIMIT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+    TENANT_REJECTED,
+    error_kind,
+    tenant_label,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when the LLM backend is saturated and new work is shed."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"LLM backend overloaded ({reason}), retry later")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    """Per-request admission state shared by all calls within a scope."""
+    __slots__ = ("admitted", "tenant")
+
+    def __init__(self, tenant: str = DEFAULT_TENANT):
+        self.admitted = False
+        self.tenant = tenant
+
+
+_current_ticket: ContextVar[Optional[_Ticket]] = ContextVar(
+    "autopmo_admission_ticket", default=None
+)
+
+
+@contextmanager
+def admission_scope(tenant: Optional[str] = None) -> Iterator[None]:
+    """
+    Treat all LLM calls made inside this block as one request.
+
+    Nested scopes join the outer one, so an orchestrated request and the
+    agents it delegates to are admitted (or rejected) once, as the outer
+    request's tenant.
+
+    Args:
+        tenant: Tenant the calls are scheduled as (default: DEFAULT_TENANT)
+    """
+    if _current_ticket.get() is not None:
+        yield
+        return
+    token = _current_ticket.set(_Ticket(tenant or DEFAULT_TENANT))
+    try:
+        yield
+    finally:
+        _current_ticket.reset(token)
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limiter with a bounded wait queue.
+
+    Attributes:
+        min_limit: Lowest concurrency limit
+        max_limit: Highest concurrency limit
+        max_queue: New requests allowed to wait before rejecting
+        max_queue_wait: Queue-wait SLO in seconds; new requests whose
+            estimated wait exceeds it are rejected
+        target_latency: Fixed latency above which the limit is decreased;
+            if None, ``latency_tolerance`` x the recent minimum latency
+        backoff: Multiplicative decrease factor
+        tenant_policies: Weights and concurrency quotas per tenant
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 100,
+        max_queue_wait: float = 10.0,
+        target_latency: Optional[float] = None,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+        latency_window: int = 100,
+        tenant_policies: Optional[Dict[str, TenantPolicy]] = None,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.target_latency = target_latency
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._queue = FairQueue("llm", tenant_policies)
+        self._recent_latencies: Deque[float] = deque(maxlen=latency_window)
+        self._avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._admitted = 0
+        self._rejected = 0
+
+        ADMISSION_LIMIT.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self._limit)
+
+    def estimated_wait_seconds(self, position: Optional[float] = None, tenant: str = DEFAULT_TENANT) -> float:
+        """
+        Expected queue wait for a new request.
+
+        Args:
+            position: Queue position (default: behind admitted calls and the
+                tenant's queued calls, at the tenant's fair share)
+            tenant: Tenant of the request
+        """
+        if self._avg_latency is None:
+            return 0.0
+        if position is None:
+            if self._in_flight < self.limit and not self._queue.queued():
+                return 0.0
+            position = (
+                self._queue.queued(priority=True)
+                + self._queue.queued(tenant, priority=False) / self._queue.share(tenant)
+            )
+        return (position + 1) * self._avg_latency / max(1, self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one concurrency slot for the duration of one LLM call attempt.
+
+        Raises:
+            AdmissionRejected: If the call starts a new request and the
+                backend is saturated
+        """
+        tenant = await self._acquire()
+        started = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(time.perf_counter() - started, error, tenant)
+
+    async def _acquire(self) -> str:
+        ticket = _current_ticket.get()
+        priority = ticket is not None and ticket.admitted
+        tenant = ticket.tenant if ticket is not None else DEFAULT_TENANT
+        queued_at = time.perf_counter()
+
+        if self._in_flight < self.limit and self._queue.can_start(tenant):
+            self._queue.start(tenant)
+            self._grant(ticket, queued_at)
+            return tenant
+
+        if not priority:
+            # Queue bound per tenant share, so one tenant cannot fill it for all
+            if self._queue.over_share(tenant, self.max_queue):
+                self._reject("queue_full", self.estimated_wait_seconds(tenant=tenant), tenant)
+            wait = self.estimated_wait_seconds(tenant=tenant)
+            if wait > self.max_queue_wait:
+                self._reject("slo", wait, tenant)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.push(tenant, waiter, priority=priority)
+        ADMISSION_QUEUE_DEPTH.inc()
+        # Free slots may be held back only by other tenants' quotas
+        self._wake()
+        try:
+            if priority:
+                await waiter
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted while we were timing out: hand the slot back
+                self._in_flight -= 1
+                self._queue.finish(tenant)
+                self._wake()
+            else:
+                waiter.cancel()
+                self._queue.remove(tenant, waiter)
+                ADMISSION_QUEUE_DEPTH.dec()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout", self.estimated_wait_seconds(tenant=tenant), tenant)
+            raise
+        self._grant(ticket, queued_at, counted=True)
+        return tenant
+
+    def _grant(self, ticket: Optional[_Ticket], queued_at: float, counted: bool = False):
+        if not counted:
+            self._in_flight += 1
+        if ticket is not None:
+            ticket.admitted = True
+        self._admitted += 1
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+
+    def _reject(self, reason: str, wait: float, tenant: str):
+        self._rejected += 1
+        ADMISSION_REJECTED.labels(reason=reason).inc()
+        TENANT_REJECTED.labels(queue="llm", tenant=tenant_label(tenant)).inc()
+        raise AdmissionRejected(reason, retry_after=max(1.0, wait))
+
+    def _release(self, latency: float, error: Optional[BaseException], tenant: str):
+        self._in_flight -= 1
+        self._queue.finish(tenant)
+        if error is None:
+            self._observe(latency, congested=False)
+        elif error_kind(error) == "timeout":
+            self._observe(latency, congested=True)
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to waiters, already-admitted requests first, fairly across tenants."""
+        while self._in_flight < self.limit:
+            popped = self._queue.pop()
+            if popped is None:
+                break
+            tenant, waiter = popped
+            ADMISSION_QUEUE_DEPTH.dec()
+            if waiter.done():
+                self._queue.finish(tenant)
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _observe(self, latency: float, congested: bool):
+        """AIMD update of the concurrency limit from one completed call."""
+        if not congested:
+            self._recent_latencies.append(latency)
+            self._avg_latency = (
+                latency if self._avg_latency is None
+                else 0.8 * self._avg_latency + 0.2 * latency
+            )
+            threshold = self.target_latency or self.latency_tolerance * min(self._recent_latencies)
+            congested = latency > threshold
+
+        if congested:
+            # At most one decrease per round trip, so a burst of slow calls
+            # caused by the same overload only backs off once
+            now = time.monotonic()
+            if now - self._last_decrease >= (self._avg_latency or latency):
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_decrease = now
+                logger.info(f"Admission limit decreased to {self.limit} (latency {latency:.2f}s)")
+        else:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+        ADMISSION_LIMIT.set(self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queued": self._queue.queued(priority=False),
+            "queued_admitted": self._queue.queued(priority=True),
+            "max_queue": self.max_queue,
+            "max_queue_wait_seconds": self.max_queue_wait,
+            "estimated_wait_seconds": self.estimated_wait_seconds(),
+            "avg_latency_seconds": self._avg_latency,
+            "admitted_total": self._admitted,
+            "rejected_total": self._rejected,
+            "tenants": self._queue.stats(),
+        }
+
@@ -0,0 +1,465 @@
+"""
+Schedule and Risk Analytics Kernels for AutoPMO
+
+Pure NumPy implementations of the heavy planning and risk computations:
+
+- critical path method (forward/backward pass, slack, critical tasks)
+- resource leveling (serial schedule generation under capacity limits)
+- Monte Carlo schedule simulation with PERT-beta task durations
+- Monte Carlo aggregation of a risk register into cost exposure
+
+Task networks are passed as arrays in topological order with predecessors in
+CSR form (``pred_ptr``/``pred_idx``): the predecessors of task ``i`` are
+``pred_idx[pred_ptr[i]:pred_ptr[i + 1]]``. ``build_network`` produces that
+form from task dictionaries.
+
+Kernels are module-level functions taking arrays and plain values so they can
+run in compute-service worker processes; long-running kernels accept a
+``progress`` callback receiving the completed fraction.
+"""
+
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .wbs_graph import reduce_dependencies, validate_wbs
+
+Progress = Optional[Callable[[float], None]]
+
+PERCENTILES = (10, 50, 80, 90, 95)
+
+
+def build_network(tasks: Sequence[Dict[str, Any]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Order tasks topologically and encode their dependencies.
+
+    Args:
+        tasks: Dicts with "id" and optional "depends_on" or "dependencies"
+            (list of task ids)
+
+    Returns:
+        (task ids in topological order, pred_ptr, pred_idx)
+
+    Raises:
+        ValueError: On unknown dependencies or dependency cycles
+    """
+    ids = [str(task["id"]) for task in tasks]
+    position = {task_id: i for i, task_id in enumerate(ids)}
+    if len(position) != len(ids):
+        raise ValueError("Duplicate task ids")
+
+    preds: List[List[int]] = []
+    for task in tasks:
+        deps = []
+        for dep in task.get("depends_on", task.get("dependencies")) or []:
+            if str(dep) not in position:
+                raise ValueError(f"Task {task['id']} depends on unknown task {dep}")
+            deps.append(position[str(dep)])
+        preds.append(deps)
+
+    # Kahn's algorithm, keeping input order among ready tasks
+    indegree = [len(p) for p in preds]
+    successors: List[List[int]] = [[] for _ in ids]
+    for i, deps in enumerate(preds):
+        for dep in deps:
+            successors[dep].append(i)
+    ready = deque(i for i, degree in enumerate(indegree) if degree == 0)
+    order: List[int] = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for succ in successors[i]:
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                ready.append(succ)
+    if len(order) != len(ids):
+        raise ValueError("Task dependencies contain a cycle")
+
+    rank = {old: new for new, old in enumerate(order)}
+    pred_ptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    pred_idx: List[int] = []
+    for new, old in enumerate(order):
+        pred_idx.extend(sorted(rank[dep] for dep in preds[old]))
+        pred_ptr[new + 1] = len(pred_idx)
+    return [ids[i] for i in order], pred_ptr, np.asarray(pred_idx, dtype=np.int64)
+
+
+def schedule_inputs(
+    tasks: Sequence[Dict[str, Any]],
+    resources: Sequence[str] = (),
+    reduce: bool = False,
+) -> Dict[str, Any]:
+    """
+    Validate a task list and build the arrays the schedule kernels take.
+
+    Args:
+        tasks: Dicts with "id", "duration", optional "optimistic"/"pessimistic"
+            durations, "depends_on" (task ids) and "resources" (units per day)
+        resources: Resource names to build the demand matrix for
+        reduce: Drop redundant dependencies first; they do not change the
+            schedule, only the kernels' cost, so this only pays off when the
+            network is reused many times
+
+    Returns:
+        Dict with "ids" (topological order), "optimistic", "most_likely",
+        "pessimistic", "pred_ptr", "pred_idx" and "demands" (tasks x resources)
+
+    Raises:
+        ValueError: If the task graph is invalid
+    """
+    report = validate_wbs(tasks, reduce=reduce)
+    if not report.valid:
+        raise ValueError(f"Invalid task graph: {report.to_dict(max_items=5)}")
+    if report.redundant_edges:
+        tasks = reduce_dependencies(tasks, report)
+
+    ids, pred_ptr, pred_idx = build_network(tasks)
+    by_id = {str(task["id"]): task for task in tasks}
+    ordered = [by_id[task_id] for task_id in ids]
+    return {
+        "ids": ids,
+        "optimistic": np.array([float(t.get("optimistic", t.get("duration", 0))) for t in ordered]),
+        "most_likely": np.array([float(t.get("duration", 0)) for t in ordered]),
+        "pessimistic": np.array([float(t.get("pessimistic", t.get("duration", 0))) for t in ordered]),
+        "pred_ptr": pred_ptr,
+        "pred_idx": pred_idx,
+        "demands": np.array(
+            [[float((t.get("resources") or {}).get(r, 0)) for r in resources] for t in ordered]
+        ).reshape(len(ordered), len(resources)),
+    }
+
+
+def _successors(pred_ptr: np.ndarray, pred_idx: np.ndarray) -> List[np.ndarray]:
+    n = len(pred_ptr) - 1
+    succ: List[List[int]] = [[] for _ in range(n)]
+    for i in range(n):
+        for p in pred_idx[pred_ptr[i]:pred_ptr[i + 1]]:
+            succ[p].append(i)
+    return [np.asarray(s, dtype=np.int64) for s in succ]
+
+
+def critical_path(
+    durations: np.ndarray,
+    pred_ptr: np.ndarray,
+    pred_idx: np.ndarray,
+) -> Dict[str, Any]:
+    """
+    Critical path method over a topologically ordered network.
+
+    Args:
+        durations: Task durations (days)
+        pred_ptr: CSR offsets of each task's predecessors
+        pred_idx: Predecessor indices
+
+    Returns:
+        Project duration, per-task early/late start and finish, total slack
+        and the indices of critical (zero-slack) tasks
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    n = len(durations)
+    early_start = np.zeros(n)
+    for i in range(n):
+        preds = pred_idx[pred_ptr[i]:pred_ptr[i + 1]]
+        if len(preds):
+            early_start[i] = (early_start[preds] + durations[preds]).max()
+    early_finish = early_start + durations
+    duration = float(early_finish.max()) if n else 0.0
+
+    succ = _successors(pred_ptr, pred_idx)
+    late_finish = np.full(n, duration)
+    for i in range(n - 1, -1, -1):
+        if len(succ[i]):
+            late_finish[i] = (late_finish[succ[i]] - durations[succ[i]]).min()
+    late_start = late_finish - durations
+    slack = late_start - early_start
+
+    return {
+        "duration": duration,
+        "early_start": early_start,
+        "early_finish": early_finish,
+        "late_start": late_start,
+        "late_finish": late_finish,
+        "slack": slack,
+        "critical": np.flatnonzero(np.isclose(late_start, early_start)),
+    }
+
+
+def critical_path_batch(
+    durations: np.ndarray,
+    pred_ptr: np.ndarray,
+    pred_idx: np.ndarray,
+) -> Dict[str, Any]:
+    """
+    Critical path method for several duration vectors over one network.
+
+    The passes loop over tasks once and are vectorized across the rows, so
+    evaluating many variants of the same plan costs about as much as one.
+
+    Args:
+        durations: (variants x tasks) task durations
+        pred_ptr: CSR offsets of each task's predecessors
+        pred_idx: Predecessor indices
+
+    Returns:
+        Per-variant project duration, (variants x tasks) early start and
+        finish, and a boolean mask of critical tasks
+    """
+    durations = np.atleast_2d(np.asarray(durations, dtype=np.float64))
+    rows, n = durations.shape
+    early_finish = np.zeros((rows, n))
+    for i in range(n):
+        preds = pred_idx[pred_ptr[i]:pred_ptr[i + 1]]
+        start = early_finish[:, preds].max(axis=1) if len(preds) else 0.0
+        early_finish[:, i] = start + durations[:, i]
+    duration = early_finish.max(axis=1) if n else np.zeros(rows)
+
+    succ = _successors(pred_ptr, pred_idx)
+    late_finish = np.empty((rows, n))
+    for i in range(n - 1, -1, -1):
+        if len(succ[i]):
+            late_finish[:, i] = (late_finish[:, succ[i]] - durations[:, succ[i]]).min(axis=1)
+        else:
+            late_finish[:, i] = duration
+
+    return {
+        "duration": duration,
+        "early_start": early_finish - durations,
+        "early_finish": early_finish,
+        "critical": np.isclose(late_finish, early_finish),
+    }
+
+
+def level_resources(
+    durations: np.ndarray,
+    demands: np.ndarray,
+    capacity: np.ndarray,
+    pred_ptr: np.ndarray,
+    pred_idx: np.ndarray,
+    progress: Progress = None,
+) -> Dict[str, Any]:
+    """
+    Resource-constrained schedule by serial schedule generation.
+
+    Tasks are placed in order of least CPM slack (ties: earliest start) at the
+    first day on which all predecessors have finished and every resource has
+    spare capacity for the task's whole duration.
+
+    Args:
+        durations: Task durations, rounded up to whole days
+        demands: (tasks x resources) units required per day
+        capacity: Units available per resource per day
+        pred_ptr: CSR offsets of each task's predecessors
+        pred_idx: Predecessor indices
+        progress: Optional completed-fraction callback
+
+    Returns:
+        Leveled start and finish days, project duration and peak usage
+    """
+    days = np.ceil(np.asarray(durations, dtype=np.float64)).astype(np.int64)
+    demands = np.asarray(demands, dtype=np.float64).reshape(len(days), -1)
+    capacity = np.asarray(capacity, dtype=np.float64)
+    n = len(days)
+    if n and (demands > capacity).any():
+        raise ValueError("A task demands more of a resource than its capacity")
+
+    cpm = critical_path(days, pred_ptr, pred_idx)
+    order = np.lexsort((cpm["early_start"], cpm["slack"]))
+
+    horizon = int(days.sum()) + 1
+    usage = np.zeros((horizon, len(capacity)))
+    start = np.full(n, -1, dtype=np.int64)
+    finish = np.zeros(n, dtype=np.int64)
+    scheduled = 0
+    pending = list(order)
+    while pending:
+        # Highest-priority task whose predecessors are all placed
+        for k, i in enumerate(pending):
+            preds = pred_idx[pred_ptr[i]:pred_ptr[i + 1]]
+            if (start[preds] >= 0).all():
+                break
+        pending.pop(k)
+
+        t = int(finish[preds].max()) if len(preds) else 0
+        d = days[i]
+        if d > 0:
+            headroom = capacity - demands[i]
+            while (usage[t:t + d] > headroom).any():
+                t += 1
+            usage[t:t + d] += demands[i]
+        start[i] = t
+        finish[i] = t + d
+
+        scheduled += 1
+        if progress is not None and scheduled % 64 == 0:
+            progress(scheduled / n)
+
+    duration = int(finish.max()) if n else 0
+    return {
+        "duration": duration,
+        "start": start,
+        "finish": finish,
+        "peak_usage": usage[:max(duration, 1)].max(axis=0),
+        "unleveled_duration": cpm["duration"],
+    }
+
+
+def _pert_samples(
+    rng: np.random.Generator,
+    optimistic: np.ndarray,
+    most_likely: np.ndarray,
+    pessimistic: np.ndarray,
+    size: int,
+) -> np.ndarray:
+    spread = pessimistic - optimistic
+    safe = np.where(spread > 0, spread, 1.0)
+    alpha = 1 + 4 * (most_likely - optimistic) / safe
+    beta = 1 + 4 * (pessimistic - most_likely) / safe
+    samples = rng.beta(alpha, beta, size=(size, len(optimistic)))
+    return optimistic + samples * spread
+
+
+def monte_carlo_schedule(
+    optimistic: np.ndarray,
+    most_likely: np.ndarray,
+    pessimistic: np.ndarray,
+    pred_ptr: np.ndarray,
+    pred_idx: np.ndarray,
+    iterations: int = 10000,
+    seed: Optional[int] = None,
+    chunk_size: int = 2000,
+    progress: Progress = None,
+) -> Dict[str, Any]:
+    """
+    Simulate project duration with PERT-beta distributed task durations.
+
+    Iterations are vectorized in chunks: each chunk samples every task's
+    duration and runs the CPM forward and backward passes across the chunk.
+
+    Args:
+        optimistic: Optimistic task durations
+        most_likely: Most likely task durations
+        pessimistic: Pessimistic task durations
+        pred_ptr: CSR offsets of each task's predecessors
+        pred_idx: Predecessor indices
+        iterations: Number of simulated projects
+        seed: Random seed for reproducible results
+        chunk_size: Iterations simulated per vectorized batch
+        progress: Optional completed-fraction callback
+
+    Returns:
+        Duration mean, standard deviation and percentiles, and each task's
+        criticality index (share of iterations in which it was critical)
+    """
+    optimistic = np.asarray(optimistic, dtype=np.float64)
+    most_likely = np.asarray(most_likely, dtype=np.float64)
+    pessimistic = np.asarray(pessimistic, dtype=np.float64)
+    n = len(optimistic)
+    rng = np.random.default_rng(seed)
+    succ = _successors(pred_ptr, pred_idx)
+    preds = [pred_idx[pred_ptr[i]:pred_ptr[i + 1]] for i in range(n)]
+
+    totals = np.empty(iterations)
+    critical_counts = np.zeros(n)
+    done = 0
+    while done < iterations:
+        size = min(chunk_size, iterations - done)
+        d = _pert_samples(rng, optimistic, most_likely, pessimistic, size)
+
+        early_finish = np.empty((size, n))
+        for i in range(n):
+            start = early_finish[:, preds[i]].max(axis=1) if len(preds[i]) else 0.0
+            early_finish[:, i] = start + d[:, i]
+        total = early_finish.max(axis=1)
+
+        late_finish = np.empty((size, n))
+        for i in range(n - 1, -1, -1):
+            if len(succ[i]):
+                late_finish[:, i] = (late_finish[:, succ[i]] - d[:, succ[i]]).min(axis=1)
+            else:
+                late_finish[:, i] = total
+        critical_counts += np.isclose(late_finish, early_finish).sum(axis=0)
+
+        totals[done:done + size] = total
+        done += size
+        if progress is not None:
+            progress(done / iterations)
+
+    return {
+        "iterations": iterations,
+        "mean": float(totals.mean()),
+        "std": float(totals.std()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES))},
+        "criticality": critical_counts / iterations,
+    }
+
+
+def aggregate_risk(
+    probability: np.ndarray,
+    impact_low: np.ndarray,
+    impact_high: np.ndarray,
+    iterations: int = 10000,
+    seed: Optional[int] = None,
+    chunk_size: int = 5000,
+    progress: Progress = None,
+) -> Dict[str, Any]:
+    """
+    Simulate total cost exposure of a risk register.
+
+    Each risk occurs independently with its probability; an occurring risk
+    costs a uniformly distributed amount between its low and high impact.
+
+    Args:
+        probability: Occurrence probability per risk (0-1)
+        impact_low: Lower bound of each risk's cost impact
+        impact_high: Upper bound of each risk's cost impact
+        iterations: Number of simulated outcomes
+        seed: Random seed for reproducible results
+        chunk_size: Iterations simulated per vectorized batch
+        progress: Optional completed-fraction callback
+
+    Returns:
+        Exposure mean and percentiles, the probability of any risk occurring
+        and each risk's share of the expected exposure
+    """
+    probability = np.asarray(probability, dtype=np.float64)
+    impact_low = np.asarray(impact_low, dtype=np.float64)
+    impact_high = np.asarray(impact_high, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    totals = np.empty(iterations)
+    contribution = np.zeros(len(probability))
+    any_occurred = 0
+    done = 0
+    while done < iterations:
+        size = min(chunk_size, iterations - done)
+        occurs = rng.random((size, len(probability))) < probability
+        cost = occurs * rng.uniform(impact_low, impact_high, size=(size, len(probability)))
+        totals[done:done + size] = cost.sum(axis=1)
+        contribution += cost.sum(axis=0)
+        any_occurred += int(occurs.any(axis=1).sum())
+        done += size
+        if progress is not None:
+            progress(done / iterations)
+
+    expected = contribution.sum()
+    return {
+        "iterations": iterations,
+        "mean": float(totals.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES))},
+        "probability_any": any_occurred / iterations,
+        "contribution": contribution / expected if expected else contribution,
+    }
+
+
+def warmup() -> bool:
+    """Exercise every kernel on a tiny input (imports, allocator, RNG)."""
+    ids, pred_ptr, pred_idx = build_network([
+        {"id": "a"}, {"id": "b", "depends_on": ["a"]}, {"id": "c", "depends_on": ["a"]},
+    ])
+    durations = np.array([1.0, 2.0, 3.0])
+    critical_path(durations, pred_ptr, pred_idx)
+    level_resources(durations, np.ones((3, 1)), np.array([1.0]), pred_ptr, pred_idx)
+    monte_carlo_schedule(durations, durations * 1.5, durations * 2, pred_ptr, pred_idx, iterations=10)
+    aggregate_risk(np.full(3, 0.5), durations, durations * 2, iterations=10)
+    return True
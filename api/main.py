@@ -3,6 +3,9 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 from uuid import uuid4
 
+# Same encoder as the full API (orjson when installed, identical output without)
+from agents.responses import FastJSONResponse as APIResponse
+
 
 class ProjectCreate(BaseModel):
     name: str = Field(..., description="Project name")
@@ -33,6 +36,7 @@ app = FastAPI(
     title="AutoPMO API",
     version="0.1.0",
     description="Minimal MVP API skeleton for AutoPMO",
+    default_response_class=APIResponse,
 )
 
 
@@ -48,7 +52,8 @@ def health() -> dict:
 @app.post("/api/v1/projects", response_model=Project, status_code=201)
 def create_project(payload: ProjectCreate):
     project_id = str(uuid4())
-    project = Project(id=project_id, **payload.dict())
+    # The payload was validated on the way in; skip validating it again
+    project = Project.model_construct(id=project_id, **payload.model_dump())
 
     # MVP logic placeholders
     # In a real implementation these would be delegated to agents and models
@@ -57,7 +62,7 @@ def create_project(payload: ProjectCreate):
     project.tasks = []
 
     PROJECTS[project_id] = project
-    return project
+    return APIResponse(project.model_dump(), status_code=201)
 
 
 @app.get("/api/v1/projects/{project_id}", response_model=Project)
@@ -65,7 +70,7 @@ def get_project(project_id: str):
     project = PROJECTS.get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return APIResponse(project.model_dump())
 
 
 @app.post("/api/v1/agents/execute")
@@ -5,17 +5,39 @@ This module provides the base class that all specialized agents inherit from.
 It handles common functionality like LLM communication, logging, and error handling.
 """
 
+import asyncio
 import logging
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
-import json
 
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.tools import Tool
-from langchain_community.chat_models import ChatOpenAI
+
+from .admission import AdmissionController, AdmissionRejected, admission_scope
+from .compute_service import ComputeService, get_compute_service
+from .fair_scheduler import tenant_of
+from .llm_cassette import LLMCassette, cassette_from_env
+from .llm_client import create_llm
+from .metrics import (
+    AGENT_EXECUTION_SECONDS,
+    AGENT_IN_FLIGHT,
+    LLMMetricsCallback,
+    agent_label,
+    instrument_tool,
+    record_error,
+)
+from .project_index import ProjectIndex, get_project_index
+from .prompt_budget import PromptAssembler
+from .resilience import CircuitOpenError
+from .state_store import StateStore, get_default_state_store
+from .tool_cache import ToolCache, memoize_tool
+from .tool_executor import ToolExecutor, get_tool_executor
+from .tracing import TracingCallback, get_tracer, trace_tool
 
 logger = logging.getLogger(__name__)
 
@@ -32,14 +54,45 @@ class BaseAgent(ABC):
         memory: Conversation memory
     """
     
+    # Context keys never sent to the LLM (private "_" keys are always dropped):
+    # tenant and user ids only route the request. Callers that already spell
+    # a value out in the task pass its key to execute() as drop_keys
+    context_exclude_keys: FrozenSet[str] = frozenset({"organization", "user_id"})
+    
+    # Tools whose results depend on more than their input (state, time, I/O)
+    # are never memoized
+    impure_tools: FrozenSet[str] = frozenset()
+    
+    # Per-tool LRU sizes overriding tool_cache_size
+    tool_cache_sizes: Dict[str, int] = {}
+    
+    # Agents whose output for a near-duplicate project can be reused
+    reuse_results: bool = False
+    
+    # Context fields a reused project must match exactly
+    reuse_match_keys: Tuple[str, ...] = ("target_environment", "budget", "timeline_weeks")
+    
     def __init__(
         self,
         name: str,
         description: str,
-        llm_base_url: str = "http://llm-server:8000/v1",
+        llm_base_url: Union[str, List[str]] = "http://llm-server:8000/v1",
         llm_model: str = "mistral-7b-instruct",
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        context_token_budget: int = 1500,
+        state_store: Optional[StateStore] = None,
+        max_history: int = 1000,
+        admission_controller: Optional[AdmissionController] = None,
+        llm_balancer_strategy: str = "least_outstanding",
+        llm_cassette: Optional[LLMCassette] = None,
+        tool_cache_size: int = 256,
+        tool_cache_ttl: Optional[float] = 300.0,
+        tool_executor: Optional[ToolExecutor] = None,
+        compute_service: Optional[ComputeService] = None,
+        project_index_dir: Optional[str] = None,
+        reuse_threshold: float = 0.9,
+        reuse_draft_token_budget: int = 1000,
     ):
         """
         Initialize the base agent.
@@ -47,30 +100,77 @@ class BaseAgent(ABC):
         Args:
             name: Agent name
             description: Agent description
-            llm_base_url: URL for LLM API
+            llm_base_url: URL for LLM API, or a list of replica URLs to balance across
             llm_model: Model identifier
             temperature: LLM temperature (0-1)
             max_tokens: Maximum tokens in response
+            context_token_budget: Prompt token budget for the task context
+            state_store: Shared store for execution history (default: in-process)
+            max_history: History entries retained per agent
+            admission_controller: Shared limiter on concurrent LLM calls
+            llm_balancer_strategy: "least_outstanding" or "ewma" routing across replicas
+            llm_cassette: Record LLM calls to / replay them from a cassette
+                (default: AUTOPMO_LLM_CASSETTE, if set)
+            tool_cache_size: Results memoized per pure tool (0 disables memoization)
+            tool_cache_ttl: Seconds a memoized tool result stays valid (None: forever)
+            tool_executor: Pools that run blocking tools off the event loop
+                (default: process-wide executor configured from the environment)
+            compute_service: Process pool for heavy analytics jobs
+                (default: process-wide service configured from the environment)
+            project_index_dir: Directory of the similar-project indexes
+                (default: AUTOPMO_PROJECT_INDEX_DIR; unset disables reuse)
+            reuse_threshold: Minimum description similarity for reusing a past
+                result (rewordings of one project score above 0.9, different
+                systems with the same stack 0.7-0.85)
+            reuse_draft_token_budget: Prompt token budget for a reused draft
         """
         self.name = name
         self.description = description
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.context_token_budget = context_token_budget
         
         # Initialize LLM
-        self.llm = ChatOpenAI(
+        self.admission_controller = admission_controller
+        self.llm = create_llm(
             base_url=llm_base_url,
             model=llm_model,
             temperature=temperature,
             max_tokens=max_tokens,
-            api_key="not-needed"  # For local/OpenShift deployments
+            admission_controller=admission_controller,
+            balancer_strategy=llm_balancer_strategy,
+            cassette=llm_cassette or cassette_from_env()
         )
         
         # Tools registry
         self.tools: List[Tool] = []
         
-        # Execution history
-        self.history: List[Dict[str, Any]] = []
+        # Memoized results of pure tools, one cache per tool
+        self.tool_cache_size = tool_cache_size
+        self.tool_cache_ttl = tool_cache_ttl
+        self.tool_caches: Dict[str, ToolCache] = {}
+        
+        # Sync tools run on the I/O or CPU pool according to their declared mode
+        self.tool_executor = tool_executor or get_tool_executor()
+        
+        # Analytics (CPM, leveling, Monte Carlo) run on the shared process pool
+        self.compute_service = compute_service or get_compute_service()
+        
+        # Execution history (shared between API workers via the state store)
+        self.state_store = state_store or get_default_state_store()
+        self.state_key = name.lower().replace(" ", "_")
+        self.max_history = max_history
+        
+        # Past results of agents that reuse work for near-duplicate projects
+        self.project_index: Optional[ProjectIndex] = None
+        self.reuse_threshold = reuse_threshold
+        self.reuse_draft_token_budget = reuse_draft_token_budget
+        project_index_dir = project_index_dir or os.getenv("AUTOPMO_PROJECT_INDEX_DIR")
+        if self.reuse_results and project_index_dir:
+            self.project_index = get_project_index(os.path.join(project_index_dir, self.state_key))
+        
+        # Callbacks attached to every LLM call (metrics and tracing)
+        self._llm_callbacks = [LLMMetricsCallback(name), TracingCallback(name)]
         
         logger.info(f"Initialized {self.name} agent")
     
@@ -99,7 +199,8 @@ class BaseAgent(ABC):
     async def execute(
         self,
         task: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        drop_keys: Iterable[str] = ()
     ) -> Dict[str, Any]:
         """
         Execute a task assigned to this agent.
@@ -107,85 +208,262 @@ class BaseAgent(ABC):
         Args:
             task: Task description in natural language
             context: Additional context (project_id, user_id, etc.)
+            drop_keys: Context keys whose values the task text already
+                contains, left out of the prompt context
             
         Returns:
             Result dictionary with status, data, and metadata
+            
+        Raises:
+            AdmissionRejected: If the LLM backend is saturated
+            CircuitOpenError: If every model-server endpoint is failing
         """
         start_time = datetime.utcnow()
+        started = time.perf_counter()
+        in_flight = AGENT_IN_FLIGHT.labels(agent=agent_label(self.name))
+        in_flight.inc()
         
-        try:
-            logger.info(f"{self.name} executing task: {task[:100]}...")
-            
-            # Register tools if not already done
-            if not self.tools:
-                self.tools = self.register_tools()
+        with get_tracer().span("agent.execute", agent=self.name) as span, admission_scope(tenant_of(context)):
+            try:
+                logger.info(f"{self.name} executing task: {task[:100]}...")
+                span.set_attribute("task_chars", len(task))
+                
+                # A result generated for a near-duplicate project is a draft
+                context = context or {}
+                prior = await self._find_prior_result(context)
+                span.set_attribute("reused", prior is not None)
+                
+                # Register tools if not already done
+                if not self.tools:
+                    self.tools = self._prepare_tools(self.register_tools())
+                
+                # Prepare context as compact, budgeted JSON
+                assembler = PromptAssembler(self.name)
+                assembler.add_json(
+                    "context", context,
+                    budget=self.context_token_budget,
+                    drop_keys=self.context_exclude_keys | set(drop_keys)
+                )
+                assembler.add("input", task)
+                if prior is not None:
+                    assembler.add("draft", prior["result"], budget=self.reuse_draft_token_budget)
+                sections = assembler.render_sections()
+                context_str = sections["context"]
+                agent_input = task
+                if prior is not None:
+                    agent_input += (
+                        "\n\nDraft produced for a similar earlier project. Adapt it to "
+                        "this project's description, scope and constraints rather than "
+                        f"copying it:\n{sections['draft']}"
+                    )
+                prompt_report = assembler.record()
+                span.set_attribute("prompt_tokens_saved", prompt_report.saved_tokens)
+                
+                # Create prompt
+                prompt = ChatPromptTemplate.from_messages([
+                    ("system", self.get_system_prompt()),
+                    ("human", "Context:\n{context}\n\nTask:\n{input}"),
+                    MessagesPlaceholder(variable_name="agent_scratchpad")
+                ])
+                
+                # Create agent
+                agent = create_openai_functions_agent(
+                    llm=self.llm,
+                    tools=self.tools,
+                    prompt=prompt
+                )
+                
+                # Execute
+                executor = AgentExecutor(
+                    agent=agent,
+                    tools=self.tools,
+                    verbose=True,
+                    max_iterations=10,
+                    handle_parsing_errors=True
+                )
+                
+                result = await executor.ainvoke(
+                    {
+                        "input": agent_input,
+                        "context": context_str
+                    },
+                    config={"callbacks": self._llm_callbacks}
+                )
+                
+                # Calculate execution time
+                execution_time = (datetime.utcnow() - start_time).total_seconds()
+                
+                # Format response
+                response = {
+                    "status": "success",
+                    "agent": self.name,
+                    "task": task,
+                    "result": result.get("output", ""),
+                    "execution_time_seconds": execution_time,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "context": context,
+                    "prompt_stats": prompt_report.to_dict()
+                }
+                if prior is not None:
+                    response["reused_from"] = prior["reused_from"]
+                
+                # Store in history
+                await self.state_store.offload(
+                    self.state_store.append_history, self.state_key, response, self.max_history
+                )
+                await self._index_result(task, context, response["result"])
+                
+                AGENT_EXECUTION_SECONDS.labels(
+                    agent=agent_label(self.name), status="success"
+                ).observe(time.perf_counter() - started)
+                
+                logger.info(f"{self.name} completed task in {execution_time:.2f}s")
+                
+                return response
+                
+            except AdmissionRejected:
+                # Shed load is surfaced to the caller (HTTP 429), not reported as a result
+                AGENT_EXECUTION_SECONDS.labels(
+                    agent=agent_label(self.name), status="rejected"
+                ).observe(time.perf_counter() - started)
+                raise
+                
+            except CircuitOpenError as e:
+                # Fail fast while the model server is down (HTTP 503)
+                logger.warning(f"{self.name} failed fast: {e}")
+                record_error(self.name, e)
+                span.status = "error"
+                span.error = str(e)
+                AGENT_EXECUTION_SECONDS.labels(
+                    agent=agent_label(self.name), status="unavailable"
+                ).observe(time.perf_counter() - started)
+                raise
+                
+            except Exception as e:
+                logger.error(f"{self.name} error: {str(e)}", exc_info=True)
+                
+                record_error(self.name, e)
+                span.status = "error"
+                span.error = str(e)
+                AGENT_EXECUTION_SECONDS.labels(
+                    agent=agent_label(self.name), status="error"
+                ).observe(time.perf_counter() - started)
+                
+                execution_time = (datetime.utcnow() - start_time).total_seconds()
+                
+                return {
+                    "status": "error",
+                    "agent": self.name,
+                    "task": task,
+                    "error": str(e),
+                    "execution_time_seconds": execution_time,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "context": context
+                }
             
-            # Prepare context
-            context = context or {}
-            context_str = json.dumps(context, indent=2)
-            
-            # Create prompt
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", self.get_system_prompt()),
-                ("human", f"Context:\n{context_str}\n\nTask:\n{task}")
-            ])
-            
-            # Create agent
-            agent = create_openai_functions_agent(
-                llm=self.llm,
-                tools=self.tools,
-                prompt=prompt
-            )
-            
-            # Execute
-            executor = AgentExecutor(
-                agent=agent,
-                tools=self.tools,
-                verbose=True,
-                max_iterations=10,
-                handle_parsing_errors=True
-            )
-            
-            result = await executor.ainvoke({
-                "input": task,
-                "context": context_str
-            })
-            
-            # Calculate execution time
-            execution_time = (datetime.utcnow() - start_time).total_seconds()
+            finally:
+                in_flight.dec()
+    
+    def _reuse_fields(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Structured fields a reused project must match exactly."""
+        return {key: context.get(key) for key in self.reuse_match_keys}
+    
+    async def _find_prior_result(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find the result generated for a near-duplicate project.
+        
+        Projects are matched on their description alone, so the request
+        template shared by all projects does not inflate similarity, and the
+        structured fields (environment, budget, timeline) must be equal.
+        The search runs on a worker thread, off the event loop.
+        
+        Args:
+            context: Task context with the project "description";
+                "_skip_reuse" forces a fresh run
             
-            # Format response
-            response = {
-                "status": "success",
-                "agent": self.name,
+        Returns:
+            Dict with the prior "result" and "reused_from" metadata, or None
+        """
+        description = context.get("description")
+        if self.project_index is None or not description or context.get("_skip_reuse"):
+            return None
+        fields = self._reuse_fields(context)
+        matches = await asyncio.to_thread(
+            self.project_index.search, description, k=5, min_score=self.reuse_threshold
+        )
+        for similarity, payload in matches:
+            if payload.get("fields") == fields:
+                return {
+                    "result": payload["result"],
+                    "reused_from": {
+                        "project_name": payload.get("project_name"),
+                        "similarity": similarity
+                    }
+                }
+        return None
+    
+    async def _index_result(self, task: str, context: Dict[str, Any], result: Any):
+        """Remember a generated result for reuse by similar future projects."""
+        description = context.get("description")
+        if self.project_index is None or not description or not isinstance(result, str) or not result:
+            return
+        try:
+            await asyncio.to_thread(self.project_index.add, description, {
                 "task": task,
-                "result": result.get("output", ""),
-                "execution_time_seconds": execution_time,
-                "timestamp": datetime.utcnow().isoformat(),
-                "context": context
-            }
-            
-            # Store in history
-            self.history.append(response)
-            
-            logger.info(f"{self.name} completed task in {execution_time:.2f}s")
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"{self.name} error: {str(e)}", exc_info=True)
-            
-            execution_time = (datetime.utcnow() - start_time).total_seconds()
+                "project_name": context.get("project_name"),
+                "fields": self._reuse_fields(context),
+                "result": result
+            })
+        except OSError as e:
+            logger.warning(f"{self.name} could not index result: {e}")
+    
+    def _prepare_tools(self, tools: List[Tool]) -> List[Tool]:
+        """
+        Wrap registered tools with cross-cutting instrumentation.
+        
+        Synchronous tools without a coroutine get one that runs them on the
+        tool executor pool matching their declared mode (see tool_executor),
+        so the agent loop never runs blocking or CPU-bound tools on the
+        event loop. Memoization wraps the dispatch, so cache hits are served
+        without a pool round trip.
+        
+        Args:
+            tools: Tools returned by register_tools()
             
-            return {
-                "status": "error",
-                "agent": self.name,
-                "task": task,
-                "error": str(e),
-                "execution_time_seconds": execution_time,
-                "timestamp": datetime.utcnow().isoformat(),
-                "context": context
-            }
+        Returns:
+            The same tools with instrumented callables
+        """
+        for tool in tools:
+            if tool.coroutine is None and tool.func is not None:
+                tool.coroutine = self.tool_executor.offload(tool.func)
+            if tool.func is not None:
+                tool.func = self._wrap_tool_func(tool.name, tool.func)
+            if tool.coroutine is not None:
+                tool.coroutine = self._wrap_tool_func(tool.name, tool.coroutine)
+        return tools
+    
+    def _wrap_tool_func(self, tool_name: str, func: Callable) -> Callable:
+        """Apply memoization, metrics and tracing to a single tool callable."""
+        cache = self._tool_cache(tool_name)
+        if cache is not None:
+            func = memoize_tool(self.name, tool_name, func, cache)
+        func = trace_tool(self.name, tool_name, func)
+        return instrument_tool(self.name, tool_name, func)
+    
+    def _tool_cache(self, tool_name: str) -> Optional[ToolCache]:
+        """Result cache for a tool, or None if it must not be memoized."""
+        if tool_name in self.impure_tools:
+            return None
+        size = self.tool_cache_sizes.get(tool_name, self.tool_cache_size)
+        if size <= 0:
+            return None
+        if tool_name not in self.tool_caches:
+            self.tool_caches[tool_name] = ToolCache(maxsize=size, ttl=self.tool_cache_ttl)
+        return self.tool_caches[tool_name]
+    
+    def tool_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics of each memoized tool."""
+        return {name: cache.stats() for name, cache in self.tool_caches.items()}
     
     def get_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -197,11 +475,20 @@ class BaseAgent(ABC):
         Returns:
             List of execution records
         """
-        return self.history[-limit:]
+        return self.state_store.get_history(self.state_key, limit)
+    
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """All retained execution records, oldest first."""
+        return self.state_store.get_history(self.state_key, self.max_history)
+    
+    def history_count(self) -> int:
+        """Number of retained execution records."""
+        return self.state_store.history_count(self.state_key)
     
     def clear_history(self):
         """Clear execution history."""
-        self.history = []
+        self.state_store.clear_history(self.state_key)
         logger.info(f"{self.name} history cleared")
     
     async def chat(self, message: str) -> str:
@@ -213,13 +500,25 @@ class BaseAgent(ABC):
             
         Returns:
             Agent response
+            
+        Raises:
+            AdmissionRejected: If the LLM backend is saturated
+            CircuitOpenError: If every model-server endpoint is failing
         """
         messages = [
             SystemMessage(content=self.get_system_prompt()),
             HumanMessage(content=message)
         ]
         
-        response = await self.llm.agenerate([messages])
+        try:
+            response = await self.llm.agenerate([messages], callbacks=self._llm_callbacks)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            # Retries and failover already happened in the LLM client
+            logger.error(f"{self.name} chat failed: {e}")
+            record_error(self.name, e)
+            raise
         return response.generations[0][0].text
     
     def __repr__(self) -> str:
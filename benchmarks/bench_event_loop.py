@@ -0,0 +1,145 @@
+"""
+AutoPMO Event-Loop Latency Benchmark
+
+Runs CPU-bound agent tools (WBS generation and the risk register) at
+increasing concurrency and measures event-loop lag with a ticker that
+expects to wake every ``--tick-ms``. Each tool call is run:
+
+- inline:  directly on the event loop (the behaviour before tool offloading)
+- thread:  on the CPU thread pool of a ToolExecutor
+- process: on the CPU process pool of a ToolExecutor
+
+Loop lag should stay flat for the pooled modes as tool concurrency grows.
+
+Usage:
+    python -m benchmarks.bench_event_loop --concurrency 1,4,16 --calls 64
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import environment_info, summarize_latencies, write_report
+
+MODES = ("inline", "thread", "process")
+
+SAMPLE_DESCRIPTION = "Migrate the e-commerce platform (React, FastAPI, PostgreSQL) to OpenShift"
+
+# Repetitions per tool call, so one call costs a few milliseconds
+WORK_FACTOR = 20
+
+
+def _tool_call(description: str) -> int:
+    """One CPU-bound tool call: the planning and risk generators, repeated."""
+    from agents.planning_agent import PlanningAgent
+    from agents.risk_agent import RiskAgent
+
+    size = 0
+    for _ in range(WORK_FACTOR):
+        size += len(PlanningAgent._generate_wbs(description))
+        size += len(RiskAgent._generate_risk_register(description))
+    return size
+
+
+async def _ticker(interval: float, lags: List[float], stop: asyncio.Event):
+    expected = time.perf_counter() + interval
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, expected - time.perf_counter()))
+        now = time.perf_counter()
+        lags.append(max(0.0, now - expected))
+        expected = now + interval
+
+
+async def run_mode(mode: str, concurrency: int, calls: int, tick: float) -> Dict[str, Any]:
+    """Issue ``calls`` tool calls with at most ``concurrency`` in flight."""
+    from agents.tool_executor import CPU, ToolExecutor, cpu_bound
+
+    executor = None
+    if mode == "inline":
+        async def call():
+            return _tool_call(SAMPLE_DESCRIPTION)
+    else:
+        executor = ToolExecutor(cpu_workers=concurrency, cpu_executor=mode)
+        call = executor.offload(cpu_bound(_tool_call), CPU)
+        # Start the workers before measuring
+        await asyncio.gather(*(call(SAMPLE_DESCRIPTION) for _ in range(concurrency)))
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(tick, lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker():
+        async with semaphore:
+            if mode == "inline":
+                await call()
+                # Let the ticker observe the stall between calls
+                await asyncio.sleep(0)
+            else:
+                await call(SAMPLE_DESCRIPTION)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    if executor is not None:
+        executor.shutdown()
+
+    lag = summarize_latencies(lags)
+    return {
+        "calls_per_second": calls / elapsed if elapsed else 0.0,
+        "loop_lag_ms": {k: v * 1000 if k != "count" else v for k, v in lag.items()},
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    modes = args.modes.split(",")
+    results: Dict[str, Any] = {}
+    for mode in modes:
+        results[mode] = {}
+        for concurrency in levels:
+            summary = await run_mode(mode, concurrency, args.calls, args.tick_ms / 1000)
+            results[mode][str(concurrency)] = summary
+            lag = summary["loop_lag_ms"]
+            logging.info(
+                f"{mode:>7} c={concurrency:<3} "
+                f"{summary['calls_per_second']:8.1f} calls/s  "
+                f"lag p50={lag['p50']:.2f}ms p99={lag['p99']:.2f}ms max={lag['max']:.2f}ms"
+            )
+    return {
+        "environment": environment_info(),
+        "config": {
+            "concurrency": levels,
+            "calls": args.calls,
+            "tick_ms": args.tick_ms,
+            "work_factor": WORK_FACTOR,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated tool concurrency levels")
+    parser.add_argument("--calls", type=int, default=64, help="Tool calls per level")
+    parser.add_argument("--tick-ms", type=float, default=5.0, help="Ticker interval in milliseconds")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of inline,thread,process")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    logging.getLogger("agents").setLevel(logging.WARNING)
+    write_report(asyncio.run(main_async(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
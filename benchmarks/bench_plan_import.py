@@ -0,0 +1,173 @@
+"""
+AutoPMO Plan Import Benchmark
+
+Generates synthetic project plans of a target size in each import format
+(CSV, MS Project XML, YAML) and measures the streaming importer: bytes and
+tasks per second and the peak memory of the importing process. Each format
+is imported in a fresh process, so peak RSS is that of one import.
+
+Memory should stay well below the file size: tasks are held column-wise
+with interned ids and team names rather than as parsed documents.
+
+Usage:
+    python -m benchmarks.bench_plan_import --size-mb 200 --formats csv,xml,yaml
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, TextIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import environment_info, write_report
+
+FORMATS = ("csv", "xml", "yaml")
+
+TEAMS = ("Platform", "Backend", "Frontend", "QA", "Security", "Data", "DevOps", "PMO")
+
+TASKS_PER_PHASE = 50
+
+
+def _task(i: int, rng: random.Random) -> Dict[str, Any]:
+    deps = [str(i - d) for d in sorted({rng.randint(1, 20) for _ in range(rng.randint(0, 3))}) if i - d > 0]
+    return {
+        "id": str(i + 1),
+        "name": f"Migrate service component {i} and verify rollout",
+        "phase": str(i // TASKS_PER_PHASE + 1),
+        "duration": rng.randint(1, 10),
+        "effort_hours": rng.randint(4, 80),
+        "team": TEAMS[i % len(TEAMS)],
+        "dependencies": [str(int(d) + 1) for d in deps],
+    }
+
+
+def write_csv(f: TextIO, size: int, rng: random.Random):
+    f.write("Task ID,Task Name,Phase,Duration,Work,Resource Names,Predecessors\n")
+    i = 0
+    while f.tell() < size:
+        t = _task(i, rng)
+        predecessors = ";".join(f"{d}FS" for d in t["dependencies"])
+        f.write(
+            f"{t['id']},{t['name']},{t['phase']},{t['duration']} days,{t['effort_hours']} hrs,"
+            f"{t['team']},\"{predecessors}\"\n"
+        )
+        i += 1
+
+
+def write_xml(f: TextIO, size: int, rng: random.Random):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n<Project xmlns="http://schemas.microsoft.com/project">\n')
+    f.write("<Name>Benchmark Plan</Name>\n<Tasks>\n")
+    # Task UIDs are offset past the phase summary UIDs
+    i = 0
+    while f.tell() < size:
+        t = _task(i, rng)
+        if i % TASKS_PER_PHASE == 0:
+            f.write(
+                f"<Task><UID>{t['phase']}</UID><ID>P{t['phase']}</ID><Name>Phase {t['phase']}</Name>"
+                f"<OutlineNumber>{t['phase']}</OutlineNumber><Summary>1</Summary></Task>\n"
+            )
+        links = "".join(
+            f"<PredecessorLink><PredecessorUID>{int(d) + 10 ** 7}</PredecessorUID><Type>1</Type></PredecessorLink>"
+            for d in t["dependencies"]
+        )
+        f.write(
+            f"<Task><UID>{int(t['id']) + 10 ** 7}</UID><ID>{t['id']}</ID><Name>{t['name']}</Name>"
+            f"<Summary>0</Summary><Duration>PT{t['duration'] * 8}H0M0S</Duration>"
+            f"<Work>PT{t['effort_hours']}H0M0S</Work>{links}</Task>\n"
+        )
+        i += 1
+    f.write("</Tasks>\n<Resources>\n")
+    for uid, team in enumerate(TEAMS, start=1):
+        f.write(f"<Resource><UID>{uid}</UID><Name>{team}</Name></Resource>\n")
+    f.write("</Resources>\n<Assignments>\n")
+    for task in range(i):
+        f.write(
+            f"<Assignment><TaskUID>{task + 1 + 10 ** 7}</TaskUID>"
+            f"<ResourceUID>{task % len(TEAMS) + 1}</ResourceUID></Assignment>\n"
+        )
+    f.write("</Assignments>\n</Project>\n")
+
+
+def write_yaml(f: TextIO, size: int, rng: random.Random):
+    f.write("project:\n  name: Benchmark Plan\n  phases:\n")
+    i = 0
+    while f.tell() < size:
+        t = _task(i, rng)
+        if i % TASKS_PER_PHASE == 0:
+            f.write(f"    - id: \"{t['phase']}\"\n      name: Phase {t['phase']}\n      tasks:\n")
+        deps = ", ".join(f'"{d}"' for d in t["dependencies"])
+        f.write(
+            f"        - id: \"{t['id']}\"\n"
+            f"          name: {t['name']}\n"
+            f"          duration: {t['duration']}\n"
+            f"          effort_hours: {t['effort_hours']}\n"
+            f"          assigned_to: {t['team']}\n"
+            f"          dependencies: [{deps}]\n"
+        )
+        i += 1
+
+
+WRITERS = {"csv": write_csv, "xml": write_xml, "yaml": write_yaml}
+
+
+def generate(path: str, fmt: str, size_mb: float, seed: int = 7):
+    with open(path, "w") as f:
+        WRITERS[fmt](f, int(size_mb * 1e6), random.Random(seed))
+
+
+def import_once(path: str, fmt: str) -> Dict[str, Any]:
+    """Import one file in this process and report stats and peak RSS."""
+    from agents.plan_importer import import_plan
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    plan = import_plan(path, fmt)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = plan.stats.to_dict()
+    stats["dangling_references"] = len(plan.dangling)
+    stats["peak_rss_mb"] = round(peak / 1024, 1)
+    stats["import_rss_mb"] = round((peak - before) / 1024, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=200, help="Approximate size of each generated file")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated formats")
+    parser.add_argument("--dir", help="Directory for generated files (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--import-file", nargs=2, metavar=("PATH", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.import_file:
+        print(json.dumps(import_once(*args.import_file)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for fmt in args.formats.split(","):
+            path = os.path.join(directory, f"plan.{fmt}")
+            generate(path, fmt, args.size_mb)
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_plan_import", "--import-file", path, fmt],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            ).stdout
+            results[fmt] = json.loads(output.strip().splitlines()[-1])
+            os.remove(path)
+
+    report = {
+        "environment": environment_info(),
+        "config": {"size_mb": args.size_mb, "formats": args.formats},
+        "results": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
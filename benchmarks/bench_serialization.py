@@ -0,0 +1,179 @@
+"""
+AutoPMO Serialization Benchmark
+
+Measures encode time and payload size of realistic API responses and agent
+history records:
+
+- fastapi_default: jsonable_encoder + JSONResponse rendering (the path taken
+  when an endpoint returns a plain dict)
+- fast: ``dumps``, which responses.FastJSONResponse renders with (orjson when
+  installed)
+
+for the orchestrator response with the request context repeated in every
+agent result (previous shape) and returned once (current shape), an agent
+response, and a page of history records (encode and decode).
+
+Usage:
+    python -m benchmarks.bench_serialization --repeat 2000 --output ser.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.common import environment_info, write_report
+
+AGENTS = ("planning", "risk", "infrastructure", "communications")
+
+
+def build_context(tasks: int = 40) -> Dict[str, Any]:
+    """Project context of the size sent with a project creation request."""
+    return {
+        "project_name": "E-commerce OpenShift Migration",
+        "budget": 150000,
+        "timeline_weeks": 12,
+        "stakeholders": [f"Stakeholder {i}" for i in range(12)],
+        "tasks": [
+            {
+                "id": f"WBS-{i // 10 + 1}.{i % 10 + 1}",
+                "name": f"Migrate service component {i}",
+                "duration": 3 + i % 7,
+                "depends_on": [f"WBS-{(i - 1) // 10 + 1}.{(i - 1) % 10 + 1}"] if i else [],
+                "owner": f"engineer-{i % 6}",
+            }
+            for i in range(tasks)
+        ],
+    }
+
+
+def build_agent_result(agent: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "agent": agent.capitalize(),
+        "task": f"Handle the {agent} part of: Create a project plan for the migration",
+        "result": (f"{agent.capitalize()} analysis for the migration. " * 60).strip(),
+        "execution_time_seconds": 2.4831,
+        "timestamp": datetime.utcnow().isoformat(),
+        "context": context,
+        "prompt_stats": {
+            "original_tokens": 1840,
+            "final_tokens": 610,
+            "saved_tokens": 1230,
+            "sections": {"context": {"original_tokens": 1840, "final_tokens": 610, "truncated": True}},
+        },
+    }
+
+
+def build_orchestrator_response(nested_context: bool) -> Dict[str, Any]:
+    context = build_context()
+    results = [build_agent_result(agent, context) for agent in AGENTS]
+    if not nested_context:
+        results = [{k: v for k, v in r.items() if k != "context"} for r in results]
+    return {
+        "status": "success",
+        "project_id": "proj-4821",
+        "project_name": context["project_name"],
+        "ai_analysis": {
+            "status": "success",
+            "request": "Create a project plan for migrating an e-commerce application to OpenShift.",
+            "intent": {"category": "create_project", "agents": list(AGENTS)},
+            "response": "Synthesized plan. " * 120,
+            "synthesis_strategy": "summarize",
+            "agent_results": results,
+            "recommendations": [f"Recommendation {i}" for i in range(8)],
+            "context": context,
+            "prompt_stats": {"original_tokens": 5200, "final_tokens": 2100, "saved_tokens": 3100},
+        },
+    }
+
+
+def fastapi_default(content: Any) -> bytes:
+    return JSONResponse(content=None).render(jsonable_encoder(content))
+
+
+def fast(content: Any) -> bytes:
+    from agents.serialization import dumps
+    return dumps(content)
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> float:
+    """Mean seconds per call after a warm-up call."""
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def bench_encoders(payload: Any, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name, encode in (("fastapi_default", fastapi_default), ("fast", fast)):
+        results[name] = {
+            "encode_us": time_call(lambda: encode(payload), repeat) * 1e6,
+            "bytes": len(encode(payload)),
+        }
+    results["speedup"] = results["fastapi_default"]["encode_us"] / results["fast"]["encode_us"]
+    return results
+
+
+def bench_history(records: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    from agents.serialization import dumps_str, loads
+
+    stdlib = [json.dumps(r, separators=(",", ":"), default=str) for r in records]
+    fast_encoded = [dumps_str(r) for r in records]
+    return {
+        "stdlib": {
+            "encode_us": time_call(lambda: [json.dumps(r, separators=(",", ":"), default=str) for r in records], repeat) * 1e6,
+            "decode_us": time_call(lambda: [json.loads(s) for s in stdlib], repeat) * 1e6,
+        },
+        "fast": {
+            "encode_us": time_call(lambda: [dumps_str(r) for r in records], repeat) * 1e6,
+            "decode_us": time_call(lambda: [loads(s) for s in fast_encoded], repeat) * 1e6,
+        },
+        "records": len(records),
+        "bytes": sum(len(s) for s in fast_encoded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="Encodes per measurement")
+    parser.add_argument("--history", type=int, default=50, help="History records per page")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from agents.serialization import HAVE_ORJSON
+
+    context = build_context()
+    agent_result = build_agent_result("planning", context)
+    agent_response = {
+        "status": "success",
+        "agent": "Planning",
+        "result": agent_result["result"],
+        "execution_time": agent_result["execution_time_seconds"],
+    }
+
+    report = {
+        "environment": environment_info(),
+        "config": {"repeat": args.repeat, "orjson": HAVE_ORJSON},
+        "results": {
+            "orchestrator_nested_context": bench_encoders(build_orchestrator_response(True), args.repeat),
+            "orchestrator": bench_encoders(build_orchestrator_response(False), args.repeat),
+            "agent_response": bench_encoders(agent_response, args.repeat),
+            "history": bench_history([agent_result] * args.history, max(1, args.repeat // 20)),
+        },
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Shared helpers for AutoPMO benchmark scripts.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence.
+
+    Args:
+        sorted_values: Values sorted ascending
+        pct: Percentile in [0, 100]
+
+    Returns:
+        Percentile value (0.0 for an empty sequence)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies (seconds) into mean/p50/p95/p99/max."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "count": count,
+        "mean": sum(values) / count if count else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Metadata identifying the build a result was produced on."""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+
+    return {
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]):
+    """Write a report as stable, diffable JSON to a file or stdout."""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Percentage change of every numeric leaf present in both reports.
+
+    Keys are dotted paths, e.g. ``results.orchestrator.4.latency.p95``.
+    """
+    deltas: Dict[str, float] = {}
+
+    def walk(old: Any, new: Any, path: str):
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in old.keys() & new.keys():
+                walk(old[key], new[key], f"{path}.{key}" if path else str(key))
+        elif (
+            isinstance(old, (int, float)) and isinstance(new, (int, float))
+            and not isinstance(old, bool) and old
+        ):
+            deltas[path] = round((new - old) / old * 100.0, 2)
+
+    walk(baseline.get("results", {}), current.get("results", {}), "results")
+    return deltas
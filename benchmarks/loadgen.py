@@ -0,0 +1,502 @@
+"""
+AutoPMO Load Generator
+
+Replays a weighted mix of API requests (project creation, risk and planning
+agent runs, history reads) at a fixed open-loop arrival rate and records
+latency histograms, for capacity planning of API pods.
+
+Open loop: arrivals follow a Poisson (or uniform) schedule that does not
+depend on responses, so a slow server builds a queue instead of slowing the
+generator down. Latency is measured from each request's *intended* send
+time, which corrects for coordinated omission: time a request spent waiting
+for a free connection, or behind a stalled generator, counts against the
+server. Requests still outstanding at the end of a run are recorded at the
+drain timeout rather than dropped. Service time (from the actual send) is
+reported alongside for comparison.
+
+By default a stub LLM server and a local API process pointed at it are
+started; ``--url`` targets an already running API instead.
+
+Usage:
+    python -m benchmarks.loadgen --rates 1,2,4,8 --duration 60 --slo-p99-ms 5000
+    python -m benchmarks.loadgen --url http://autopmo-api:8000 --rates 5 \\
+        --mix create_project=1,risk=2,planning=2,history=5 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import compare_reports, environment_info, write_report
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("create_project", "risk", "planning", "history")
+
+DEFAULT_MIX = "create_project=1,risk=2,planning=2,history=5"
+
+HISTORY_AGENTS = ("orchestrator", "planning", "risk", "infrastructure")
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram with bounded relative error.
+
+    Values are kept in microseconds: exactly below ``2 ** precision_bits`` and
+    in buckets of ``2 ** -(precision_bits - 1)`` relative width above (under
+    1% error with the default 8 bits), so millions of samples take a few
+    kilobytes and histograms from separate runs can be merged.
+    """
+
+    def __init__(self, precision_bits: int = 8):
+        self.precision_bits = precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, micros: int) -> int:
+        shift = max(0, micros.bit_length() - self.precision_bits)
+        return shift * self._half + (micros >> shift)
+
+    def _upper(self, index: int) -> float:
+        """Highest value (seconds) in a bucket."""
+        shift = max(0, index // self._half - 1)
+        return (((index - shift * self._half + 1) << shift) - 1) / 1e6
+
+    def record(self, seconds: float, count: int = 1):
+        index = self._index(max(0, int(seconds * 1e6)))
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += seconds * count
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the nearest-rank percentile."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, max and percentiles in seconds (keys p50 ... p99_9)."""
+        result = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+        for pct in PERCENTILES:
+            result["p" + f"{pct:g}".replace(".", "_")] = self.percentile(pct)
+        return result
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Non-empty buckets as (upper bound seconds, count), for plotting or merging."""
+        return [(self._upper(index), self.counts[index]) for index in sorted(self.counts)]
+
+
+@dataclass
+class Scenario:
+    """
+    One request type of the mix.
+
+    Attributes:
+        name: Scenario name used in ``--mix`` and the report
+        method: HTTP method
+        path: Request path
+        body: JSON body (None for reads)
+    """
+    name: str
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+
+
+def build_request(name: str, rng: random.Random, tenants: int) -> Scenario:
+    """Concrete request for a scenario, spread over ``tenants`` organizations."""
+    organization = f"tenant-{rng.randrange(tenants)}"
+    if name == "create_project":
+        return Scenario(name, "POST", "/api/v1/projects", {
+            "name": f"Load Test Migration {rng.randrange(10 ** 6)}",
+            "description": "Migrate the e-commerce platform to OpenShift",
+            "target_environment": "openshift",
+            "budget": 150000,
+            "timeline_weeks": 12,
+            "organization": organization,
+        })
+    if name == "risk":
+        return Scenario(name, "POST", "/api/v1/agents/execute", {
+            "agent_type": "risk",
+            "task": "Assess the risks of migrating the e-commerce platform to OpenShift",
+            "context": {"project_name": "E-commerce OpenShift Migration", "organization": organization},
+        })
+    if name == "planning":
+        return Scenario(name, "POST", "/api/v1/agents/execute", {
+            "agent_type": "planning",
+            "task": "Generate Work Breakdown Structure for the project",
+            "context": {"project_name": "E-commerce OpenShift Migration", "organization": organization},
+        })
+    if name == "history":
+        agent = HISTORY_AGENTS[rng.randrange(len(HISTORY_AGENTS))]
+        return Scenario(name, "GET", f"/api/v1/agents/{agent}/history?limit=10")
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse ``name=weight,...`` into scenario weights.
+
+    Raises:
+        ValueError: On unknown scenarios or non-positive total weight
+    """
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError("Request mix needs a positive weight")
+    return mix
+
+
+def arrival_times(rate: float, duration: float, arrival: str, rng: random.Random) -> List[float]:
+    """Intended send offsets (seconds) of an open-loop run."""
+    times: List[float] = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+class _RunStats:
+    """Histograms and counters of one rate level."""
+
+    def __init__(self, mix: Dict[str, float]):
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.scenarios = {name: LatencyHistogram() for name in mix}
+        self.requests = {name: 0 for name in mix}
+        self.errors: Dict[str, int] = {}
+        self.scenario_errors = {name: 0 for name in mix}
+        self.max_send_lag = 0.0
+
+    def error(self, scenario: str, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.scenario_errors[scenario] += 1
+
+    def success(self, scenario: str, latency: float, service: float):
+        self.latency.record(latency)
+        self.service.record(service)
+        self.scenarios[scenario].record(latency)
+
+
+async def run_rate(
+    client: httpx.AsyncClient,
+    rate: float,
+    duration: float,
+    warmup: float,
+    mix: Dict[str, float],
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    Drive one open-loop run at ``rate`` requests per second.
+
+    Requests intended during the first ``warmup`` seconds are sent but not
+    recorded. Latency of every recorded request is measured from its intended
+    send time.
+    """
+    rng = random.Random(args.seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    schedule = arrival_times(rate, warmup + duration, args.arrival, rng)
+    stats = _RunStats(mix)
+    connections = asyncio.Semaphore(args.max_in_flight)
+    pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+
+    async def fire(request: Scenario, intended: float, recorded: bool):
+        async with connections:
+            sent = time.perf_counter()
+            try:
+                response = await client.request(request.method, request.path, json=request.body)
+                failure = None if response.status_code < 400 else str(response.status_code)
+            except httpx.TimeoutException:
+                failure = "timeout"
+            except httpx.HTTPError as e:
+                failure = type(e).__name__
+            done = time.perf_counter()
+
+        if not recorded:
+            return
+        if failure is None:
+            stats.success(request.name, done - intended, done - sent)
+        else:
+            stats.error(request.name, failure)
+            if failure == "timeout":
+                # A timeout is a very slow response, not a missing sample
+                stats.latency.record(done - intended)
+                stats.scenarios[request.name].record(done - intended)
+
+    start = time.perf_counter()
+    for offset in schedule:
+        intended = start + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        recorded = offset >= warmup
+        request = build_request(rng.choices(names, weights)[0], rng, args.tenants)
+        if recorded:
+            stats.requests[request.name] += 1
+            stats.max_send_lag = max(stats.max_send_lag, time.perf_counter() - intended)
+        task = asyncio.create_task(fire(request, intended, recorded))
+        pending[task] = (request.name, intended)
+        task.add_done_callback(pending.pop)
+
+    offered_end = time.perf_counter()
+    if pending:
+        await asyncio.wait(list(pending), timeout=args.drain_timeout)
+
+    # Still outstanding: record at the drain deadline instead of omitting them
+    now = time.perf_counter()
+    for task, (name, intended) in list(pending.items()):
+        task.cancel()
+        if intended - start >= warmup:
+            stats.error(name, "unfinished")
+            stats.latency.record(now - intended)
+            stats.scenarios[name].record(now - intended)
+
+    requests = sum(stats.requests.values())
+    errors = sum(stats.errors.values())
+    completed = requests - errors
+    latency = stats.latency.summary()
+    result = {
+        "target_rps": rate,
+        "offered_rps": requests / duration if duration > 0 else 0.0,
+        "achieved_rps": completed / (offered_end - start - warmup) if offered_end - start > warmup else 0.0,
+        "requests": requests,
+        "completed": completed,
+        "errors": dict(sorted(stats.errors.items())),
+        "error_rate": errors / requests if requests else 0.0,
+        "latency": latency,
+        "service_time": stats.service.summary(),
+        "max_send_lag_seconds": stats.max_send_lag,
+        "scenarios": {
+            name: {
+                "requests": stats.requests[name],
+                "errors": stats.scenario_errors[name],
+                "latency": stats.scenarios[name].summary(),
+            }
+            for name in mix if stats.requests[name]
+        },
+    }
+    if args.histograms:
+        result["histogram"] = stats.latency.buckets()
+    if args.slo_p99_ms is not None:
+        result["within_slo"] = (
+            latency["p99"] * 1000.0 <= args.slo_p99_ms and result["error_rate"] <= args.max_error_rate
+        )
+    if stats.max_send_lag > 0.1:
+        logger.warning(
+            f"Generator fell {stats.max_send_lag:.2f}s behind schedule at {rate} rps; "
+            f"latencies include the delay, but consider a dedicated load host"
+        )
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(app: str, llm_url: str, llm_model: str, log_path: Optional[str]) -> Tuple[subprocess.Popen, str]:
+    """
+    Start the API in a separate process, pointed at the given model server.
+
+    A separate process keeps the generator's event loop from competing with
+    the server's and measures the same HTTP stack as production.
+    """
+    port = _free_port()
+    env = dict(os.environ, LLM_BASE_URL=llm_url, LLM_MODEL=llm_model)
+    log = open(log_path, "ab") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=log, stderr=log,
+    )
+    if log_path:
+        log.close()
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_healthy(url: str, process: Optional[subprocess.Popen], timeout: float = 120.0):
+    """
+    Poll ``/health`` until the API answers.
+
+    Raises:
+        RuntimeError: If the API exits or does not become healthy in time
+    """
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=5.0) as client:
+        while time.perf_counter() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"API process exited with code {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"API at {url} did not become healthy within {timeout:.0f}s")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    rates = [float(r) for r in args.rates.split(",") if r]
+
+    stub: Optional[StubLLMServer] = None
+    process: Optional[subprocess.Popen] = None
+    url = args.url
+    stub_config = StubConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+    )
+    try:
+        if not url:
+            if not args.llm_url:
+                stub = StubLLMServer(stub_config).start_in_thread()
+            process, url = start_api(
+                args.app,
+                args.llm_url or stub.base_url,
+                args.llm_model or (stub.model if stub else "mistral-7b-instruct"),
+                args.server_log,
+            )
+        await wait_healthy(url, process)
+
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        results: Dict[str, Dict[str, Any]] = {}
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            for rate in rates:
+                logger.info(f"Offering {rate} rps for {args.duration}s (+{args.warmup}s warm-up)")
+                results[f"{rate:g}"] = await run_rate(client, rate, args.duration, args.warmup, mix, args)
+
+        report = {
+            "benchmark": "autopmo-load",
+            "environment": environment_info(),
+            "config": {
+                "url": args.url or "local",
+                "llm_url": args.llm_url or ("stub" if stub else None),
+                "rates": rates,
+                "duration_seconds": args.duration,
+                "warmup_seconds": args.warmup,
+                "arrival": args.arrival,
+                "mix": mix,
+                "tenants": args.tenants,
+                "max_in_flight": args.max_in_flight,
+                "timeout_seconds": args.timeout,
+                "seed": args.seed,
+                "stub": {
+                    "latency_ms": stub_config.latency_ms,
+                    "tokens_per_second": stub_config.tokens_per_second,
+                    "output_tokens": stub_config.output_tokens,
+                } if stub else None,
+            },
+            "results": results,
+        }
+        if args.slo_p99_ms is not None:
+            passing = [r["target_rps"] for r in results.values() if r["within_slo"]]
+            report["capacity"] = {
+                "slo_p99_ms": args.slo_p99_ms,
+                "max_error_rate": args.max_error_rate,
+                "max_rate_within_slo": max(passing) if passing else None,
+            }
+        return report
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if stub is not None:
+            stub.stop_thread()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="1,2,4", help="Comma-separated arrival rates (requests/second)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per rate")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unrecorded seconds before each rate")
+    parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--tenants", type=int, default=4, help="Organizations requests are spread over")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Client connection limit; requests beyond it wait, and the wait counts")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--drain-timeout", type=float, default=60.0,
+                        help="Seconds to wait for outstanding requests after each rate")
+    parser.add_argument("--slo-p99-ms", type=float, help="p99 latency objective for the capacity summary")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Highest error rate a rate may have to meet the objective")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="Load an already running API instead of starting one")
+    parser.add_argument("--app", default="main:app", help="FastAPI app to start, as module:attribute")
+    parser.add_argument("--server-log", help="Append the local API's output to this file")
+    parser.add_argument("--llm-url", help="Model server for the local API instead of the stub")
+    parser.add_argument("--llm-model", help="Model name for --llm-url")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Stub LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--histograms", action="store_true", help="Include latency buckets in the report")
+    parser.add_argument("--output", help="Write JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    report = asyncio.run(run(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["delta_pct_vs_baseline"] = compare_reports(json.load(f), report)
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+AutoPMO End-to-End Benchmark
+
+Drives OrchestratorAgent.process_request, BaseAgent.execute and the FastAPI
+endpoints against a local stub LLM server at increasing concurrency, and
+reports throughput, latency percentiles and the per-stage breakdown
+(classify, agents, synthesize) as JSON.
+
+Usage:
+    python -m benchmarks.run_benchmark --concurrency 1,4,16 --requests 50 \\
+        --latency-ms 200 --output bench.json
+    python -m benchmarks.run_benchmark --latency-ms 0 --baseline bench.json
+
+With ``--latency-ms 0`` the numbers are pure AutoPMO overhead.
+
+Record a run against a real model server, then replay it offline:
+    python -m benchmarks.run_benchmark --llm-url http://llm:8000/v1 \
+        --cassette run.jsonl.gz --cassette-mode record
+    python -m benchmarks.run_benchmark --cassette run.jsonl.gz --replay-speed instant
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import (
+    compare_reports,
+    environment_info,
+    summarize_latencies,
+    write_report,
+)
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("classify", "agents", "synthesize")
+
+SAMPLE_REQUEST = """Create a project plan for migrating an e-commerce application to OpenShift.
+The application has a React frontend, a FastAPI backend, PostgreSQL and Redis."""
+
+SAMPLE_PROJECT = {
+    "name": "E-commerce OpenShift Migration",
+    "description": "Migrate the e-commerce platform to OpenShift",
+    "target_environment": "openshift",
+    "budget": 150000,
+    "timeline_weeks": 12,
+}
+
+
+async def run_level(
+    call: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    concurrency: int,
+    total_requests: int,
+    stub: StubLLMServer,
+) -> Dict[str, Any]:
+    """
+    Issue ``total_requests`` calls with at most ``concurrency`` in flight.
+
+    Args:
+        call: Coroutine factory returning the timings dict (or None)
+        concurrency: Number of concurrent workers
+        total_requests: Requests to issue at this level
+        stub: Stub server whose counters are sampled around the run
+
+    Returns:
+        Summary for this concurrency level
+    """
+    latencies: List[float] = []
+    stage_samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors = 0
+    remaining = total_requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                timings = await call()
+            except Exception as e:
+                errors += 1
+                logger.debug(f"Benchmark request failed: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+            for stage, value in (timings or {}).items():
+                if stage in stage_samples:
+                    stage_samples[stage].append(value)
+
+    stats_before = stub.stats.snapshot()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    stats_after = stub.stats.snapshot()
+
+    completed = len(latencies)
+    llm_calls = stats_after["requests"] - stats_before["requests"]
+    llm_seconds = stats_after["simulated_seconds"] - stats_before["simulated_seconds"]
+
+    return {
+        "requests": total_requests,
+        "completed": completed,
+        "errors": errors,
+        "duration_seconds": wall,
+        "throughput_rps": completed / wall if wall > 0 else 0.0,
+        "latency": summarize_latencies(latencies),
+        "stages": {
+            stage: summarize_latencies(samples)
+            for stage, samples in stage_samples.items() if samples
+        },
+        "llm": {
+            "calls_per_request": llm_calls / total_requests if total_requests else 0.0,
+            "simulated_seconds_per_request": (
+                llm_seconds / total_requests if total_requests else 0.0
+            ),
+            "prompt_tokens": stats_after["prompt_tokens"] - stats_before["prompt_tokens"],
+            "completion_tokens": (
+                stats_after["completion_tokens"] - stats_before["completion_tokens"]
+            ),
+        },
+    }
+
+
+def build_targets(
+    llm_url: str,
+    llm_model: str,
+    app_path: str,
+    selected: List[str],
+) -> Dict[str, Callable[[], Awaitable[Optional[Dict[str, Any]]]]]:
+    """Create one coroutine factory per benchmark target."""
+    targets: Dict[str, Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = {}
+
+    if "orchestrator" in selected or "agent" in selected:
+        from agents import PlanningAgent, create_orchestrator
+        from agents.risk_agent import RiskAgent
+
+        llm_config = {"llm_base_url": llm_url, "llm_model": llm_model}
+        planning = PlanningAgent(**llm_config)
+        orchestrator = create_orchestrator(
+            planning_agent=planning,
+            risk_agent=RiskAgent(**llm_config),
+            **llm_config
+        )
+
+        async def orchestrator_call():
+            result = await orchestrator.process_request(
+                SAMPLE_REQUEST, {"user_id": "bench", "organization": "bench"}
+            )
+            return result.get("timings")
+
+        async def agent_call():
+            result = await planning.execute(
+                "Generate Work Breakdown Structure for the project",
+                {"project_name": SAMPLE_PROJECT["name"]}
+            )
+            if result["status"] != "success":
+                raise RuntimeError(result.get("error"))
+            return None
+
+        if "orchestrator" in selected:
+            targets["orchestrator"] = orchestrator_call
+        if "agent" in selected:
+            targets["agent"] = agent_call
+
+    if "api_projects" in selected or "api_agents" in selected:
+        import httpx
+
+        # Point the API's agents at the LLM before the app module is imported
+        os.environ["LLM_BASE_URL"] = llm_url
+        os.environ["LLM_MODEL"] = llm_model
+        module_name, _, attr = app_path.partition(":")
+        app = getattr(importlib.import_module(module_name), attr or "app")
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://autopmo-bench",
+            timeout=None,
+        )
+
+        async def api_projects_call():
+            response = await client.post("/api/v1/projects", json=SAMPLE_PROJECT)
+            response.raise_for_status()
+            return response.json().get("ai_analysis", {}).get("timings")
+
+        async def api_agents_call():
+            response = await client.post("/api/v1/agents/execute", json={
+                "agent_type": "planning",
+                "task": "Generate Work Breakdown Structure for the project",
+                "context": {"project_name": SAMPLE_PROJECT["name"]},
+            })
+            response.raise_for_status()
+            return None
+
+        if "api_projects" in selected:
+            targets["api_projects"] = api_projects_call
+        if "api_agents" in selected:
+            targets["api_agents"] = api_agents_call
+
+    return targets
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub_config = StubConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        tool_calls=args.tool_calls,
+    )
+    stub = StubLLMServer(stub_config).start_in_thread()
+
+    # Agents pick the cassette up from the environment (see agents.llm_cassette)
+    if args.cassette:
+        os.environ["AUTOPMO_LLM_CASSETTE"] = args.cassette
+        os.environ["AUTOPMO_LLM_CASSETTE_MODE"] = args.cassette_mode
+        os.environ["AUTOPMO_LLM_REPLAY_SPEED"] = args.replay_speed
+
+    try:
+        levels = [int(c) for c in args.concurrency.split(",") if c]
+        targets = build_targets(
+            args.llm_url or stub.base_url,
+            args.llm_model or stub.model,
+            args.app,
+            args.targets.split(",")
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for name, call in targets.items():
+            # Warm up lazily-initialized agents, tools and HTTP pools
+            for _ in range(args.warmup):
+                await call()
+
+            results[name] = {}
+            for level in levels:
+                logger.info(f"Benchmarking {name} at concurrency {level}")
+                results[name][str(level)] = await run_level(
+                    call, level, args.requests, stub
+                )
+
+        return {
+            "benchmark": "autopmo-e2e",
+            "environment": environment_info(),
+            "config": {
+                "concurrency": levels,
+                "requests_per_level": args.requests,
+                "llm_url": args.llm_url or "stub",
+                "cassette": (
+                    {"path": args.cassette, "mode": args.cassette_mode, "speed": args.replay_speed}
+                    if args.cassette else None
+                ),
+                "stub": {
+                    "latency_ms": stub_config.latency_ms,
+                    "tokens_per_second": stub_config.tokens_per_second,
+                    "output_tokens": stub_config.output_tokens,
+                    "tool_calls": stub_config.tool_calls,
+                },
+            },
+            "results": results,
+        }
+    finally:
+        stub.stop_thread()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoPMO end-to-end benchmark")
+    parser.add_argument("--targets", default="orchestrator,agent,api_projects,api_agents",
+                        help="Comma-separated: orchestrator, agent, api_projects, api_agents")
+    parser.add_argument("--concurrency", default="1,4,16,64",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per level")
+    parser.add_argument("--warmup", type=int, default=1, help="Warm-up requests per target")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--tool-calls", type=int, default=0,
+                        help="Tool calls the stub requests per agent run")
+    parser.add_argument("--llm-url", help="Use this model server instead of the stub")
+    parser.add_argument("--llm-model", help="Model name for --llm-url")
+    parser.add_argument("--cassette", help="LLM cassette file (.jsonl.gz) to record or replay")
+    parser.add_argument("--cassette-mode", choices=("record", "replay"), default="replay")
+    parser.add_argument("--replay-speed", default="realtime",
+                        help="realtime, instant or a latency multiplier")
+    parser.add_argument("--app", default="main:app", help="FastAPI app as module:attribute")
+    parser.add_argument("--output", help="Write JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    report = asyncio.run(run(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["delta_pct_vs_baseline"] = compare_reports(json.load(f), report)
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
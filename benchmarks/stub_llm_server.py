@@ -0,0 +1,329 @@
+"""
+Stub LLM Server for AutoPMO Benchmarks
+
+A tiny OpenAI-compatible chat completions server with configurable latency
+and token rate. Agents can be pointed at it (``llm_base_url``) so that the
+orchestrator, agents and API can be measured without a GPU or network.
+
+Run standalone:
+    python -m benchmarks.stub_llm_server --port 8001 --latency-ms 200 --tokens-per-second 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+INTENT_MARKER = "Respond with ONLY the category name"
+
+
+@dataclass
+class StubConfig:
+    """
+    Behaviour of the stub model.
+
+    Attributes:
+        latency_ms: Time to first token (queueing + prefill) in milliseconds
+        tokens_per_second: Generation rate; 0 disables the per-token delay
+        output_tokens: Number of tokens in each completion
+        intent: Category returned to intent classification prompts
+        tool_calls: Function calls emitted before answering when tools are offered
+        fail_status: If non-zero, every request fails with this HTTP status
+            (simulates an unhealthy replica; may be changed while running)
+    """
+    latency_ms: float = 100.0
+    tokens_per_second: float = 0.0
+    output_tokens: int = 64
+    intent: str = "create_project"
+    tool_calls: int = 0
+    fail_status: int = 0
+
+
+@dataclass
+class StubStats:
+    """Counters the benchmark harness reads to separate LLM time from overhead."""
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    simulated_seconds: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "simulated_seconds": self.simulated_seconds,
+            }
+
+
+def _count_tokens(text: str) -> int:
+    """Rough whitespace token count; good enough for rate simulation."""
+    return len(text.split())
+
+
+class StubLLMServer:
+    """
+    OpenAI-compatible stub serving ``/v1/chat/completions`` and ``/v1/models``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[StubConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        model: str = "mistral-7b-instruct",
+    ):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.model = model
+        self.stats = StubStats()
+
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as ``llm_base_url``."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_get("/v1/models", self._models)
+        app.router.add_get("/health", self._health)
+        return app
+
+    async def start(self):
+        """Start serving on the current event loop."""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        # Resolve the ephemeral port when port=0
+        sockets = site._server.sockets if site._server else []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+
+        logger.info(f"Stub LLM server listening on {self.base_url}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> "StubLLMServer":
+        """
+        Start the server on a dedicated event loop thread.
+
+        Keeping the stub off the caller's loop means its own scheduling does
+        not show up as orchestrator overhead.
+        """
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            self._started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="stub-llm", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def _failure(self) -> Optional[web.Response]:
+        if not self.config.fail_status:
+            return None
+        return web.json_response(
+            {"error": {"message": "stub failure", "type": "server_error"}},
+            status=self.config.fail_status
+        )
+
+    async def _models(self, request: web.Request) -> web.Response:
+        failure = self._failure()
+        if failure is not None:
+            return failure
+        return web.json_response({
+            "object": "list",
+            "data": [{"id": self.model, "object": "model", "owned_by": "autopmo-bench"}]
+        })
+
+    def _build_reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide between a function call and a text answer."""
+        messages: List[Dict[str, Any]] = body.get("messages", [])
+        functions = body.get("functions") or [
+            t.get("function", {}) for t in body.get("tools", [])
+        ]
+        last_user = next(
+            (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"),
+            ""
+        )
+
+        if INTENT_MARKER in last_user:
+            return {"content": self.config.intent}
+
+        tool_turns = sum(1 for m in messages if m.get("role") in ("function", "tool"))
+        if functions and tool_turns < self.config.tool_calls:
+            name = functions[tool_turns % len(functions)].get("name", "tool")
+            return {
+                "function_call": {
+                    "name": name,
+                    "arguments": json.dumps({"__arg1": last_user[:200]})
+                }
+            }
+
+        words = ["lorem", "ipsum", "dolor", "sit", "amet", "project", "risk", "plan"]
+        text = " ".join(words[i % len(words)] for i in range(self.config.output_tokens))
+        return {"content": text}
+
+    def _generation_delay(self, completion_tokens: int) -> float:
+        delay = self.config.latency_ms / 1000.0
+        if self.config.tokens_per_second > 0:
+            delay += completion_tokens / self.config.tokens_per_second
+        return delay
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        failure = self._failure()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        reply = self._build_reply(body)
+
+        prompt_tokens = sum(
+            _count_tokens(str(m.get("content") or "")) for m in body.get("messages", [])
+        )
+        completion_tokens = (
+            _count_tokens(reply["content"]) if "content" in reply
+            else _count_tokens(reply["function_call"]["arguments"])
+        )
+        delay = self._generation_delay(completion_tokens)
+
+        with self.stats.lock:
+            self.stats.requests += 1
+            self.stats.prompt_tokens += prompt_tokens
+            self.stats.completion_tokens += completion_tokens
+            self.stats.simulated_seconds += delay
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        finish_reason = "function_call" if "function_call" in reply else "stop"
+
+        if body.get("stream"):
+            return await self._stream(request, reply, completion_id, created, finish_reason)
+
+        await asyncio.sleep(delay)
+
+        message = {"role": "assistant", "content": reply.get("content")}
+        if "function_call" in reply:
+            message["function_call"] = reply["function_call"]
+
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model", self.model),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    async def _stream(
+        self,
+        request: web.Request,
+        reply: Dict[str, Any],
+        completion_id: str,
+        created: int,
+        finish_reason: str,
+    ) -> web.StreamResponse:
+        """Server-sent events at the configured token rate."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": self.model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        await asyncio.sleep(self.config.latency_ms / 1000.0)
+
+        if "function_call" in reply:
+            await response.write(chunk({"role": "assistant", "function_call": reply["function_call"]}))
+        else:
+            per_token = (
+                1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+            )
+            for i, token in enumerate(reply["content"].split()):
+                if per_token:
+                    await asyncio.sleep(per_token)
+                await response.write(chunk({"content": token if i == 0 else f" {token}"}))
+
+        await response.write(chunk({}, finish_reason))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--intent", default="create_project")
+    parser.add_argument("--tool-calls", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    server = StubLLMServer(
+        StubConfig(
+            latency_ms=args.latency_ms,
+            tokens_per_second=args.tokens_per_second,
+            output_tokens=args.output_tokens,
+            intent=args.intent,
+            tool_calls=args.tool_calls,
+            fail_status=args.fail_status,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+    web.run_app(server.build_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Compute Service for AutoPMO
+
+Runs CPU-heavy analytics (critical path, resource leveling, Monte Carlo
+simulation, risk aggregation) on a persistent pool of worker processes so
+they use every core instead of the single asyncio process serving the API.
+
+- Workers are started once and warmed up (imports and a small run of every
+  analytics kernel) before the first job.
+- Large NumPy arrays are handed to workers through shared memory: wrap them
+  with ``ComputeService.share`` and pass the returned handle as a job
+  argument; workers map the same buffer instead of unpickling a copy.
+- Jobs report progress through a queue drained by a background thread and
+  delivered to the job's callback on the event loop.
+- Jobs can be cancelled: queued jobs never start, running jobs stop at their
+  next progress report.
+
+Configuration: AUTOPMO_COMPUTE_WORKERS (default: CPU count) and
+AUTOPMO_COMPUTE_START_METHOD (default: spawn).
+"""
+
+import asyncio
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import COMPUTE_JOB_SECONDS, COMPUTE_JOBS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# Cancellation flags are indexed by job slot; slots are recycled
+MAX_ACTIVE_JOBS = 1024
+
+ProgressCallback = Callable[[float], None]
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to a NumPy array held in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+        """Map the array; keep the returned segment open while using the view."""
+        # Workers share the parent's resource tracker, so attaching does not
+        # transfer ownership; the creating service unlinks the segment
+        segment = shared_memory.SharedMemory(name=self.name)
+        return segment, np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf)
+
+
+# Worker process state, set by _init_worker
+_progress_queue = None
+_cancel_flags = None
+_current: Optional[Tuple[int, int]] = None
+
+
+def _init_worker(progress_queue, cancel_flags):
+    global _progress_queue, _cancel_flags
+    _progress_queue = progress_queue
+    _cancel_flags = cancel_flags
+
+    from . import analytics
+    analytics.warmup()
+
+
+def _worker_ready(delay: float) -> int:
+    # Sleeping keeps this worker busy so the pool starts the others
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _checkpoint(fraction: float):
+    """Report progress of the running job and stop it if it was cancelled."""
+    job_id, slot = _current
+    if _cancel_flags[slot]:
+        raise JobCancelled(f"Compute job {job_id} cancelled")
+    _progress_queue.put((job_id, fraction))
+
+
+def _run_job(job_id: int, slot: int, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    global _current
+    if _cancel_flags[slot]:
+        raise JobCancelled(f"Compute job {job_id} cancelled")
+
+    segments: List[shared_memory.SharedMemory] = []
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, SharedArray):
+            segment, array = value.attach()
+            segments.append(segment)
+            return array
+        return value
+
+    args = tuple(resolve(a) for a in args)
+    kwargs = {k: resolve(v) for k, v in kwargs.items()}
+    if "progress" in inspect.signature(func).parameters:
+        kwargs["progress"] = _checkpoint
+
+    _current = (job_id, slot)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current = None
+        # Drop array views before closing the segments they map
+        del args, kwargs
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                logger.warning("Compute job result still references shared memory")
+
+
+class ComputeJob:
+    """
+    Handle to a submitted job; await it for the result.
+
+    Attributes:
+        id: Job identifier
+        name: Function name, for logs and metrics
+        progress: Last reported completed fraction (0-1)
+    """
+
+    def __init__(
+        self,
+        service: "ComputeService",
+        job_id: int,
+        slot: int,
+        name: str,
+        future: "asyncio.Future[Any]",
+        on_progress: Optional[ProgressCallback],
+    ):
+        self.service = service
+        self.id = job_id
+        self.slot = slot
+        self.name = name
+        self.future = future
+        self.progress = 0.0
+        self.on_progress = on_progress
+        self.submitted_at = time.perf_counter()
+
+    def _report(self, fraction: float):
+        if self.future.done():
+            return
+        self.progress = fraction
+        if self.on_progress is not None:
+            try:
+                self.on_progress(fraction)
+            except Exception as e:
+                logger.error(f"Compute job {self.id} progress callback failed: {e}")
+
+    def cancel(self) -> bool:
+        """Cancel the job; returns False if it already finished."""
+        if self.future.done():
+            return False
+        self.service._cancel(self)
+        return True
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def __await__(self):
+        return self.future.__await__()
+
+
+class ComputeService:
+    """
+    Persistent process pool for analytics jobs.
+
+    Attributes:
+        workers: Number of worker processes
+        start_method: multiprocessing start method for the workers
+    """
+
+    def __init__(self, workers: Optional[int] = None, start_method: str = "spawn"):
+        self.workers = workers or os.cpu_count() or 1
+        self.start_method = start_method
+
+        self._ctx = multiprocessing.get_context(start_method)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._cancel_flags = None
+        self._reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self._ids = itertools.count(1)
+        self._free_slots = list(range(MAX_ACTIVE_JOBS))
+        self._jobs: Dict[int, ComputeJob] = {}
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._shared: Dict[str, shared_memory.SharedMemory] = {}
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._progress_queue = self._ctx.Queue()
+                self._cancel_flags = self._ctx.RawArray("b", MAX_ACTIVE_JOBS)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._ctx,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue, self._cancel_flags),
+                )
+                self._reader = threading.Thread(
+                    target=self._read_progress, name="autopmo-compute-progress", daemon=True
+                )
+                self._reader.start()
+            return self._pool
+
+    async def start(self):
+        """Start and warm up every worker so the first jobs do not pay for it."""
+        pool = self._ensure_pool()
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(pool, _worker_ready, 0.2) for _ in range(self.workers)
+        ))
+        logger.info(
+            f"Compute service ready: {len(set(pids))} workers "
+            f"({self.start_method}) in {time.perf_counter() - started:.2f}s"
+        )
+
+    def share(self, array: np.ndarray) -> SharedArray:
+        """
+        Copy an array into shared memory once for use by any number of jobs.
+
+        Args:
+            array: Array to share
+
+        Returns:
+            Handle to pass as a job argument; release() it when done
+        """
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        self._shared[segment.name] = segment
+        return SharedArray(segment.name, array.shape, array.dtype.str)
+
+    def release(self, *handles: SharedArray):
+        """Free shared arrays created by share()."""
+        for handle in handles:
+            segment = self._shared.pop(handle.name, None)
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    def submit(
+        self,
+        func: Callable,
+        *args: Any,
+        progress: Optional[ProgressCallback] = None,
+        **kwargs: Any,
+    ) -> ComputeJob:
+        """
+        Submit a job to the pool.
+
+        Must be called from a running event loop.
+
+        Args:
+            func: Picklable module-level function (e.g. an analytics kernel);
+                if it has a ``progress`` parameter, it receives a callback
+                that reports progress and checks for cancellation
+            *args: Positional arguments; SharedArray handles become arrays
+            progress: Called on the event loop with the completed fraction
+            **kwargs: Keyword arguments; SharedArray handles become arrays
+
+        Returns:
+            Awaitable job handle
+        """
+        pool = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._free_slots:
+                raise RuntimeError(f"More than {MAX_ACTIVE_JOBS} compute jobs active")
+            slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+
+        job_id = next(self._ids)
+        name = getattr(func, "__name__", "job")
+        pool_future = pool.submit(_run_job, job_id, slot, func, args, kwargs)
+        # The slot is reused only once the worker is done with it, which for a
+        # cancelled running job is at its next checkpoint
+        pool_future.add_done_callback(lambda f: self._release_slot(slot))
+        future = asyncio.wrap_future(pool_future, loop=loop)
+        job = ComputeJob(self, job_id, slot, name, future, progress)
+        self._jobs[job_id] = job
+        self._loops[job_id] = loop
+        COMPUTE_JOBS_IN_FLIGHT.inc()
+        future.add_done_callback(lambda f: self._finished(job))
+        return job
+
+    async def run(
+        self,
+        func: Callable,
+        *args: Any,
+        progress: Optional[ProgressCallback] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Submit a job and wait for its result.
+
+        Cancelling the awaiting task cancels the job.
+        """
+        job = self.submit(func, *args, progress=progress, **kwargs)
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    def _cancel(self, job: ComputeJob):
+        self._cancel_flags[job.slot] = 1
+        job.future.cancel()
+
+    def _finished(self, job: ComputeJob):
+        self._jobs.pop(job.id, None)
+        self._loops.pop(job.id, None)
+        COMPUTE_JOBS_IN_FLIGHT.dec()
+
+        future = job.future
+        if future.cancelled():
+            status = "cancelled"
+            self.cancelled += 1
+        elif isinstance(future.exception(), (JobCancelled, FutureCancelledError)):
+            status = "cancelled"
+            self.cancelled += 1
+        elif future.exception() is not None:
+            status = "failed"
+            self.failed += 1
+            logger.error(f"Compute job {job.id} ({job.name}) failed: {future.exception()}")
+        else:
+            status = "succeeded"
+            self.completed += 1
+        COMPUTE_JOB_SECONDS.labels(status=status).observe(time.perf_counter() - job.submitted_at)
+
+    def _release_slot(self, slot: int):
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def _read_progress(self):
+        queue = self._progress_queue
+        while True:
+            try:
+                message = queue.get()
+            except (EOFError, OSError, ValueError):
+                return
+            if message is None:
+                return
+            job_id, fraction = message
+            job = self._jobs.get(job_id)
+            loop = self._loops.get(job_id)
+            if job is not None and loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(job._report, fraction)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "start_method": self.start_method,
+            "started": self._pool is not None,
+            "active": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "shared_arrays": len(self._shared),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers and free all shared arrays."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            for job in list(self._jobs.values()):
+                self._cancel_flags[job.slot] = 1
+            pool.shutdown(wait=wait, cancel_futures=True)
+            self._progress_queue.put(None)
+            self._reader.join(timeout=1.0)
+            self._progress_queue.close()
+        for name in list(self._shared):
+            segment = self._shared.pop(name)
+            segment.close()
+            segment.unlink()
+
+
+_default_service: Optional[ComputeService] = None
+
+
+def get_compute_service() -> ComputeService:
+    """Process-wide compute service configured from the environment."""
+    global _default_service
+    if _default_service is None:
+        workers = os.getenv("AUTOPMO_COMPUTE_WORKERS")
+        _default_service = ComputeService(
+            workers=int(workers) if workers else None,
+            start_method=os.getenv("AUTOPMO_COMPUTE_START_METHOD", "spawn"),
+        )
+    return _default_service
@@ -0,0 +1,267 @@
+"""
+Earned Value Management for AutoPMO
+
+Computes earned value metrics for a project or a whole portfolio from
+task-level time series in one vectorized pass:
+
+- PV, EV, AC: cumulative planned value, earned value and actual cost
+- SV, CV, SPI, CPI: schedule and cost variances and performance indices
+- EAC, ETC, VAC, TCPI: forecasts at completion (EAC = BAC / CPI)
+- SPI/CPI trends: least-squares slope per period over a recent window
+
+Input is columnar: one row per task and one column per reporting period,
+with a project label per row. Task rows are summed into project rows with a
+single sort and ``np.add.reduceat``, and every metric is an array operation
+over the (projects x periods) matrix, so thousands of projects over hundreds
+of periods take one pass.
+
+``summarize`` reduces the result to a few numbers per project (and the worst
+projects of a portfolio) for status report prompts.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Performance index below which a project is flagged
+THRESHOLD = 0.9
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _trend(values: np.ndarray, window: int) -> np.ndarray:
+    """Least-squares slope per row over the last ``window`` columns, ignoring NaN."""
+    y = values[:, -window:]
+    valid = ~np.isnan(y)
+    x = np.broadcast_to(np.arange(y.shape[1], dtype=np.float64), y.shape)
+    count = valid.sum(axis=1)
+    safe = np.maximum(count, 1)
+    x_mean = np.where(valid, x, 0).sum(axis=1) / safe
+    y_mean = np.where(valid, y, 0).sum(axis=1) / safe
+    dx = np.where(valid, x - x_mean[:, None], 0)
+    dy = np.where(valid, y - y_mean[:, None], 0)
+    slope = _ratio((dx * dy).sum(axis=1), (dx * dx).sum(axis=1))
+    return np.where(count >= 2, slope, np.nan)
+
+
+@dataclass
+class EVMResult:
+    """
+    Earned value metrics per project and period.
+
+    Matrices are (projects x periods) and cumulative; vectors are per project
+    at the status period.
+
+    Attributes:
+        projects: Project labels
+        periods: Number of reporting periods
+        status_period: Index of the last reported period
+        bac: Budget at completion
+        pv: Planned value
+        ev: Earned value
+        ac: Actual cost
+        sv: Schedule variance (EV - PV)
+        cv: Cost variance (EV - AC)
+        spi: Schedule performance index (EV / PV)
+        cpi: Cost performance index (EV / AC)
+        eac: Estimate at completion (BAC / CPI)
+        etc: Estimate to complete (EAC - AC)
+        vac: Variance at completion (BAC - EAC)
+        tcpi: To-complete performance index ((BAC - EV) / (BAC - AC))
+        spi_trend: SPI change per period over the trend window
+        cpi_trend: CPI change per period over the trend window
+    """
+    projects: List[str]
+    periods: int
+    status_period: int
+    bac: np.ndarray
+    pv: np.ndarray
+    ev: np.ndarray
+    ac: np.ndarray
+    sv: np.ndarray
+    cv: np.ndarray
+    spi: np.ndarray
+    cpi: np.ndarray
+    eac: np.ndarray
+    etc: np.ndarray
+    vac: np.ndarray
+    tcpi: np.ndarray
+    spi_trend: np.ndarray
+    cpi_trend: np.ndarray
+
+
+def compute_evm(
+    bac: Sequence[float],
+    planned: Any,
+    earned: Any,
+    actual: Any,
+    project: Optional[Sequence[Any]] = None,
+    cumulative: bool = False,
+    status_period: Optional[int] = None,
+    trend_window: int = 4,
+) -> EVMResult:
+    """
+    Earned value metrics of tasks rolled up per project.
+
+    Args:
+        bac: Budget at completion per task
+        planned: (tasks x periods) planned value
+        earned: (tasks x periods) earned value
+        actual: (tasks x periods) actual cost
+        project: Project label per task (default: one project)
+        cumulative: Series are already cumulative instead of per period
+        status_period: Last reported period (default: the last column)
+        trend_window: Periods used for the SPI/CPI trends
+
+    Returns:
+        EVMResult
+
+    Raises:
+        ValueError: On mismatched shapes
+    """
+    bac = np.asarray(bac, dtype=np.float64)
+    series = [np.atleast_2d(np.asarray(s, dtype=np.float64)) for s in (planned, earned, actual)]
+    if any(s.shape != series[0].shape for s in series) or len(bac) != series[0].shape[0]:
+        raise ValueError("bac, planned, earned and actual must have one row per task")
+    tasks, periods = series[0].shape
+    status = periods - 1 if status_period is None else status_period
+    if not 0 <= status < periods:
+        raise ValueError(f"status_period must be between 0 and {periods - 1}")
+
+    if project is None:
+        labels, rows, starts = ["project"], np.arange(tasks), np.zeros(1, dtype=np.int64)
+    else:
+        names, codes = np.unique(np.asarray(project).astype(str), return_inverse=True)
+        rows = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(codes[rows]) != 0])
+        labels = names.tolist()
+
+    def rollup(values: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(values[rows], starts, axis=0) if tasks else np.zeros((len(labels),) + values.shape[1:])
+
+    pv, ev, ac = (rollup(s) for s in series)
+    if not cumulative:
+        pv, ev, ac = (np.cumsum(m, axis=1) for m in (pv, ev, ac))
+    total = rollup(bac)
+
+    spi = _ratio(ev, pv)
+    cpi = _ratio(ev, ac)
+    eac = _ratio(total[:, None], cpi)
+    window = slice(max(0, status + 1 - trend_window), status + 1)
+    return EVMResult(
+        projects=labels,
+        periods=periods,
+        status_period=status,
+        bac=total,
+        pv=pv,
+        ev=ev,
+        ac=ac,
+        sv=ev - pv,
+        cv=ev - ac,
+        spi=spi,
+        cpi=cpi,
+        eac=eac,
+        etc=eac - ac,
+        vac=total[:, None] - eac,
+        tcpi=_ratio(total[:, None] - ev, total[:, None] - ac),
+        spi_trend=_trend(spi[:, window], trend_window),
+        cpi_trend=_trend(cpi[:, window], trend_window),
+    )
+
+
+def _number(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def summarize(result: EVMResult, max_projects: int = 5) -> Dict[str, Any]:
+    """
+    Compact status numbers for a report prompt.
+
+    Args:
+        result: Output of compute_evm
+        max_projects: Projects listed individually (worst CPI first)
+
+    Returns:
+        Portfolio totals, flagged project counts and per-project metrics at
+        the status period
+    """
+    t = result.status_period
+    pv, ev, ac = (m[:, t].sum() for m in (result.pv, result.ev, result.ac))
+    bac = result.bac.sum()
+    cpi = ev / ac if ac else np.nan
+    spi, cpi_now = result.spi[:, t], result.cpi[:, t]
+
+    ranked = np.argsort(np.nan_to_num(cpi_now, nan=np.inf), kind="stable")[:max_projects]
+    return {
+        "period": t + 1,
+        "projects": len(result.projects),
+        "bac": _number(bac),
+        "pv": _number(pv),
+        "ev": _number(ev),
+        "ac": _number(ac),
+        "spi": _number(ev / pv if pv else np.nan, 3),
+        "cpi": _number(cpi, 3),
+        "eac": _number(bac / cpi if cpi else np.nan),
+        "behind_schedule": int((spi < THRESHOLD).sum()),
+        "over_budget": int((cpi_now < THRESHOLD).sum()),
+        "by_project": [
+            {
+                "project": result.projects[p],
+                "spi": _number(spi[p], 3),
+                "cpi": _number(cpi_now[p], 3),
+                "eac": _number(result.eac[p, t]),
+                "vac": _number(result.vac[p, t]),
+                "tcpi": _number(result.tcpi[p, t], 3),
+                "spi_trend": _number(result.spi_trend[p], 4),
+                "cpi_trend": _number(result.cpi_trend[p], 4),
+            }
+            for p in ranked
+        ],
+    }
+
+
+def evm_summary(data: Dict[str, Any], max_projects: int = 5) -> Dict[str, Any]:
+    """
+    compute_evm and summarize for columnar request data.
+
+    Args:
+        data: Mapping with "bac", "planned", "earned", "actual" and optional
+            "project", "cumulative", "status_period" and "trend_window"
+        max_projects: Projects listed individually
+
+    Returns:
+        Output of summarize
+    """
+    result = compute_evm(
+        data["bac"],
+        data["planned"],
+        data["earned"],
+        data["actual"],
+        project=data.get("project"),
+        cumulative=bool(data.get("cumulative", False)),
+        status_period=data.get("status_period"),
+        trend_window=int(data.get("trend_window", 4)),
+    )
+    return summarize(result, max_projects)
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a summary as a few prompt lines."""
+    lines = [
+        f"Earned value at period {summary['period']} ({summary['projects']} projects): "
+        f"BAC={summary['bac']} PV={summary['pv']} EV={summary['ev']} AC={summary['ac']} "
+        f"SPI={summary['spi']} CPI={summary['cpi']} EAC={summary['eac']}",
+        f"Behind schedule (SPI<{THRESHOLD}): {summary['behind_schedule']}; "
+        f"over budget (CPI<{THRESHOLD}): {summary['over_budget']}",
+    ]
+    for p in summary["by_project"]:
+        lines.append(
+            f"- {p['project']}: SPI={p['spi']} CPI={p['cpi']} EAC={p['eac']} VAC={p['vac']} "
+            f"TCPI={p['tcpi']} trend SPI={p['spi_trend']}/period CPI={p['cpi_trend']}/period"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,269 @@
+"""
+Tenant Fair-Share Scheduling for AutoPMO
+
+Work waiting for a shared resource (LLM admission slots, background job
+workers) is served per tenant by weighted fair queuing instead of FIFO, so a
+bulk batch from one team cannot starve everyone else:
+
+- Start-time fair queuing: each queued item gets a virtual start tag
+  ``max(V, last finish tag of its tenant)`` and a finish tag
+  ``start + cost / weight``; the eligible item with the smallest start tag is
+  served next and V advances to it. Over any busy period, tenants are served
+  in proportion to their weights, and a tenant that was idle does not bank
+  credit.
+- Concurrency quotas: a tenant never holds more than ``max_concurrency``
+  slots, plus ``burst`` more while no tenant under its quota is waiting, so
+  one tenant can use idle capacity without delaying others' next slots.
+- Queue shares: a tenant may only queue up to its weighted share of the
+  queue bound, so one tenant filling the queue does not get others rejected.
+
+Tenants are identified from the request context (``organization``,
+``tenant`` or ``user_id``); policies come from ``AUTOPMO_TENANT_POLICIES``, a
+JSON mapping of tenant to ``{"weight", "max_concurrency", "max_jobs",
+"burst"}`` with ``"*"`` as the default for unlisted tenants.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .metrics import TENANT_IN_FLIGHT, TENANT_QUEUED, TENANT_WAIT_SECONDS, tenant_label
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# Context keys identifying the tenant, most specific grouping first
+TENANT_KEYS = ("organization", "tenant", "user_id")
+
+
+@dataclass(frozen=True)
+class TenantPolicy:
+    """
+    Scheduling policy of one tenant.
+
+    Attributes:
+        weight: Relative share of capacity while tenants compete
+        max_concurrency: Concurrent LLM calls allowed (None: unlimited)
+        max_jobs: Concurrent background jobs allowed (None: unlimited)
+        burst: Slots allowed beyond a quota while capacity is otherwise idle
+    """
+    weight: float = 1.0
+    max_concurrency: Optional[int] = None
+    max_jobs: Optional[int] = None
+    burst: int = 0
+
+
+def load_tenant_policies(spec: Optional[str] = None) -> Dict[str, TenantPolicy]:
+    """
+    Parse tenant policies from JSON (default: ``AUTOPMO_TENANT_POLICIES``).
+
+    Raises:
+        ValueError: On malformed policies
+    """
+    spec = spec if spec is not None else os.getenv("AUTOPMO_TENANT_POLICIES", "")
+    if not spec.strip():
+        return {}
+    try:
+        raw = json.loads(spec)
+        policies = {str(tenant): TenantPolicy(**fields) for tenant, fields in raw.items()}
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid tenant policies: {e}")
+    for tenant, policy in policies.items():
+        if policy.weight <= 0:
+            raise ValueError(f"Tenant {tenant} weight must be positive")
+    return policies
+
+
+def tenant_of(context: Optional[Dict[str, Any]]) -> str:
+    """Tenant a request belongs to, from its context."""
+    for key in TENANT_KEYS:
+        value = (context or {}).get(key)
+        if value:
+            return str(value)
+    return DEFAULT_TENANT
+
+
+class _TenantState:
+    __slots__ = ("queues", "in_flight", "finish_tag")
+
+    def __init__(self):
+        # Priority and normal items: (start tag, enqueued at, item)
+        self.queues: Tuple[Deque[tuple], Deque[tuple]] = (deque(), deque())
+        self.in_flight = 0
+        self.finish_tag = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self.queues[0]) + len(self.queues[1])
+
+
+class FairQueue:
+    """
+    Weighted fair queue with per-tenant concurrency quotas.
+
+    Not thread-safe; used from one event loop. Callers own the global
+    capacity: they ``pop()`` while a slot is free, or ``start()`` directly when
+    ``can_start()`` allows, and ``finish()`` when the work is done.
+
+    Attributes:
+        name: Queue label for metrics ("llm", "jobs")
+        policies: Policy per tenant; "*" is the default
+        quota: Maps a policy to its (concurrency limit, burst) for this queue
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policies: Optional[Dict[str, TenantPolicy]] = None,
+        quota: Callable[[TenantPolicy], Tuple[Optional[int], int]] = lambda p: (p.max_concurrency, p.burst),
+    ):
+        self.name = name
+        self.policies = dict(policies or {})
+        self.quota = quota
+        self._default = self.policies.pop("*", TenantPolicy())
+        self._tenants: Dict[str, _TenantState] = {}
+        self._virtual_time = 0.0
+        self._queued = [0, 0]
+
+    def policy(self, tenant: str) -> TenantPolicy:
+        return self.policies.get(tenant, self._default)
+
+    def _state(self, tenant: str) -> _TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _TenantState()
+        return state
+
+    def _forget_if_idle(self, tenant: str, state: _TenantState):
+        if not state.in_flight and not state.queued:
+            del self._tenants[tenant]
+
+    def _under_quota(self, tenant: str, state: _TenantState, burst: bool = False) -> bool:
+        limit, extra = self.quota(self.policy(tenant))
+        return limit is None or state.in_flight < limit + (extra if burst else 0)
+
+    # --- Queue ---
+
+    def push(self, tenant: str, item: Any, priority: bool = False, cost: float = 1.0):
+        """Queue an item; priority items are served before any normal item."""
+        state = self._state(tenant)
+        start = max(self._virtual_time, state.finish_tag)
+        state.finish_tag = start + cost / self.policy(tenant).weight
+        state.queues[0 if priority else 1].append((start, time.perf_counter(), item))
+        self._queued[0 if priority else 1] += 1
+        TENANT_QUEUED.labels(queue=self.name, tenant=tenant_label(tenant)).inc()
+
+    def remove(self, tenant: str, item: Any) -> bool:
+        """Withdraw a queued item (e.g. a cancelled waiter)."""
+        state = self._tenants.get(tenant)
+        if state is None:
+            return False
+        for cls, queue in enumerate(state.queues):
+            for entry in queue:
+                if entry[2] is item:
+                    queue.remove(entry)
+                    self._queued[cls] -= 1
+                    TENANT_QUEUED.labels(queue=self.name, tenant=tenant_label(tenant)).dec()
+                    self._forget_if_idle(tenant, state)
+                    return True
+        return False
+
+    def pop(self) -> Optional[Tuple[str, Any]]:
+        """
+        Take the next item to run and count it in flight for its tenant.
+
+        Returns:
+            (tenant, item), or None if nothing queued is eligible
+        """
+        # Tenants under quota first; burst slots only when none of them waits
+        for burst in (False, True):
+            for cls in (0, 1):
+                best: Optional[str] = None
+                best_tag = 0.0
+                for tenant, state in self._tenants.items():
+                    queue = state.queues[cls]
+                    if queue and (best is None or queue[0][0] < best_tag) and self._under_quota(tenant, state, burst):
+                        best, best_tag = tenant, queue[0][0]
+                if best is not None:
+                    state = self._tenants[best]
+                    start, enqueued, item = state.queues[cls].popleft()
+                    self._queued[cls] -= 1
+                    self._virtual_time = max(self._virtual_time, start)
+                    TENANT_QUEUED.labels(queue=self.name, tenant=tenant_label(best)).dec()
+                    self._begin(best, state, time.perf_counter() - enqueued)
+                    return best, item
+        return None
+
+    def can_start(self, tenant: str) -> bool:
+        """Whether new work of a tenant may run now without queuing."""
+        if self._queued[0] or self._queued[1]:
+            return False
+        state = self._tenants.get(tenant)
+        return state is None or self._under_quota(tenant, state, burst=True)
+
+    def start(self, tenant: str, cost: float = 1.0):
+        """Count work admitted without queuing (after can_start)."""
+        state = self._state(tenant)
+        self._virtual_time = max(self._virtual_time, state.finish_tag)
+        state.finish_tag = self._virtual_time + cost / self.policy(tenant).weight
+        self._begin(tenant, state, 0.0)
+
+    def _begin(self, tenant: str, state: _TenantState, waited: float):
+        state.in_flight += 1
+        label = tenant_label(tenant)
+        TENANT_IN_FLIGHT.labels(queue=self.name, tenant=label).inc()
+        TENANT_WAIT_SECONDS.labels(queue=self.name, tenant=label).observe(waited)
+
+    def finish(self, tenant: str):
+        """Release a slot held by a tenant."""
+        state = self._tenants.get(tenant)
+        if state is None or not state.in_flight:
+            return
+        state.in_flight -= 1
+        TENANT_IN_FLIGHT.labels(queue=self.name, tenant=tenant_label(tenant)).dec()
+        self._forget_if_idle(tenant, state)
+
+    # --- Introspection ---
+
+    def queued(self, tenant: Optional[str] = None, priority: Optional[bool] = None) -> int:
+        """Queued items, optionally of one tenant and/or class."""
+        classes = (0, 1) if priority is None else ((0,) if priority else (1,))
+        if tenant is None:
+            return sum(self._queued[cls] for cls in classes)
+        state = self._tenants.get(tenant)
+        return sum(len(state.queues[cls]) for cls in classes) if state else 0
+
+    def in_flight(self, tenant: str) -> int:
+        state = self._tenants.get(tenant)
+        return state.in_flight if state else 0
+
+    def share(self, tenant: str) -> float:
+        """Fraction of capacity a tenant gets against the currently active tenants."""
+        weight = self.policy(tenant).weight
+        others = sum(self.policy(t).weight for t in self._tenants if t != tenant)
+        return weight / (weight + others)
+
+    def over_share(self, tenant: str, max_queue: int) -> bool:
+        """Whether a tenant already queues its weighted share of ``max_queue``."""
+        return self.queued(tenant) >= max(1.0, max_queue * self.share(tenant))
+
+    def stats(self, max_tenants: int = 20) -> List[Dict[str, Any]]:
+        """Busiest tenants by queued and in-flight work."""
+        busiest = sorted(
+            self._tenants.items(), key=lambda kv: (kv[1].queued + kv[1].in_flight), reverse=True
+        )[:max_tenants]
+        return [
+            {
+                "tenant": tenant,
+                "weight": self.policy(tenant).weight,
+                "in_flight": state.in_flight,
+                "queued": state.queued,
+                "share": round(self.share(tenant), 3),
+            }
+            for tenant, state in busiest
+        ]
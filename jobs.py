@@ -0,0 +1,366 @@
+"""
+Asynchronous Job Queue for AutoPMO
+
+Long-running orchestrator work (e.g. project creation) can be submitted as a
+job: the API answers immediately with a job id, a bounded pool of worker
+tasks runs the job, and clients poll or long-poll for stage-by-stage progress
+and the final result.
+
+When a shared StateStore is configured, every job update is published to it
+so that any API worker can answer status queries for any job. Publishing runs
+on a background task that writes the latest snapshot of each changed job, so
+progress events never wait on the store.
+
+Queued jobs are picked up per tenant by weighted fair queuing with per-tenant
+job quotas (see ``fair_scheduler``), so one tenant's bulk submissions do not
+hold every worker while others wait.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .fair_scheduler import DEFAULT_TENANT, FairQueue, TenantPolicy
+from .metrics import (
+    JOB_QUEUE_DEPTH,
+    JOB_RUN_SECONDS,
+    JOB_WAIT_SECONDS,
+    JOB_WORKERS_BUSY,
+    JOBS_REJECTED,
+    TENANT_REJECTED,
+    tenant_label,
+)
+from .state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Runner receives the job (to report progress) and returns the job result
+JobRunner = Callable[["Job"], Awaitable[Any]]
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """
+    A unit of background work and its progress.
+
+    Attributes:
+        id: Job identifier
+        kind: Job type (e.g. "create_project")
+        tenant: Tenant the job is scheduled as
+        status: queued, running, succeeded or failed
+        stages: Progress events in the order they happened
+        version: Incremented on every update, for long-polling
+    """
+    id: str
+    kind: str
+    tenant: str = DEFAULT_TENANT
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    version: int = 0
+    runner: Optional[JobRunner] = field(default=None, repr=False)
+    listener: Optional[Callable[["Job"], None]] = field(default=None, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def report(self, stage: str, status: str, details: Optional[Dict[str, Any]] = None):
+        """
+        Record a progress event; usable as an orchestrator progress callback.
+
+        Args:
+            stage: Stage name (classify, agents, synthesize, agent name, ...)
+            status: Stage status (started, completed, ...)
+            details: Optional extra data such as durations
+        """
+        event = {
+            "stage": stage,
+            "status": status,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        if details:
+            event.update(details)
+        self.stages.append(event)
+        self._touch()
+
+    def _touch(self):
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+        if self.listener is not None:
+            self.listener(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.utcfromtimestamp(ts).isoformat() if ts else None
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "tenant": self.tenant,
+            "status": self.status,
+            "version": self.version,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded job queue served by a fixed pool of asyncio worker tasks.
+
+    Attributes:
+        workers: Number of jobs processed concurrently
+        max_queue: Jobs allowed to wait before submissions are rejected (each
+            tenant may fill its weighted share)
+        max_retained: Finished jobs kept in memory for status queries
+        state_store: Optional shared store job snapshots are published to
+        tenant_policies: Weights and job quotas per tenant
+    """
+
+    # Interval for polling the shared store when a job runs in another worker
+    REMOTE_POLL_SECONDS = 0.25
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 100,
+        max_retained: int = 1000,
+        state_store: Optional[StateStore] = None,
+        tenant_policies: Optional[Dict[str, TenantPolicy]] = None,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_retained = max_retained
+        self.state_store = state_store
+
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue = FairQueue("jobs", tenant_policies, quota=lambda p: (p.max_jobs, p.burst))
+        self._ready: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._busy = 0
+        self._recent_run_seconds = 1.0
+        # Latest unpublished snapshot per job, written by one publisher task
+        self._unpublished: Dict[str, Dict[str, Any]] = {}
+        self._publisher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the worker pool on the running event loop."""
+        if self._worker_tasks:
+            return
+        self._ready = asyncio.Event()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Job manager started with {self.workers} workers")
+
+    async def stop(self):
+        """Cancel the worker pool and flush unpublished job updates."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        await self.flush()
+
+    async def flush(self):
+        """Wait until every job update so far is in the shared store."""
+        if self._publisher is not None:
+            await self._publisher
+
+    def submit(self, kind: str, runner: JobRunner, tenant: str = DEFAULT_TENANT) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: Job type
+            runner: Coroutine function that executes the job
+            tenant: Tenant the job is scheduled as
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFullError: If the tenant's share of the queue is full
+        """
+        if self._ready is None:
+            raise RuntimeError("JobManager.start() must be awaited before submitting jobs")
+
+        if self._queue.over_share(tenant, self.max_queue):
+            JOBS_REJECTED.inc()
+            TENANT_REJECTED.labels(queue="jobs", tenant=tenant_label(tenant)).inc()
+            raise JobQueueFullError(retry_after=self.estimated_wait_seconds(tenant))
+
+        job = Job(id=str(uuid.uuid4()), kind=kind, tenant=tenant, runner=runner)
+        if self.state_store is not None:
+            job.listener = self._publish
+        self._queue.push(tenant, job)
+        self._ready.set()
+
+        self.jobs[job.id] = job
+        self._evict()
+        if job.listener is not None:
+            self._publish(job)
+        JOB_QUEUE_DEPTH.set(self._queue.queued())
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current snapshot of a job from this worker or the shared store."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.state_store is not None:
+            return self.state_store.load_job(job_id)
+        return None
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: float,
+        since_version: int = -1
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll a job until it changes past ``since_version`` or finishes.
+
+        Jobs owned by this worker are awaited directly; jobs running in
+        another worker are polled from the shared store.
+
+        Args:
+            job_id: Job identifier
+            timeout: Maximum seconds to wait
+            since_version: Last version the client has seen
+
+        Returns:
+            Job snapshot (changed or not), or None if unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            if job.version <= since_version and job.status not in (SUCCEEDED, FAILED) and timeout > 0:
+                try:
+                    await asyncio.wait_for(job._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return job.to_dict()
+
+        if self.state_store is None:
+            return None
+        snapshot = await self.state_store.offload(self.state_store.load_job, job_id)
+        deadline = time.monotonic() + timeout
+        while (
+            snapshot is not None
+            and snapshot["version"] <= since_version
+            and snapshot["status"] not in (SUCCEEDED, FAILED)
+            and time.monotonic() < deadline
+        ):
+            await asyncio.sleep(self.REMOTE_POLL_SECONDS)
+            snapshot = await self.state_store.offload(self.state_store.load_job, job_id)
+        return snapshot
+
+    def _publish(self, job: Job):
+        # Snapshot now; a burst of updates to one job is written once
+        self._unpublished[job.id] = job.to_dict()
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.get_running_loop().create_task(self._flush_published())
+
+    async def _flush_published(self):
+        while self._unpublished:
+            job_id = next(iter(self._unpublished))
+            data = self._unpublished.pop(job_id)
+            try:
+                await self.state_store.offload(self.state_store.save_job, job_id, data)
+            except Exception as e:
+                logger.warning(f"Failed to publish job {job_id}: {e}")
+
+    def estimated_wait_seconds(self, tenant: str = DEFAULT_TENANT) -> float:
+        """Rough queue wait for a tenant's new job given recent run times."""
+        depth = self._queue.queued(tenant) / self._queue.share(tenant)
+        return (depth + 1) * self._recent_run_seconds / max(1, self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "busy_workers": self._busy,
+            "queue_depth": self._queue.queued(),
+            "max_queue": self.max_queue,
+            "estimated_wait_seconds": self.estimated_wait_seconds(),
+            "jobs": counts,
+            "tenants": self._queue.stats(),
+        }
+
+    def _evict(self):
+        """Forget the oldest finished jobs beyond max_retained."""
+        excess = len(self.jobs) - self.max_retained
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self.jobs.values() if j.status in (SUCCEEDED, FAILED)][:excess]:
+            del self.jobs[job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            popped = self._queue.pop()
+            if popped is None:
+                # Nothing eligible: wait for a submission or a finished job
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            tenant, job = popped
+            JOB_QUEUE_DEPTH.set(self._queue.queued())
+            try:
+                await self._run(job)
+            finally:
+                self._queue.finish(tenant)
+                self._ready.set()
+
+    async def _run(self, job: Job):
+        job.started_at = time.time()
+        job.status = RUNNING
+        job._touch()
+        JOB_WAIT_SECONDS.labels(kind=job.kind).observe(job.started_at - job.created_at)
+
+        self._busy += 1
+        JOB_WORKERS_BUSY.set(self._busy)
+        started = time.perf_counter()
+        try:
+            job.result = await job.runner(job)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            elapsed = time.perf_counter() - started
+            # Smoothed run time feeds the wait estimate returned to rejected clients
+            self._recent_run_seconds = 0.8 * self._recent_run_seconds + 0.2 * elapsed
+            self._busy -= 1
+            JOB_WORKERS_BUSY.set(self._busy)
+            JOB_RUN_SECONDS.labels(kind=job.kind, status=job.status).observe(elapsed)
+            job.finished_at = time.time()
+            job.runner = None
+            job._touch()
@@ -0,0 +1,265 @@
+"""
+Client-Side Load Balancing across LLM Endpoints
+
+Spreads LLM calls over several OpenAI-compatible model-server replicas.
+Endpoints are chosen by least outstanding requests or by EWMA latency
+weighted by outstanding requests. Passive health checks eject an endpoint
+after consecutive failures; once its ejection period expires it is probed
+(``GET {base_url}/models``) and reinstated on success, otherwise ejected
+again for twice as long.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import httpx
+
+from .metrics import LLM_ENDPOINT_EJECTIONS, LLM_ENDPOINT_HEALTHY, LLM_ENDPOINT_OUTSTANDING
+
+logger = logging.getLogger(__name__)
+
+# Exceptions raised when an endpoint cannot be reached or does not answer in time
+CONNECTION_ERRORS: Tuple[Type[BaseException], ...] = (
+    ConnectionError, TimeoutError, asyncio.TimeoutError, httpx.TransportError
+)
+try:
+    import openai
+    CONNECTION_ERRORS += (openai.APIConnectionError,)  # includes APITimeoutError
+except (ImportError, AttributeError):  # openai < 1.0 or not installed
+    pass
+
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA = "ewma"
+
+
+def parse_endpoints(urls: Union[str, Sequence[str]]) -> List[str]:
+    """Normalize a URL, a comma-separated URL list or a list of URLs."""
+    if isinstance(urls, str):
+        urls = urls.split(",")
+    return [url.strip().rstrip("/") for url in urls if url and url.strip()]
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about endpoint health.
+
+    Connection errors, timeouts and 5xx responses count; client errors such
+    as 400 (bad request) or 429 (rate limited) do not, and neither do other
+    exceptions (e.g. a response that could not be parsed), which are bugs on
+    the client side rather than a failing endpoint.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status >= 500
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+@dataclass
+class Endpoint:
+    """Routing and health state of one model-server replica."""
+    url: str
+    outstanding: int = 0
+    ewma_latency: Optional[float] = None
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    eject_seconds: float = 0.0
+    probing: bool = False
+    requests: int = 0
+    failures: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until == 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency_seconds": self.ewma_latency,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected_for_seconds": max(0.0, self.ejected_until - time.monotonic()) if not self.healthy else 0.0,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class LLMBalancer:
+    """
+    Picks an endpoint per LLM call and tracks endpoint health.
+
+    Attributes:
+        strategy: "least_outstanding" or "ewma"
+        failure_threshold: Consecutive failures before an endpoint is ejected
+        base_eject_seconds: First ejection period; doubles per failed probe
+        max_eject_seconds: Upper bound on the ejection period
+        probe_timeout: Timeout of the reinstatement probe
+    """
+
+    def __init__(
+        self,
+        urls: Union[str, Sequence[str]],
+        strategy: str = LEAST_OUTSTANDING,
+        failure_threshold: int = 3,
+        base_eject_seconds: float = 10.0,
+        max_eject_seconds: float = 300.0,
+        probe_timeout: float = 2.0,
+        ewma_decay: float = 0.3,
+    ):
+        if strategy not in (LEAST_OUTSTANDING, EWMA):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        self.endpoints = [Endpoint(url) for url in parse_endpoints(urls)]
+        if not self.endpoints:
+            raise ValueError("At least one LLM endpoint is required")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.base_eject_seconds = base_eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.probe_timeout = probe_timeout
+        self.ewma_decay = ewma_decay
+        self._probes: Dict[str, "asyncio.Task[None]"] = {}
+
+        for endpoint in self.endpoints:
+            LLM_ENDPOINT_HEALTHY.labels(endpoint=endpoint.url).set(1)
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _score(self, endpoint: Endpoint) -> float:
+        if self.strategy == EWMA:
+            # Unmeasured endpoints score as fast so they receive traffic
+            latency = endpoint.ewma_latency or 0.0
+            return latency * (endpoint.outstanding + 1)
+        return float(endpoint.outstanding)
+
+    def pick(self, exclude: Sequence[str] = ()) -> Endpoint:
+        """
+        Choose an endpoint for the next call.
+
+        Healthy endpoints are preferred; endpoints whose ejection has expired
+        get a probe scheduled. If every endpoint is ejected, the one that
+        will recover soonest is used rather than failing the call.
+
+        Args:
+            exclude: URLs already tried for this call
+
+        Returns:
+            Selected endpoint
+        """
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not endpoint.healthy and endpoint.ejected_until <= now:
+                self._schedule_probe(endpoint)
+
+        candidates = [
+            e for e in self.endpoints if e.healthy and e.url not in exclude
+        ] or [
+            e for e in self.endpoints if e.healthy
+        ]
+        if not candidates:
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+
+        return min(candidates, key=lambda e: (self._score(e), e.requests))
+
+    def on_start(self, endpoint: Endpoint):
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        LLM_ENDPOINT_OUTSTANDING.labels(endpoint=endpoint.url).set(endpoint.outstanding)
+
+    def on_finish(self, endpoint: Endpoint, latency: float, error: Optional[BaseException] = None):
+        """Record the outcome of a call for routing and passive health checks."""
+        endpoint.outstanding -= 1
+        LLM_ENDPOINT_OUTSTANDING.labels(endpoint=endpoint.url).set(endpoint.outstanding)
+
+        if error is None or not is_endpoint_failure(error):
+            endpoint.consecutive_failures = 0
+            endpoint.ewma_latency = (
+                latency if endpoint.ewma_latency is None
+                else (1 - self.ewma_decay) * endpoint.ewma_latency + self.ewma_decay * latency
+            )
+            return
+
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+            self._eject(endpoint, self.base_eject_seconds, error)
+
+    def _eject(self, endpoint: Endpoint, seconds: float, reason: Any):
+        endpoint.eject_seconds = min(seconds, self.max_eject_seconds)
+        endpoint.ejected_until = time.monotonic() + endpoint.eject_seconds
+        LLM_ENDPOINT_HEALTHY.labels(endpoint=endpoint.url).set(0)
+        LLM_ENDPOINT_EJECTIONS.labels(endpoint=endpoint.url).inc()
+        logger.warning(
+            f"Ejected LLM endpoint {endpoint.url} for {endpoint.eject_seconds:.1f}s: {reason}"
+        )
+
+    def _reinstate(self, endpoint: Endpoint):
+        endpoint.ejected_until = 0.0
+        endpoint.eject_seconds = 0.0
+        endpoint.consecutive_failures = 0
+        LLM_ENDPOINT_HEALTHY.labels(endpoint=endpoint.url).set(1)
+        logger.info(f"Reinstated LLM endpoint {endpoint.url}")
+
+    def _schedule_probe(self, endpoint: Endpoint):
+        if endpoint.probing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        endpoint.probing = True
+        self._probes[endpoint.url] = loop.create_task(self.probe(endpoint))
+
+    async def probe(self, endpoint: Endpoint) -> bool:
+        """
+        Check an ejected endpoint and reinstate it if it answers.
+
+        Returns:
+            True if the endpoint is healthy again
+        """
+        try:
+            async with httpx.AsyncClient(timeout=self.probe_timeout) as client:
+                response = await client.get(f"{endpoint.url}/models")
+            ok = response.status_code < 500
+            reason: Any = f"probe returned {response.status_code}"
+        except httpx.HTTPError as e:
+            ok = False
+            reason = f"probe failed: {e}"
+        finally:
+            endpoint.probing = False
+            self._probes.pop(endpoint.url, None)
+
+        if ok:
+            self._reinstate(endpoint)
+        else:
+            self._eject(endpoint, endpoint.eject_seconds * 2 or self.base_eject_seconds, reason)
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "endpoints": [endpoint.to_dict() for endpoint in self.endpoints],
+        }
+
+
+_balancers: Dict[tuple, LLMBalancer] = {}
+
+
+def get_balancer(urls: Union[str, Sequence[str]], **kwargs: Any) -> LLMBalancer:
+    """
+    Process-wide balancer for a set of endpoints.
+
+    Agents configured with the same endpoint list share one balancer, so
+    outstanding-request counts and health reflect all of their traffic.
+    """
+    key = tuple(parse_endpoints(urls))
+    balancer = _balancers.get(key)
+    if balancer is None:
+        balancer = _balancers[key] = LLMBalancer(list(key), **kwargs)
+    return balancer
@@ -0,0 +1,230 @@
+"""
+LLM Record/Replay Cassettes for AutoPMO
+
+Records every LLM request/response pair (with its latency) to a cassette: a
+gzip-compressed JSON-lines file with one compact entry per call. In replay
+mode responses are served from the cassette, either at the recorded speed or
+instantly, so the full orchestrator pipeline can be profiled and benchmarked
+deterministically without a model server.
+
+Entries are keyed by a hash of the request (model, messages, functions and
+call options). Identical requests are replayed in recorded order.
+
+Configuration (see ``cassette_from_env``):
+    AUTOPMO_LLM_CASSETTE=/path/run.jsonl.gz
+    AUTOPMO_LLM_CASSETTE_MODE=record|replay
+    AUTOPMO_LLM_REPLAY_SPEED=realtime|instant|<factor>
+"""
+
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def request_key(
+    model: str,
+    messages: List[BaseMessage],
+    stop: Optional[List[str]],
+    options: Dict[str, Any],
+) -> str:
+    """
+    Stable hash of an LLM request.
+
+    Args:
+        model: Model identifier
+        messages: Chat messages sent
+        stop: Stop sequences
+        options: Extra call options (functions, function_call, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = {
+        "model": model,
+        "messages": [message_to_dict(m) for m in messages],
+        "stop": stop,
+        "options": options,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+def _dump_result(result: ChatResult) -> Dict[str, Any]:
+    return {
+        "generations": [
+            {"message": message_to_dict(g.message), "info": g.generation_info}
+            for g in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }
+
+
+def _load_result(data: Dict[str, Any]) -> ChatResult:
+    messages = messages_from_dict([g["message"] for g in data["generations"]])
+    return ChatResult(
+        generations=[
+            ChatGeneration(message=message, generation_info=g.get("info"))
+            for message, g in zip(messages, data["generations"])
+        ],
+        llm_output=data.get("llm_output"),
+    )
+
+
+class LLMCassette:
+    """
+    Records LLM calls to, or replays them from, a cassette file.
+
+    Attributes:
+        path: Cassette file (``.jsonl.gz``)
+        mode: "record" or "replay"
+        speed: Replay speed multiplier; 1.0 reproduces recorded latencies,
+            0 replays instantly
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, speed: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._file: Optional[gzip.GzipFile] = None
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if mode == REPLAY:
+            self._load()
+        elif not os.path.exists(path):
+            self._write({"version": CASSETTE_VERSION, "created": time.time()})
+
+    def _load(self):
+        with gzip.open(self.path, "rt") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "key" in entry:
+                    self._entries[entry["key"]].append(entry)
+        logger.info(
+            f"Loaded cassette {self.path}: "
+            f"{sum(len(e) for e in self._entries.values())} calls"
+        )
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                # One compression stream per session (appends add a gzip member,
+                # which readers handle); flushing keeps the file readable
+                self._file = gzip.open(self.path, "ab")
+                atexit.register(self.close)
+            self._file.write(line.encode())
+            self._file.flush()
+
+    def close(self):
+        """Finish the compressed stream of a recording session."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    async def call(
+        self,
+        key: str,
+        live: Callable[[], Awaitable[ChatResult]],
+    ) -> ChatResult:
+        """
+        Record or replay one LLM call.
+
+        Args:
+            key: request_key() of the call
+            live: Performs the real call (used in record mode)
+
+        Returns:
+            The live or replayed result
+
+        Raises:
+            CassetteMissError: In replay mode, if the request was not recorded
+        """
+        if self.mode == RECORD:
+            started = time.perf_counter()
+            result = await live()
+            latency = time.perf_counter() - started
+            self._write({"key": key, "latency": round(latency, 6), "result": _dump_result(result)})
+            self.recorded += 1
+            return result
+
+        entries = self._entries.get(key)
+        if not entries:
+            self.misses += 1
+            raise CassetteMissError(f"Request {key} not found in cassette {self.path}")
+
+        # Identical requests replay in recorded order; the last one repeats
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+        if self.speed > 0:
+            await asyncio.sleep(entry["latency"] * self.speed)
+        self.replayed += 1
+        return _load_result(entry["result"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "speed": self.speed,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+
+def parse_speed(value: str) -> float:
+    """Replay speed from "realtime", "instant" or a numeric factor."""
+    if value == "realtime":
+        return 1.0
+    if value == "instant":
+        return 0.0
+    return float(value)
+
+
+_cassettes: Dict[str, LLMCassette] = {}
+
+
+def get_cassette(path: str, mode: str = REPLAY, speed: float = 1.0) -> LLMCassette:
+    """Process-wide cassette per file, shared by all agents."""
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        cassette = _cassettes[path] = LLMCassette(path, mode, speed)
+    return cassette
+
+
+def cassette_from_env() -> Optional[LLMCassette]:
+    """Cassette configured by AUTOPMO_LLM_CASSETTE*, or None."""
+    path = os.getenv("AUTOPMO_LLM_CASSETTE")
+    if not path:
+        return None
+    return get_cassette(
+        path,
+        mode=os.getenv("AUTOPMO_LLM_CASSETTE_MODE", REPLAY),
+        speed=parse_speed(os.getenv("AUTOPMO_LLM_REPLAY_SPEED", "realtime")),
+    )
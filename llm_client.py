@@ -0,0 +1,261 @@
+"""
+LLM Client Factory for AutoPMO
+
+Builds the chat model used by every agent. All calls go through
+``_agenerate``, which is where cross-cutting controls are applied, so they
+cover both direct ``chat()`` calls and the LLM calls made inside an
+AgentExecutor loop:
+
+- admission control (bounded, adaptive concurrency)
+- per-endpoint circuit breakers and budgeted, jittered retries
+- load balancing and failover across several model-server endpoints
+- record/replay of LLM calls to a cassette for offline, deterministic runs
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from langchain_community.chat_models import ChatOpenAI
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.pydantic_v1 import Field
+
+from .admission import AdmissionController, AdmissionRejected
+from .llm_balancer import Endpoint, LLMBalancer, get_balancer, is_endpoint_failure, parse_endpoints
+from .llm_cassette import LLMCassette, request_key
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    get_circuit_breaker,
+    get_retry_policy,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-attempt timeout; retries and breakers are handled here, not by the client
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+
+
+class ManagedChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI whose async calls go through circuit breakers and retries and,
+    with several endpoints, are routed by a shared LLMBalancer. Each attempt
+    holds an admission slot only while it waits for a model server, so
+    backoff sleeps and replayed cassette calls do not take up concurrency.
+    """
+
+    admission_controller: Optional[AdmissionController] = Field(default=None, exclude=True)
+    balancer: Optional[LLMBalancer] = Field(default=None, exclude=True)
+    # One client per endpoint, built from this model's settings
+    endpoint_models: Dict[str, ChatOpenAI] = Field(default_factory=dict, exclude=True)
+    cassette: Optional[LLMCassette] = Field(default=None, exclude=True)
+    retry_policy: Optional[RetryPolicy] = Field(default=None, exclude=True)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    # AgentExecutor drives the model through astream(), which would call
+    # ChatOpenAI._astream directly and bypass _agenerate. Restoring the base
+    # implementation makes astream() fall back to ainvoke(), so agent-loop
+    # calls are controlled too and report token usage. Token streaming is
+    # not used by the agents.
+    _astream = BaseChatModel._astream
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        stream: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self._call(messages, stop, run_manager, stream, **kwargs)
+
+    async def _call(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        stream: Optional[bool],
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Record or replay the call if a cassette is configured."""
+        if self.cassette is None:
+            return await self._retry(messages, stop, run_manager, stream, **kwargs)
+        key = request_key(self.model_name, messages, stop, kwargs)
+        return await self.cassette.call(
+            key, lambda: self._retry(messages, stop, run_manager, stream, **kwargs)
+        )
+
+    async def _retry(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        stream: Optional[bool],
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Retry endpoint failures with backoff within the shared retry budget."""
+        attempt = functools.partial(self._route, messages, stop, run_manager, stream, **kwargs)
+        if self.retry_policy is None:
+            return await attempt()
+        return await self.retry_policy.call(attempt)
+
+    async def _route(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        stream: Optional[bool],
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Send the call to the balancer's pick, failing over once on endpoint
+        errors. Endpoints with an open circuit are skipped; if every circuit
+        is open the call fails immediately with CircuitOpenError.
+        """
+        if self.balancer is None:
+            return await self._attempt(
+                get_circuit_breaker(self.openai_api_base or "default"),
+                functools.partial(super()._agenerate, messages, stop, run_manager, stream, **kwargs)
+            )
+
+        tried: List[str] = []
+        last_error: Optional[BaseException] = None
+        attempts = min(2, len(self.endpoint_models))
+        while True:
+            available = [url for url in self.balancer.urls if get_circuit_breaker(url).available()]
+            if not available:
+                retry_after = min(get_circuit_breaker(url).retry_after() for url in self.balancer.urls)
+                raise CircuitOpenError(",".join(self.balancer.urls), retry_after)
+            if last_error is not None and set(available) <= set(tried):
+                raise last_error
+            endpoint = self.balancer.pick(
+                exclude=tried + [url for url in self.balancer.urls if url not in available]
+            )
+            tried.append(endpoint.url)
+            try:
+                return await self._attempt(get_circuit_breaker(endpoint.url), functools.partial(
+                    self._send, endpoint, messages, stop, run_manager, stream, **kwargs
+                ))
+            except Exception as e:
+                last_error = e
+                if len(tried) >= attempts or not is_endpoint_failure(e):
+                    raise
+                logger.warning(f"LLM endpoint {endpoint.url} failed, retrying elsewhere: {e}")
+
+    async def _attempt(self, breaker: CircuitBreaker, generate: Callable[[], Awaitable[ChatResult]]) -> ChatResult:
+        """
+        One call to one endpoint through its circuit breaker, holding an
+        admission slot, so admission latency is that of a single attempt.
+        """
+        breaker.before_call()
+        try:
+            if self.admission_controller is None:
+                result = await generate()
+            else:
+                async with self.admission_controller.slot():
+                    result = await generate()
+        except (asyncio.CancelledError, AdmissionRejected):
+            # The endpoint was not (fully) tried
+            breaker.on_cancel()
+            raise
+        except Exception as e:
+            breaker.on_failure(e)
+            raise
+        breaker.on_success()
+        return result
+
+    async def _send(
+        self,
+        endpoint: Endpoint,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        stream: Optional[bool],
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Call one balanced endpoint, reporting its latency and errors to the balancer."""
+        self.balancer.on_start(endpoint)
+        started = time.perf_counter()
+        try:
+            result = await self.endpoint_models[endpoint.url]._agenerate(
+                messages, stop, run_manager, stream, **kwargs
+            )
+        except asyncio.CancelledError:
+            self.balancer.on_finish(endpoint, time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.balancer.on_finish(endpoint, time.perf_counter() - started, e)
+            raise
+        self.balancer.on_finish(endpoint, time.perf_counter() - started)
+        return result
+
+
+def create_llm(
+    base_url: Union[str, Sequence[str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    admission_controller: Optional[AdmissionController] = None,
+    balancer_strategy: str = "least_outstanding",
+    cassette: Optional[LLMCassette] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> ChatOpenAI:
+    """
+    Create the chat model for an agent.
+
+    Args:
+        base_url: OpenAI-compatible API URL, or several (list or
+            comma-separated) to balance across replicas
+        model: Model identifier
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens per response
+        admission_controller: Optional limiter shared by all agents
+        balancer_strategy: "least_outstanding" or "ewma" with several URLs
+        cassette: Optional cassette to record calls to or replay them from
+        retry_policy: Retry policy for endpoint failures (default: the
+            process-wide policy from get_retry_policy)
+
+    Returns:
+        Chat model instance
+    """
+    urls = parse_endpoints(base_url)
+    settings = {
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "api_key": "not-needed",  # For local/OpenShift deployments
+        "request_timeout": LLM_REQUEST_TIMEOUT,
+        # Retries are made by the retry policy, across circuit breakers
+        "max_retries": 0,
+    }
+    retry_policy = retry_policy or get_retry_policy()
+
+    if len(urls) <= 1:
+        return ManagedChatOpenAI(
+            base_url=urls[0] if urls else None,
+            admission_controller=admission_controller,
+            cassette=cassette,
+            retry_policy=retry_policy,
+            **settings
+        )
+
+    return ManagedChatOpenAI(
+        base_url=urls[0],
+        admission_controller=admission_controller,
+        balancer=get_balancer(urls, strategy=balancer_strategy),
+        cassette=cassette,
+        retry_policy=retry_policy,
+        endpoint_models={
+            url: ChatOpenAI(base_url=url, **settings) for url in urls
+        },
+        **settings
+    )
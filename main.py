@@ -4,14 +4,18 @@ AutoPMO FastAPI Application
 Main API server for AutoPMO.
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import date
+import asyncio
 import logging
+import math
 import sys
 import os
+import tempfile
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,6 +28,18 @@ from agents import (
 from agents.risk_agent import RiskAgent
 from agents.infrastructure_agent import InfrastructureAgent
 from agents.communications_agent import CommunicationsAgent
+from agents.admission import AdmissionController, AdmissionRejected
+from agents.compute_service import ComputeService
+from agents.fair_scheduler import load_tenant_policies, tenant_of
+from agents.jobs import Job, JobManager, JobQueueFullError
+from agents.llm_balancer import get_balancer, parse_endpoints
+from agents.metrics import render_metrics
+from agents.plan_importer import FORMATS as PLAN_FORMATS, detect_format, import_timeline
+from agents.resilience import CircuitOpenError, breaker_stats
+from agents.responses import FastJSONResponse
+from agents.state_store import create_state_store
+from agents.timeline import TimelineStore, timeline_bars
+from agents.tracing import TRACE_HEADER, get_tracer
 
 # Configure logging
 logging.basicConfig(
@@ -33,11 +49,56 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# LLM backend configuration
+# Comma-separated list to balance across several model-server replicas
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://llm-server:8000/v1")
+LLM_BALANCE_STRATEGY = os.getenv("LLM_BALANCE_STRATEGY", "least_outstanding")
+LLM_MODEL = os.getenv("LLM_MODEL", "mistral-7b-instruct")
+
+# Shared state (history, jobs, caches) so several workers give consistent answers:
+# memory:// (single worker), sqlite:///path (one host) or redis://host:6379/0
+STATE_URL = os.getenv("AUTOPMO_STATE_URL", os.getenv("REDIS_URL", "memory://"))
+state_store = create_state_store(STATE_URL)
+
+# Scheduled plans served as timelines, kept for PLAN_TTL_SECONDS
+timeline_store = TimelineStore(state_store, ttl=int(os.getenv("PLAN_TTL_SECONDS", str(7 * 24 * 3600))))
+
+# Per-tenant weights and quotas for LLM admission and background jobs, e.g.
+# {"bulk-team": {"weight": 1, "max_concurrency": 4, "max_jobs": 1, "burst": 2}, "*": {"weight": 2}}
+TENANT_POLICIES = load_tenant_policies()
+
+# Admission control in front of the LLM backend: adaptive concurrency between
+# LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY, new requests shed with 429 when
+# the estimated queue wait exceeds LLM_QUEUE_SLO_SECONDS
+admission_controller = AdmissionController(
+    initial_limit=int(os.getenv("LLM_INITIAL_CONCURRENCY", "8")),
+    min_limit=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+    max_limit=int(os.getenv("LLM_MAX_CONCURRENCY", "64")),
+    max_queue=int(os.getenv("LLM_QUEUE_SIZE", "100")),
+    max_queue_wait=float(os.getenv("LLM_QUEUE_SLO_SECONDS", "10")),
+    tenant_policies=TENANT_POLICIES,
+)
+
+# Process pool for planning/risk analytics, split between API worker processes
+COMPUTE_WORKERS = int(os.getenv(
+    "AUTOPMO_COMPUTE_WORKERS",
+    str(max(1, (os.cpu_count() or 1) // int(os.getenv("UVICORN_WORKERS", "1"))))
+))
+compute_service = ComputeService(
+    workers=COMPUTE_WORKERS,
+    start_method=os.getenv("AUTOPMO_COMPUTE_START_METHOD", "spawn")
+)
+
+# Background job workers for async project creation
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
 # Initialize FastAPI
 app = FastAPI(
     title="AutoPMO API",
     description="AI-Powered Project Management Office API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS configuration
@@ -49,6 +110,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paths excluded from request tracing (scrapes and probes)
+UNTRACED_PATHS = ("/metrics", "/health", "/debug")
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Start a request-scoped trace and return its id in the response headers."""
+    if request.url.path.startswith(UNTRACED_PATHS):
+        return await call_next(request)
+    
+    with get_tracer().span(
+        f"http {request.method} {request.url.path}",
+        trace_id=request.headers.get(TRACE_HEADER)
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("status_code", response.status_code)
+    
+    response.headers[TRACE_HEADER] = span.trace_id
+    return response
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load with 429 and a Retry-After hint from the estimated queue wait."""
+    return FastJSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "reason": "circuit_open"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 # Request/Response Models
 class ProjectCreate(BaseModel):
     name: str
@@ -56,18 +153,49 @@ class ProjectCreate(BaseModel):
     target_environment: Optional[str] = "openshift"
     budget: Optional[float] = None
     timeline_weeks: Optional[int] = 12
+    organization: Optional[str] = None  # tenant for fair scheduling
+    user_id: Optional[str] = None
 
 class AgentRequest(BaseModel):
     agent_type: str  # orchestrator, planning, risk, infrastructure, communications
     task: str
     context: Optional[Dict[str, Any]] = None
 
+class ScenarioRequest(BaseModel):
+    wbs: Any  # WBS mapping, task list or YAML text
+    scenarios: List[Dict[str, Any]]  # {"name": ..., "patches": [{"op": ...}, ...]}
+    teams: Optional[Dict[str, float]] = None
+    rates: Optional[Dict[str, float]] = None
+    start_date: Optional[date] = None
+
+class PlanCreate(BaseModel):
+    wbs: Any  # WBS mapping, task list or YAML text
+    start_date: Optional[date] = None
+
 class AgentResponse(BaseModel):
     status: str
     agent: str
     result: Any
     execution_time: float
 
+# Background job queue
+job_manager = JobManager(
+    workers=JOB_WORKERS,
+    max_queue=JOB_QUEUE_SIZE,
+    state_store=state_store,
+    tenant_policies=TENANT_POLICIES
+)
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_manager.start()
+    await compute_service.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_manager.stop()
+    compute_service.shutdown()
+
 # Initialize agents (singleton pattern)
 agents_initialized = False
 orchestrator = None
@@ -79,18 +207,28 @@ def get_orchestrator() -> OrchestratorAgent:
     if not agents_initialized:
         logger.info("Initializing agents...")
         
+        agent_config = {
+            "llm_base_url": LLM_BASE_URL,
+            "llm_model": LLM_MODEL,
+            "llm_balancer_strategy": LLM_BALANCE_STRATEGY,
+            "state_store": state_store,
+            "admission_controller": admission_controller,
+            "compute_service": compute_service
+        }
+        
         # Create specialized agents
-        planning = PlanningAgent()
-        risk = RiskAgent()
-        infrastructure = InfrastructureAgent()
-        communications = CommunicationsAgent()
+        planning = PlanningAgent(**agent_config)
+        risk = RiskAgent(**agent_config)
+        infrastructure = InfrastructureAgent(**agent_config)
+        communications = CommunicationsAgent(**agent_config)
         
         # Create orchestrator with all agents
         orchestrator = create_orchestrator(
             planning_agent=planning,
             risk_agent=risk,
             infrastructure_agent=infrastructure,
-            communications_agent=communications
+            communications_agent=communications,
+            **agent_config
         )
         
         agents_initialized = True
@@ -111,6 +249,8 @@ async def root():
             "health": "/health",
             "projects": "/api/v1/projects",
             "agents": "/api/v1/agents/execute",
+            "jobs": "/api/v1/jobs/{job_id}",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -123,19 +263,15 @@ async def health_check():
         "agents": "initialized" if agents_initialized else "not initialized"
     }
 
-@app.post("/api/v1/projects", response_model=Dict[str, Any])
-async def create_project(
-    project: ProjectCreate,
-    orch: OrchestratorAgent = Depends(get_orchestrator)
-):
-    """
-    Create a new project with AI-powered planning.
-    """
-    try:
-        logger.info(f"Creating project: {project.name}")
-        
-        # Build request for orchestrator
-        request = f"""Create a comprehensive project plan for: {project.name}
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+def build_project_request(project: ProjectCreate) -> Tuple[str, Dict[str, Any]]:
+    """Build the orchestrator request and context for a new project."""
+    request = f"""Create a comprehensive project plan for: {project.name}
 
 Description: {project.description}
 Target Environment: {project.target_environment}
@@ -149,27 +285,120 @@ Please provide:
 4. Infrastructure Analysis
 5. Communication Plan
 """
+    
+    context = {
+        "project_name": project.name,
+        "description": project.description,
+        "target_environment": project.target_environment,
+        "budget": project.budget,
+        "timeline_weeks": project.timeline_weeks
+    }
+    for key in ("organization", "user_id"):
+        if getattr(project, key):
+            context[key] = getattr(project, key)
+    
+    return request, context
+
+def project_response(project: ProjectCreate, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape the orchestrator result as a project creation response."""
+    return {
+        "status": "success",
+        "project_id": f"proj-{hash(project.name) % 10000}",
+        "project_name": project.name,
+        "ai_analysis": result
+    }
+
+@app.post("/api/v1/projects", response_model=Dict[str, Any])
+async def create_project(
+    project: ProjectCreate,
+    async_mode: bool = False,
+    orch: OrchestratorAgent = Depends(get_orchestrator)
+):
+    """
+    Create a new project with AI-powered planning.
+    
+    With ``?async_mode=true`` the request is queued as a job and answered
+    with 202 Accepted; poll ``/api/v1/jobs/{job_id}`` for progress and result.
+    """
+    request, context = build_project_request(project)
+    
+    if async_mode:
+        async def run_job(job: Job) -> Dict[str, Any]:
+            result = await orch.process_request(request, context, progress=job.report)
+            return project_response(project, result)
         
-        context = {
-            "project_name": project.name,
-            "budget": project.budget,
-            "timeline_weeks": project.timeline_weeks
-        }
+        try:
+            job = job_manager.submit("create_project", run_job, tenant=tenant_of(context))
+        except JobQueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Job queue is full, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        # Other workers can answer the status URL once the job is published
+        await job_manager.flush()
+        
+        status_url = f"/api/v1/jobs/{job.id}"
+        return FastJSONResponse(
+            status_code=202,
+            content={"status": job.status, "job_id": job.id, "status_url": status_url},
+            headers={"Location": status_url}
+        )
+    
+    try:
+        logger.info(f"Creating project: {project.name}")
         
         # Process with orchestrator
         result = await orch.process_request(request, context)
         
-        return {
-            "status": "success",
-            "project_id": f"proj-{hash(project.name) % 10000}",
-            "project_name": project.name,
-            "ai_analysis": result
-        }
+        # Trusted agent output: encode directly, skipping jsonable_encoder
+        return FastJSONResponse(project_response(project, result))
         
+    except (AdmissionRejected, CircuitOpenError):
+        raise
     except Exception as e:
         logger.error(f"Project creation failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/jobs")
+async def get_jobs_stats():
+    """Job queue depth, worker utilization and job counts."""
+    return job_manager.stats()
+
+@app.get("/api/v1/admission")
+async def get_admission_stats():
+    """LLM admission control: concurrency limit, in-flight calls and queue."""
+    return admission_controller.stats()
+
+@app.get("/api/v1/compute")
+async def get_compute_stats():
+    """Analytics process pool: workers and job counts."""
+    return compute_service.stats()
+
+@app.get("/api/v1/llm/endpoints")
+async def get_llm_endpoints():
+    """Model-server endpoints with their health and routing state."""
+    urls = parse_endpoints(LLM_BASE_URL)
+    if len(urls) <= 1:
+        stats = {"strategy": None, "endpoints": [{"url": url, "healthy": True} for url in urls]}
+    else:
+        stats = get_balancer(urls, strategy=LLM_BALANCE_STRATEGY).stats()
+    stats["circuit_breakers"] = breaker_stats()
+    return stats
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0, since: int = -1):
+    """
+    Get job status, progress and result.
+    
+    Long-poll with ``wait`` (seconds, max 30): the call returns as soon as the
+    job version moves past ``since`` or the job finishes.
+    """
+    job = await job_manager.wait(job_id, timeout=min(max(wait, 0), 30.0), since_version=since)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return FastJSONResponse(job)
+
 @app.post("/api/v1/agents/execute", response_model=AgentResponse)
 async def execute_agent(
     request: AgentRequest,
@@ -199,31 +428,161 @@ async def execute_agent(
         else:
             raise HTTPException(status_code=400, detail=f"Unknown agent type: {request.agent_type}")
         
-        return AgentResponse(
+        # Built from trusted agent output, so constructed without validation
+        return FastJSONResponse(AgentResponse.model_construct(
             status=result.get("status", "success"),
             agent=result.get("agent", request.agent_type),
             result=result.get("result", result),
             execution_time=result.get("execution_time_seconds", 0)
-        )
+        ))
         
+    except (AdmissionRejected, CircuitOpenError):
+        raise
     except Exception as e:
         logger.error(f"Agent execution failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/plans/scenarios")
+async def compare_plan_scenarios(
+    request: ScenarioRequest,
+    orch: OrchestratorAgent = Depends(get_orchestrator)
+):
+    """
+    Compare what-if scenarios (staffing, effort, scope, dependency changes)
+    against a base plan in one call.
+    """
+    planning = orch.agent_registry.get("planning")
+    try:
+        return await planning.compare_scenarios(
+            request.wbs,
+            request.scenarios,
+            teams=request.teams,
+            rates=request.rates,
+            start_date=request.start_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/v1/plans")
+async def create_plan(
+    request: PlanCreate,
+    orch: OrchestratorAgent = Depends(get_orchestrator)
+):
+    """
+    Schedule a WBS and store it for timeline views.
+    
+    Returns the plan id and the phase-level timeline.
+    """
+    planning = orch.agent_registry.get("planning")
+    try:
+        index = await planning.build_timeline(request.wbs, start_date=request.start_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    plan_id = await asyncio.to_thread(timeline_store.save, index)
+    return {"plan_id": plan_id, "tasks": len(index.ids), **timeline_bars(index, "phase")}
+
+@app.get("/api/v1/plans/{plan_id}/timeline")
+async def get_plan_timeline(plan_id: str, level: str = "phase", phase: Optional[str] = None):
+    """
+    Timeline bars of a stored plan at a zoom level (phase, month, week or
+    task), optionally drilled down to one phase id.
+    """
+    index = await asyncio.to_thread(timeline_store.load, plan_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Plan {plan_id} not found")
+    try:
+        return {"plan_id": plan_id, **timeline_bars(index, level, phase=phase)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Content types accepted by the plan importer when no format is given
+PLAN_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/xml": "xml",
+    "text/xml": "xml",
+    "application/x-yaml": "yaml",
+    "application/yaml": "yaml",
+    "text/yaml": "yaml",
+}
+PLAN_IMPORT_MAX_BYTES = int(float(os.getenv("PLAN_IMPORT_MAX_MB", "512")) * 1024 * 1024)
+# Upload bytes buffered per write to the temporary file
+PLAN_IMPORT_WRITE_BYTES = 1024 * 1024
+
+@app.post("/api/v1/plans/import")
+async def import_plan_file(
+    request: Request,
+    format: Optional[str] = None,
+    filename: Optional[str] = None,
+    start_date: Optional[date] = None
+):
+    """
+    Import a project plan (CSV, MS Project XML or YAML) sent as the raw
+    request body and store it for timeline views.
+
+    The body is streamed to a temporary file and parsed and scheduled in the
+    compute pool, so large exports neither sit in memory nor block the event
+    loop. The format comes from ``format``, the extension of ``filename`` or
+    the Content-Type header.
+
+    Returns the import summary and, if the dependency graph is valid, the
+    plan id for ``/api/v1/plans/{plan_id}/timeline``.
+    """
+    fmt = format
+    if not fmt and filename:
+        try:
+            fmt = detect_format(filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if not fmt:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        fmt = PLAN_CONTENT_TYPES.get(content_type)
+    if fmt not in PLAN_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Plan format must be one of {', '.join(PLAN_FORMATS)}")
+    
+    upload = tempfile.NamedTemporaryFile(prefix="plan-", suffix=f".{fmt}", delete=False)
+    try:
+        with upload:
+            # File writes run on a thread, in large batches
+            size = 0
+            buffer = bytearray()
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > PLAN_IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Plan file too large")
+                buffer += chunk
+                if len(buffer) >= PLAN_IMPORT_WRITE_BYTES:
+                    await asyncio.to_thread(upload.write, bytes(buffer))
+                    buffer.clear()
+            await asyncio.to_thread(upload.write, bytes(buffer))
+        summary, index = await compute_service.run(import_timeline, upload.name, fmt, start_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(upload.name)
+    
+    plan_id = await asyncio.to_thread(timeline_store.save, index) if index is not None else None
+    return {"plan_id": plan_id, **summary}
+
 @app.get("/api/v1/agents/status")
 async def get_agents_status(orch: OrchestratorAgent = Depends(get_orchestrator)):
     """Get status of all agents."""
+    history_counts = {
+        name: await state_store.offload(agent.history_count)
+        for name, agent in orch.agent_registry.items()
+    }
     return {
         "orchestrator": {
             "name": orch.name,
             "registered_agents": list(orch.agent_registry.keys()),
-            "history_count": len(orch.history)
+            "history_count": await state_store.offload(orch.history_count)
         },
         "agents": {
             name: {
                 "description": agent.description,
                 "tools_count": len(agent.tools),
-                "history_count": len(agent.history)
+                "history_count": history_counts[name],
+                "tool_cache": agent.tool_cache_stats(),
+                "project_index": agent.project_index.stats() if agent.project_index else None
             }
             for name, agent in orch.agent_registry.items()
         }
@@ -237,15 +596,34 @@ async def get_agent_history(
 ):
     """Get execution history for a specific agent."""
     if agent_name == "orchestrator":
-        return {"history": orch.get_history(limit)}
+        return FastJSONResponse({"history": await state_store.offload(orch.get_history, limit)})
     
     agent = orch.agent_registry.get(agent_name)
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent {agent_name} not found")
     
-    return {"history": agent.get_history(limit)}
+    return FastJSONResponse({"history": await state_store.offload(agent.get_history, limit)})
+
+@app.get("/debug/traces")
+async def list_traces(limit: int = 20):
+    """List the most recent request traces."""
+    return {"traces": get_tracer().recent_traces(limit)}
+
+@app.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get every span recorded for a request trace."""
+    trace = get_tracer().get_trace(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    # More than one worker requires a shared AUTOPMO_STATE_URL
+    workers = int(os.getenv("UVICORN_WORKERS", "1"))
+    if workers > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
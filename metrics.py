@@ -0,0 +1,410 @@
+"""
+Prometheus Metrics for AutoPMO
+
+This module defines the metrics exported on ``/metrics`` for agents, tools,
+LLM calls and the orchestrator pipeline.
+
+Label values are normalized against fixed allow-lists (or capped registries
+for tool names) so series cardinality stays bounded no matter what callers
+pass in.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import LLMResult
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+OTHER = "other"
+
+KNOWN_AGENTS: Set[str] = {
+    "orchestrator", "planning", "risk", "infrastructure", "communications", "audit"
+}
+KNOWN_STAGES: Set[str] = {"classify", "evm", "agents", "synthesize"}
+
+# Tool names are registered by agents at startup; anything beyond the cap is "other"
+MAX_TOOL_LABELS = 64
+_tool_labels: Set[str] = set()
+_tool_labels_lock = threading.Lock()
+
+# Tenants seen first get their own series; the rest share "other"
+MAX_TENANT_LABELS = int(os.getenv("AUTOPMO_MAX_TENANT_LABELS", "50"))
+_tenant_labels: Set[str] = set()
+_tenant_labels_lock = threading.Lock()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+TOOL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+AGENT_EXECUTION_SECONDS = Histogram(
+    "autopmo_agent_execution_seconds",
+    "Wall-clock time of BaseAgent.execute",
+    ["agent", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_IN_FLIGHT = Gauge(
+    "autopmo_agent_executions_in_flight",
+    "Agent executions currently running",
+    ["agent"],
+)
+TOOL_EXECUTION_SECONDS = Histogram(
+    "autopmo_tool_execution_seconds",
+    "Wall-clock time of agent tool invocations",
+    ["agent", "tool"],
+    buckets=TOOL_BUCKETS,
+)
+TOOL_CACHE_REQUESTS = Counter(
+    "autopmo_tool_cache_requests_total",
+    "Memoized tool lookups by result (hit or miss)",
+    ["agent", "tool", "result"],
+)
+TOOL_CACHE_ENTRIES = Gauge(
+    "autopmo_tool_cache_entries",
+    "Results currently held in each tool cache",
+    ["agent", "tool"],
+)
+TOOL_POOL_IN_FLIGHT = Gauge(
+    "autopmo_tool_pool_in_flight",
+    "Tool calls queued or running on each tool executor pool",
+    ["pool"],
+)
+COMPUTE_JOBS_IN_FLIGHT = Gauge(
+    "autopmo_compute_jobs_in_flight",
+    "Analytics jobs queued or running on the compute service",
+)
+COMPUTE_JOB_SECONDS = Histogram(
+    "autopmo_compute_job_seconds",
+    "Time from compute job submission to completion",
+    ["status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "autopmo_orchestrator_stage_seconds",
+    "Wall-clock time of orchestrator pipeline stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ORCHESTRATOR_IN_FLIGHT = Gauge(
+    "autopmo_orchestrator_requests_in_flight",
+    "Orchestrator requests currently being processed",
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "autopmo_llm_request_seconds",
+    "Latency of individual LLM calls",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_IN_FLIGHT = Gauge(
+    "autopmo_llm_requests_in_flight",
+    "LLM calls currently awaiting a response",
+    ["agent"],
+)
+LLM_TOKENS = Counter(
+    "autopmo_llm_tokens_total",
+    "LLM tokens consumed",
+    ["agent", "type"],
+)
+PROMPT_TOKENS = Counter(
+    "autopmo_prompt_tokens_total",
+    "Estimated tokens in assembled prompt sections",
+    ["component"],
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "autopmo_prompt_tokens_saved_total",
+    "Estimated prompt tokens removed by compaction and budgets",
+    ["component"],
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "autopmo_job_queue_depth",
+    "Jobs waiting for a worker",
+)
+JOB_WORKERS_BUSY = Gauge(
+    "autopmo_job_workers_busy",
+    "Job workers currently running a job",
+)
+JOB_WAIT_SECONDS = Histogram(
+    "autopmo_job_wait_seconds",
+    "Time jobs spend queued before a worker picks them up",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+JOB_RUN_SECONDS = Histogram(
+    "autopmo_job_run_seconds",
+    "Time from job start to completion",
+    ["kind", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+JOBS_REJECTED = Counter(
+    "autopmo_jobs_rejected_total",
+    "Job submissions rejected because the queue was full",
+)
+ADMISSION_LIMIT = Gauge(
+    "autopmo_admission_concurrency_limit",
+    "Current adaptive limit on concurrent LLM calls",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "autopmo_admission_in_flight",
+    "LLM calls holding an admission slot",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "autopmo_admission_queue_depth",
+    "LLM calls waiting for an admission slot",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "autopmo_admission_wait_seconds",
+    "Time LLM calls wait for an admission slot",
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "autopmo_admission_rejected_total",
+    "Requests shed by admission control",
+    ["reason"],
+)
+LLM_ENDPOINT_OUTSTANDING = Gauge(
+    "autopmo_llm_endpoint_outstanding",
+    "LLM calls outstanding per model-server endpoint",
+    ["endpoint"],
+)
+LLM_ENDPOINT_HEALTHY = Gauge(
+    "autopmo_llm_endpoint_healthy",
+    "1 if the endpoint is in rotation, 0 while ejected",
+    ["endpoint"],
+)
+LLM_ENDPOINT_EJECTIONS = Counter(
+    "autopmo_llm_endpoint_ejections_total",
+    "Times an endpoint was ejected by passive health checks or failed probes",
+    ["endpoint"],
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "autopmo_llm_circuit_state",
+    "Circuit breaker state per endpoint: 0 closed, 1 half-open, 2 open",
+    ["endpoint"],
+)
+LLM_CIRCUIT_TRANSITIONS = Counter(
+    "autopmo_llm_circuit_transitions_total",
+    "Circuit breaker state changes per endpoint and new state",
+    ["endpoint", "state"],
+)
+LLM_CIRCUIT_REJECTED = Counter(
+    "autopmo_llm_circuit_rejected_total",
+    "LLM calls failed fast because the endpoint's circuit was open",
+    ["endpoint"],
+)
+LLM_RETRIES = Counter(
+    "autopmo_llm_retries_total",
+    "LLM call retry decisions (retried, exhausted, budget_exceeded)",
+    ["outcome"],
+)
+TENANT_WAIT_SECONDS = Histogram(
+    "autopmo_tenant_wait_seconds",
+    "Time a tenant's work waits in a fair queue (llm admission or jobs)",
+    ["queue", "tenant"],
+    buckets=LATENCY_BUCKETS,
+)
+TENANT_QUEUED = Gauge(
+    "autopmo_tenant_queued",
+    "Work waiting in a fair queue per tenant",
+    ["queue", "tenant"],
+)
+TENANT_IN_FLIGHT = Gauge(
+    "autopmo_tenant_in_flight",
+    "Slots held per tenant in a fair queue",
+    ["queue", "tenant"],
+)
+TENANT_REJECTED = Counter(
+    "autopmo_tenant_rejected_total",
+    "Work rejected per tenant and queue",
+    ["queue", "tenant"],
+)
+ERRORS = Counter(
+    "autopmo_errors_total",
+    "Errors and timeouts by component",
+    ["component", "kind"],
+)
+
+
+def agent_label(name: str) -> str:
+    """Normalize an agent name to a bounded label value."""
+    key = name.lower().replace(" ", "_")
+    return key if key in KNOWN_AGENTS else OTHER
+
+
+def stage_label(stage: str) -> str:
+    """Normalize an orchestrator stage to a bounded label value."""
+    return stage if stage in KNOWN_STAGES else OTHER
+
+
+def tool_label(name: str) -> str:
+    """
+    Normalize a tool name to a bounded label value.
+
+    The first ``MAX_TOOL_LABELS`` distinct names get their own series.
+    """
+    if name in _tool_labels:
+        return name
+    with _tool_labels_lock:
+        if name in _tool_labels:
+            return name
+        if len(_tool_labels) < MAX_TOOL_LABELS:
+            _tool_labels.add(name)
+            return name
+    return OTHER
+
+
+def tenant_label(tenant: str) -> str:
+    """
+    Normalize a tenant id to a bounded label value.
+
+    The first ``MAX_TENANT_LABELS`` distinct tenants get their own series.
+    """
+    if tenant in _tenant_labels:
+        return tenant
+    with _tenant_labels_lock:
+        if tenant in _tenant_labels:
+            return tenant
+        if len(_tenant_labels) < MAX_TENANT_LABELS:
+            _tenant_labels.add(tenant)
+            return tenant
+    return OTHER
+
+
+def error_kind(error: BaseException) -> str:
+    """Classify an exception as ``timeout`` or ``error``."""
+    if isinstance(error, asyncio.TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout"
+    return "error"
+
+
+def record_error(component: str, error: BaseException):
+    """Count an error against a bounded component label."""
+    ERRORS.labels(component=agent_label(component), kind=error_kind(error)).inc()
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record the duration of an orchestrator stage."""
+    STAGE_SECONDS.labels(stage=stage_label(stage)).observe(seconds)
+
+
+def instrument_tool(agent_name: str, tool_name: str, func: Callable) -> Callable:
+    """
+    Wrap a tool callable with latency and error metrics.
+
+    Works for both plain functions and coroutine functions.
+
+    Args:
+        agent_name: Owning agent name
+        tool_name: Tool name as registered with LangChain
+        func: Tool implementation
+
+    Returns:
+        Instrumented callable with the same signature
+    """
+    histogram = TOOL_EXECUTION_SECONDS.labels(
+        agent=agent_label(agent_name), tool=tool_label(tool_name)
+    )
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                record_error(agent_name, e)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            record_error(agent_name, e)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def token_usage(llm_output: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """Extract (prompt, completion) token counts from an LLM output dict."""
+    usage = (llm_output or {}).get("token_usage") or {}
+    return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback that records latency, in-flight count and token usage
+    for every LLM call an agent makes, including those inside the agent loop.
+    """
+
+    run_inline = True
+
+    def __init__(self, agent_name: str):
+        self.agent = agent_label(agent_name)
+        self._starts: Dict[UUID, float] = {}
+
+    def _start(self, run_id: UUID):
+        self._starts[run_id] = time.perf_counter()
+        LLM_IN_FLIGHT.labels(agent=self.agent).inc()
+
+    def _finish(self, run_id: UUID):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_IN_FLIGHT.labels(agent=self.agent).dec()
+            LLM_REQUEST_SECONDS.labels(agent=self.agent).observe(time.perf_counter() - start)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        self._finish(run_id)
+        prompt_tokens, completion_tokens = token_usage(response.llm_output)
+        if prompt_tokens:
+            LLM_TOKENS.labels(agent=self.agent, type="prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(agent=self.agent, type="completion").inc(completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._finish(run_id)
+        ERRORS.labels(component="llm", kind=error_kind(error)).inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (several API workers), samples from
+    every worker process are aggregated.
+
+    Returns:
+        Tuple of (payload, content type)
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -7,14 +7,33 @@ analyzes them, delegates to specialized agents, and synthesizes results.
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from contextlib import contextmanager
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from langchain.tools import Tool
 
+from .admission import AdmissionRejected, admission_scope
 from .base_agent import BaseAgent
+from .evm import evm_summary, format_summary
+from .fair_scheduler import tenant_of
+from .metrics import ORCHESTRATOR_IN_FLIGHT, observe_stage, record_error
+from .prompt_budget import (
+    PromptAssembler,
+    PromptReport,
+    count_tokens,
+    extractive_summary,
+    truncate_to_budget,
+)
+from .resilience import CircuitOpenError
+from .tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+# progress(stage, status, details) - see OrchestratorAgent.process_request
+ProgressCallback = Callable[[str, str, Optional[Dict[str, Any]]], None]
+
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -28,13 +47,46 @@ class OrchestratorAgent(BaseAgent):
     - Handles error recovery
     """
     
-    def __init__(self, **kwargs):
+    # Delegation and status queries depend on agent state, not just input
+    impure_tools = frozenset({"delegate_to_agent", "query_agent_status", "list_available_agents"})
+    
+    def __init__(
+        self,
+        synthesis_token_budget: int = 3000,
+        min_result_tokens: int = 200,
+        map_reduce_threshold: int = 3,
+        summary_token_budget: int = 300,
+        reduce_fanout: int = 4,
+        upstream_token_budget: int = 600,
+        **kwargs
+    ):
+        """
+        Initialize the orchestrator.
+        
+        Args:
+            synthesis_token_budget: Prompt token budget shared by all agent results
+            min_result_tokens: Smallest per-agent share of the synthesis budget
+            map_reduce_threshold: Successful results at which synthesis switches
+                to summarize-then-merge
+            summary_token_budget: Target size of each per-agent summary
+            reduce_fanout: Summaries merged per LLM call when reducing
+            upstream_token_budget: Tokens of each upstream agent's output
+                passed to the agents that depend on it
+            **kwargs: BaseAgent configuration
+        """
         super().__init__(
             name="Orchestrator",
             description="Central coordinator for all AutoPMO agents",
             **kwargs
         )
         
+        self.synthesis_token_budget = synthesis_token_budget
+        self.min_result_tokens = min_result_tokens
+        self.map_reduce_threshold = map_reduce_threshold
+        self.summary_token_budget = summary_token_budget
+        self.reduce_fanout = max(2, reduce_fanout)
+        self.upstream_token_budget = upstream_token_budget
+        
         # Registry of available agents
         self.agent_registry: Dict[str, BaseAgent] = {}
         
@@ -47,6 +99,14 @@ class OrchestratorAgent(BaseAgent):
             "status_update": ["communications"],
             "resource_allocation": ["planning", "infrastructure"],
         }
+        
+        # Stage dependencies between delegated agents: an agent starts once the
+        # agents it depends on (among those delegated to) have finished and
+        # receives their output; independent agents run concurrently
+        self.stage_dependencies: Dict[str, List[str]] = {
+            "risk": ["planning"],
+            "communications": ["planning", "risk", "infrastructure"],
+        }
     
     def get_system_prompt(self) -> str:
         """System prompt for orchestrator."""
@@ -111,7 +171,8 @@ Use PM best practices (PMBOK, Agile, etc.) in your responses.
     async def process_request(
         self,
         user_request: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        progress: Optional[ProgressCallback] = None
     ) -> Dict[str, Any]:
         """
         Main entry point for processing user requests.
@@ -119,35 +180,108 @@ Use PM best practices (PMBOK, Agile, etc.) in your responses.
         Args:
             user_request: Natural language request from user
             context: Additional context (user_id, project_id, etc.)
+            progress: Called as progress(stage, status, details) when stages
+                start and complete and as each agent finishes
             
         Returns:
             Synthesized response from multiple agents
         """
         logger.info(f"Orchestrator processing request: {user_request[:100]}...")
+        timings: Dict[str, float] = {}
         
-        # Classify intent
-        intent = await self._classify_intent(user_request)
-        logger.info(f"Classified intent: {intent}")
-        
-        # Determine which agents to invoke
-        agents_needed = self.delegation_rules.get(intent, ["planning"])
-        logger.info(f"Agents needed: {agents_needed}")
-        
-        # Prepare tasks for each agent
-        agent_tasks = self._prepare_agent_tasks(
-            intent, user_request, agents_needed, context
-        )
-        
-        # Execute agents (in parallel where possible)
-        results = await self._execute_agents_parallel(agent_tasks)
+        # One admission decision covers classification, agents and synthesis
+        with get_tracer().span("orchestrator.process_request") as root_span, admission_scope(tenant_of(context)):
+            ORCHESTRATOR_IN_FLIGHT.inc()
+            try:
+                # Classify intent
+                with self._stage("classify", timings, progress):
+                    intent = await self._classify_intent(user_request)
+                logger.info(f"Classified intent: {intent}")
+                root_span.set_attribute("intent", intent)
+                
+                # Determine which agents to invoke
+                agents_needed = self.delegation_rules.get(intent, ["planning"])
+                logger.info(f"Agents needed: {agents_needed}")
+                
+                # Status reports get earned value numbers instead of raw series
+                if intent == "status_update" and context and context.get("evm_data"):
+                    with self._stage("evm", timings, progress):
+                        context = await self._earned_value_context(context)
+                
+                # Prepare tasks for each agent
+                agent_tasks = self._prepare_agent_tasks(
+                    intent, user_request, agents_needed, context
+                )
+                
+                # Once enough agents have succeeded for map-reduce synthesis,
+                # summarize each result as soon as it arrives
+                summaries: Dict[str, "asyncio.Task[str]"] = {}
+                succeeded: List[Dict[str, Any]] = []
+                
+                def on_result(result: Dict[str, Any]):
+                    if progress is not None:
+                        progress(result["agent"].lower(), result["status"], {
+                            "execution_time_seconds": result.get("execution_time_seconds")
+                        })
+                    if result.get("status") != "success":
+                        return
+                    succeeded.append(result)
+                    if len(succeeded) >= self.map_reduce_threshold:
+                        for done in succeeded:
+                            self._start_summary(done, summaries)
+                
+                # Execute agents (in parallel where possible)
+                with self._stage("agents", timings, progress, agent_count=len(agent_tasks)):
+                    results = await self._execute_agent_pipeline(agent_tasks, on_result)
+                
+                # Synthesize results
+                with self._stage("synthesize", timings, progress):
+                    final_response = await self._synthesize_results(
+                        user_request, intent, results, context, summaries
+                    )
+            except Exception as e:
+                record_error(self.name, e)
+                raise
+            finally:
+                ORCHESTRATOR_IN_FLIGHT.dec()
         
-        # Synthesize results
-        final_response = await self._synthesize_results(
-            user_request, intent, results, context
-        )
+        # Per-stage wall-clock breakdown (seconds)
+        final_response["timings"] = timings
+        final_response["trace_id"] = root_span.trace_id
         
         return final_response
     
+    @contextmanager
+    def _stage(
+        self,
+        stage: str,
+        timings: Dict[str, float],
+        progress: Optional[ProgressCallback] = None,
+        **attributes: Any
+    ) -> Iterator[None]:
+        """
+        Time a pipeline stage as a trace span, a metric and a timings entry.
+        
+        Args:
+            stage: Stage name (classify, agents, synthesize)
+            timings: Per-request timings dict to record into
+            progress: Optional progress callback notified on start/completion
+            **attributes: Extra span attributes
+        """
+        if progress is not None:
+            progress(stage, "started", None)
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            with get_tracer().span(f"orchestrator.{stage}", **attributes):
+                yield
+            status = "completed"
+        finally:
+            timings[stage] = time.perf_counter() - start
+            observe_stage(stage, timings[stage])
+            if progress is not None:
+                progress(stage, status, {"seconds": timings[stage]})
+    
     async def _classify_intent(self, request: str) -> str:
         """
         Classify user intent from request.
@@ -192,9 +326,23 @@ Respond with ONLY the category name, nothing else."""
             context: Request context
             
         Returns:
-            List of agent task specifications
+            List of agent task specifications, with the delegated agents each
+            one depends on and the context keys the task text already contains
         """
         tasks = []
+        delegated = [name for name in agents_needed if name in self.agent_registry]
+        
+        # Context text the request spells out (e.g. the project description)
+        # is not sent to agents a second time
+        inlined = [
+            key for key, value in (context or {}).items()
+            if isinstance(value, str) and value and value in request
+        ]
+        
+        # Agents get earned value as compact text in the task, not as context JSON
+        earned_value = context.get("earned_value") if context else None
+        if earned_value:
+            context = {k: v for k, v in context.items() if k != "earned_value"}
         
         for agent_name in agents_needed:
             if agent_name not in self.agent_registry:
@@ -215,46 +363,133 @@ Respond with ONLY the category name, nothing else."""
             else:
                 task = request
             
+            if earned_value:
+                task += f"\n\n{format_summary(earned_value)}"
+            
             tasks.append({
                 "agent_name": agent_name,
                 "agent": self.agent_registry[agent_name],
                 "task": task,
-                "context": context
+                "context": context,
+                "drop_keys": inlined,
+                "depends_on": [
+                    dep for dep in self.stage_dependencies.get(agent_name, [])
+                    if dep in delegated
+                ]
             })
         
         return tasks
     
-    async def _execute_agents_parallel(
+    async def _earned_value_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace raw progress series in the context with an EVM summary.
+        
+        Args:
+            context: Request context with columnar "evm_data" (see agents.evm)
+            
+        Returns:
+            Context with "earned_value" instead of "evm_data"
+        """
+        data = context["evm_data"]
+        context = {k: v for k, v in context.items() if k != "evm_data"}
+        try:
+            # Portfolio-sized series are computed off the event loop
+            context["earned_value"] = await self.compute_service.run(evm_summary, data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Earned value data ignored: {e}")
+        return context
+    
+    async def _execute_agent_pipeline(
         self,
-        agent_tasks: List[Dict[str, Any]]
+        agent_tasks: List[Dict[str, Any]],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Execute multiple agents in parallel.
+        Execute agents as a DAG of stages.
+        
+        Every agent starts as soon as the agents it depends on have finished,
+        so independent agents overlap. Upstream outputs (within
+        upstream_token_budget each) are passed in the dependent agent's
+        context under "upstream"; a failed upstream agent is left out.
+        
+        An overloaded or unreachable LLM backend fails the whole pipeline at
+        once: the remaining stages are cancelled and the error is raised so
+        the API can answer 429/503 instead of an empty synthesis.
         
         Args:
-            agent_tasks: List of agent task specifications
+            agent_tasks: Agent task specifications with "depends_on"
+            on_result: Called with each agent result as soon as it completes
             
         Returns:
-            List of agent results
+            Successful agent results, in task order
+            
+        Raises:
+            AdmissionRejected: If the LLM backend is saturated
+            CircuitOpenError: If every model-server endpoint is failing
         """
-        logger.info(f"Executing {len(agent_tasks)} agents in parallel")
+        stages = {task["agent_name"]: task for task in agent_tasks}
+        try:
+            order = list(TopologicalSorter(
+                {name: task.get("depends_on", []) for name, task in stages.items()}
+            ).static_order())
+        except CycleError as e:
+            raise ValueError(f"Agent stage dependencies contain a cycle: {e.args[1]}")
+        logger.info(f"Executing {len(agent_tasks)} agents as a pipeline: {order}")
         
-        # Create coroutines
-        coroutines = [
-            task["agent"].execute(task["task"], task["context"])
-            for task in agent_tasks
-        ]
+        runs: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
         
-        # Execute in parallel
-        results = await asyncio.gather(*coroutines, return_exceptions=True)
+        async def run(task: Dict[str, Any]) -> Dict[str, Any]:
+            upstream_runs = [runs[dep] for dep in task.get("depends_on", [])]
+            context = task["context"]
+            if upstream_runs:
+                # wait() rather than await, so cancelling this stage does not
+                # cancel the shared upstream stages
+                await asyncio.wait(upstream_runs)
+                upstream = {}
+                for dep, upstream_run in zip(task["depends_on"], upstream_runs):
+                    if upstream_run.cancelled() or upstream_run.exception() is not None:
+                        continue
+                    output = upstream_run.result()
+                    if output.get("status") == "success":
+                        upstream[dep] = truncate_to_budget(
+                            str(output.get("result", "")), self.upstream_token_budget
+                        )
+                if upstream:
+                    context = {**(context or {}), "upstream": upstream}
+            
+            result = await task["agent"].execute(task["task"], context, drop_keys=task.get("drop_keys", ()))
+            if on_result is not None:
+                on_result(result)
+            return result
+        
+        for name in order:
+            runs[name] = asyncio.ensure_future(run(stages[name]))
+        
+        pending = set(runs.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_EXCEPTION
+                )
+                for stage in done:
+                    if stage.cancelled():
+                        continue
+                    error = stage.exception()
+                    if isinstance(error, (AdmissionRejected, CircuitOpenError)):
+                        raise error
+        except BaseException:
+            for stage in runs.values():
+                stage.cancel()
+            raise
         
         # Filter out exceptions
         valid_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Agent {agent_tasks[i]['agent_name']} failed: {result}")
+        for task in agent_tasks:
+            stage = runs[task["agent_name"]]
+            if stage.exception() is not None:
+                logger.error(f"Agent {task['agent_name']} failed: {stage.exception()}")
             else:
-                valid_results.append(result)
+                valid_results.append(stage.result())
         
         return valid_results
     
@@ -263,26 +498,121 @@ Respond with ONLY the category name, nothing else."""
         original_request: str,
         intent: str,
         agent_results: List[Dict[str, Any]],
-        context: Optional[Dict[str, Any]]
+        context: Optional[Dict[str, Any]],
+        summaries: Optional[Dict[str, "asyncio.Task[str]"]] = None
     ) -> Dict[str, Any]:
         """
         Synthesize results from multiple agents into a cohesive response.
         
+        The strategy depends on how many agents succeeded:
+        - none: report the failures without calling the LLM
+        - one: return that agent's result directly (bypass)
+        - fewer than map_reduce_threshold: one synthesis call over all results
+        - otherwise: merge bounded per-agent summaries (map-reduce), so the
+          prompt size no longer grows with total agent output
+        
         Args:
             original_request: Original user request
             intent: Classified intent
             agent_results: Results from all agents
             context: Request context
+            summaries: Per-agent summary tasks started while agents were running
             
         Returns:
             Synthesized response
         """
-        logger.info("Synthesizing results from all agents")
+        summaries = summaries if summaries is not None else {}
+        successful = [r for r in agent_results if r.get("status") == "success"]
+        prompt_stats = PromptReport().to_dict()
+        status = "success"
         
-        # Prepare synthesis prompt
-        results_text = "\n\n".join([
-            f"Agent: {r['agent']}\nResult: {r['result']}"
+        try:
+            if not successful:
+                strategy = "none"
+                status = "error"
+                synthesized_text = self._format_failures(agent_results)
+            elif len(successful) == 1:
+                strategy = "bypass"
+                synthesized_text = str(successful[0].get("result", ""))
+            elif len(successful) < self.map_reduce_threshold:
+                strategy = "single"
+                synthesized_text, prompt_stats = await self._synthesize_single(
+                    original_request, intent, agent_results
+                )
+            else:
+                strategy = "map_reduce"
+                synthesized_text, prompt_stats = await self._synthesize_map_reduce(
+                    original_request, intent, agent_results, summaries
+                )
+        finally:
+            for task in summaries.values():
+                task.cancel()
+        
+        logger.info(f"Synthesized {len(agent_results)} agent results using '{strategy}' strategy")
+        
+        return {
+            "status": status,
+            "request": original_request,
+            "intent": intent,
+            "response": synthesized_text,
+            "synthesis_strategy": strategy,
+            # The request context is returned once, not repeated per agent
+            "agent_results": [
+                {k: v for k, v in r.items() if k != "context"} for r in agent_results
+            ],
+            "recommendations": self._extract_recommendations(agent_results),
+            "context": context,
+            "prompt_stats": prompt_stats
+        }
+    
+    def _format_failures(self, agent_results: List[Dict[str, Any]]) -> str:
+        """Describe failed agent runs without involving the LLM."""
+        if not agent_results:
+            return "No agents were available to handle this request."
+        
+        lines = ["All agents failed to complete the request:"]
+        lines.extend(
+            f"- {r.get('agent', 'unknown')}: {r.get('error', 'no result')}"
             for r in agent_results
+        )
+        return "\n".join(lines)
+    
+    def _build_synthesis_prompt(
+        self,
+        original_request: str,
+        intent: str,
+        named_texts: List[Tuple[str, str]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the final synthesis prompt with each input within budget.
+        
+        Args:
+            original_request: Original user request
+            intent: Classified intent
+            named_texts: (agent name, result or summary text) pairs
+            
+        Returns:
+            Tuple of (prompt, prompt stats)
+        """
+        # Give each input an equal share of the budget
+        per_result_budget = max(
+            self.min_result_tokens,
+            self.synthesis_token_budget // max(1, len(named_texts))
+        )
+        assembler = PromptAssembler(self.name)
+        for i, (_, text) in enumerate(named_texts):
+            assembler.add(
+                f"result_{i}",
+                text,
+                budget=per_result_budget,
+                strategy="summarize"
+            )
+        sections = assembler.render_sections()
+        prompt_report = assembler.record()
+        
+        results_text = "\n\n".join([
+            f"Agent: {name}\nResult: {sections[f'result_{i}']}"
+            for i, (name, _) in enumerate(named_texts)
         ])
         
         synthesis_prompt = f"""Synthesize these agent results into a cohesive response.
@@ -302,17 +632,114 @@ Create a comprehensive response that:
 
 Format as a professional project management response."""
         
-        synthesized_text = await self.chat(synthesis_prompt)
+        return synthesis_prompt, prompt_report.to_dict()
+    
+    async def _synthesize_single(
+        self,
+        original_request: str,
+        intent: str,
+        agent_results: List[Dict[str, Any]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Synthesize all agent results with one LLM call."""
+        named_texts = [
+            (r["agent"], str(r.get("result", r.get("error", ""))))
+            for r in agent_results
+        ]
+        synthesis_prompt, prompt_stats = self._build_synthesis_prompt(
+            original_request, intent, named_texts
+        )
+        return await self.chat(synthesis_prompt), prompt_stats
+    
+    async def _synthesize_map_reduce(
+        self,
+        original_request: str,
+        intent: str,
+        agent_results: List[Dict[str, Any]],
+        summaries: Dict[str, "asyncio.Task[str]"]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Merge per-agent summaries hierarchically, then synthesize once.
+        
+        Summaries started during agent execution are reused; any missing
+        ones are produced now, concurrently.
+        """
+        successful = [r for r in agent_results if r.get("status") == "success"]
+        for result in successful:
+            self._start_summary(result, summaries)
+        
+        texts = await asyncio.gather(*(summaries[r["agent"]] for r in successful))
+        named_texts = [(r["agent"], text) for r, text in zip(successful, texts)]
         
-        return {
-            "status": "success",
-            "request": original_request,
-            "intent": intent,
-            "response": synthesized_text,
-            "agent_results": agent_results,
-            "recommendations": self._extract_recommendations(agent_results),
-            "context": context
-        }
+        # Reduce in rounds of reduce_fanout until one synthesis call suffices
+        while len(named_texts) > self.reduce_fanout:
+            groups = [
+                named_texts[i:i + self.reduce_fanout]
+                for i in range(0, len(named_texts), self.reduce_fanout)
+            ]
+            merged = await asyncio.gather(*(self._merge_summaries(g) for g in groups))
+            named_texts = [
+                (" + ".join(name for name, _ in group), text)
+                for group, text in zip(groups, merged)
+            ]
+        
+        failed = [r for r in agent_results if r.get("status") != "success"]
+        if failed:
+            named_texts.append(("failed agents", self._format_failures(failed)))
+        
+        synthesis_prompt, prompt_stats = self._build_synthesis_prompt(
+            original_request, intent, named_texts
+        )
+        return await self.chat(synthesis_prompt), prompt_stats
+    
+    def _start_summary(
+        self,
+        result: Dict[str, Any],
+        summaries: Dict[str, "asyncio.Task[str]"]
+    ):
+        """Start summarizing a successful agent result in the background."""
+        if result.get("status") != "success" or result["agent"] in summaries:
+            return
+        summaries[result["agent"]] = asyncio.create_task(
+            self._summarize_result(result["agent"], str(result.get("result", "")))
+        )
+    
+    async def _summarize_result(self, agent_name: str, text: str) -> str:
+        """
+        Summarize one agent result to summary_token_budget.
+        
+        Results already within budget are used as-is; otherwise the LLM
+        condenses a bounded slice of the output, falling back to an
+        extractive summary if that call fails.
+        """
+        if count_tokens(text) <= self.summary_token_budget:
+            return text
+        
+        with get_tracer().span("orchestrator.summarize", agent=agent_name):
+            source = truncate_to_budget(text, self.synthesis_token_budget)
+            prompt = f"""Summarize this {agent_name} agent output for a project manager in at most {self.summary_token_budget} tokens.
+Keep concrete figures, task IDs, risks, recommendations and open issues. Omit boilerplate.
+
+Output:
+{source}"""
+            try:
+                return await self.chat(prompt)
+            except Exception as e:
+                logger.warning(f"LLM summary of {agent_name} output failed: {e}")
+                return extractive_summary(text, self.summary_token_budget)
+    
+    async def _merge_summaries(self, named_texts: List[Tuple[str, str]]) -> str:
+        """Merge a group of agent summaries into one summary with a single LLM call."""
+        joined = "\n\n".join(f"[{name}]\n{text}" for name, text in named_texts)
+        prompt = f"""Merge these agent summaries into one summary of at most {self.summary_token_budget} tokens.
+Preserve figures, risks, conflicts between agents and recommendations.
+
+{joined}"""
+        with get_tracer().span("orchestrator.merge", inputs=len(named_texts)):
+            try:
+                return await self.chat(prompt)
+            except Exception as e:
+                logger.warning(f"LLM merge of summaries failed: {e}")
+                return extractive_summary(joined, self.summary_token_budget)
     
     def _extract_recommendations(
         self,
@@ -351,7 +778,7 @@ Format as a professional project management response."""
         """Query agent status."""
         if agent_name in self.agent_registry:
             agent = self.agent_registry[agent_name]
-            return f"{agent.name} is available. History entries: {len(agent.history)}"
+            return f"{agent.name} is available. History entries: {agent.history_count()}"
         return f"Agent {agent_name} not found"
     
     def _list_agents(self, query: str = "") -> str:
@@ -0,0 +1,687 @@
+"""
+Streaming Plan Importer for AutoPMO
+
+Imports project plans exported from other tools into the WBS model without
+holding the file in memory:
+
+- CSV: one task per row (column names of common exports are recognized,
+  e.g. "Task ID"/"ID", "Task Name", "Duration", "Work", "Resource Names",
+  "Predecessors", "Phase")
+- MS Project XML: ``Task``, ``Resource`` and ``Assignment`` elements read
+  with ``iterparse``; each element is dropped from the tree once consumed.
+  Summary tasks become phases; a link to or from a summary task stands for
+  links to or from every task under it.
+- YAML: the nested ``project -> phases -> tasks`` form produced by
+  PlanningAgent or a ``tasks`` list, read from the parser's event stream;
+  each task mapping is consumed as soon as it is complete.
+
+Tasks are stored column-wise in an ``ImportedPlan``: ids, team names and
+phases are interned to integer codes, task names share one UTF-8 buffer,
+numbers go into typed arrays and dependency edges are appended as they are read (references to tasks defined
+later in the file are resolved by id). ``ImportStats`` reports bytes, tasks
+and edges per second. ``import_timeline`` schedules the result into a
+``TimelineIndex`` for the timeline and scenario endpoints.
+"""
+
+import csv
+import io
+import logging
+import math
+import operator
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import yaml
+
+from .timeline import TimelineIndex, build_timeline
+from .wbs_graph import validate_wbs
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_DAY = 8.0
+
+FORMATS = ("csv", "xml", "yaml")
+
+# CSV column aliases, compared case-insensitively
+CSV_COLUMNS = {
+    "id": ("id", "task id", "unique id", "wbs", "task_id"),
+    "name": ("name", "task name", "task", "title"),
+    "phase": ("phase", "phase id", "phase name"),
+    "duration": ("duration", "duration_days", "duration (days)"),
+    "effort_hours": ("effort_hours", "work", "effort", "effort (hours)"),
+    "assigned_to": ("assigned_to", "resource names", "team", "resource", "owner"),
+    "dependencies": ("dependencies", "predecessors", "depends_on"),
+}
+
+_MSP_NS = "{http://schemas.microsoft.com/project}"
+# "3FS+2d", "12SS", "4" -> task reference without link type and lag
+_PREDECESSOR = re.compile(r"([^\s;,]+?)(?:(?:FS|SS|FF|SF)(?:[+-][^;,]*)?)?\s*(?:[;,]|$)", re.IGNORECASE)
+_ISO_DURATION = re.compile(r"^P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+_QUANTITY = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([a-z]*)", re.IGNORECASE)
+
+
+@dataclass
+class ImportStats:
+    """Size and throughput of an import."""
+    format: str
+    bytes: int = 0
+    tasks: int = 0
+    dependencies: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        seconds = self.seconds or 1e-9
+        return {
+            "format": self.format,
+            "bytes": self.bytes,
+            "tasks": self.tasks,
+            "dependencies": self.dependencies,
+            "seconds": round(self.seconds, 3),
+            "mb_per_second": round(self.bytes / seconds / 1e6, 2),
+            "tasks_per_second": round(self.tasks / seconds),
+        }
+
+
+class _Interner:
+    """Maps strings to dense integer codes, keeping one copy of each string."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __call__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            value = sys.intern(value)
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+@dataclass
+class ImportedPlan:
+    """
+    Column-wise plan built by the importer.
+
+    Task rows are indexed by id code; ids referenced as dependencies before
+    (or without) their definition get a row with ``defined`` unset.
+
+    Attributes:
+        name: Project name
+        ids: Task id per row
+        name_data: UTF-8 task names, one after another
+        name_offset, name_length: Slice of name_data holding each row's name
+        phase: Phase code per row (-1: none), see ``phases``
+        team: Team code per row (-1: unassigned), see ``teams``
+        duration: Duration in working days per row (NaN: unknown)
+        effort_hours: Effort per row (NaN: unknown)
+        defined: 1 for rows defined by the file
+        dep_task, dep_on: Dependency edges (task row depends on row)
+        phases: Phase ids and names
+        teams: Team names
+        stats: Import size and throughput
+    """
+    name: str = "Imported Project"
+    ids: List[str] = field(default_factory=list)
+    name_data: bytearray = field(default_factory=bytearray)
+    name_offset: array = field(default_factory=lambda: array("q"))
+    name_length: array = field(default_factory=lambda: array("i"))
+    phase: array = field(default_factory=lambda: array("i"))
+    team: array = field(default_factory=lambda: array("i"))
+    duration: array = field(default_factory=lambda: array("d"))
+    effort_hours: array = field(default_factory=lambda: array("d"))
+    defined: bytearray = field(default_factory=bytearray)
+    dep_task: array = field(default_factory=lambda: array("i"))
+    dep_on: array = field(default_factory=lambda: array("i"))
+    phases: List[Tuple[str, str]] = field(default_factory=list)
+    teams: List[str] = field(default_factory=list)
+    stats: ImportStats = field(default_factory=lambda: ImportStats("none"))
+
+    @property
+    def task_count(self) -> int:
+        return sum(self.defined)
+
+    @property
+    def dangling(self) -> List[str]:
+        """Ids referenced as dependencies but never defined."""
+        return [self.ids[i] for i, flag in enumerate(self.defined) if not flag]
+
+    def task_name(self, row: int) -> str:
+        start = self.name_offset[row]
+        return self.name_data[start:start + self.name_length[row]].decode("utf-8")
+
+    def tasks(self) -> Iterator[Dict[str, Any]]:
+        """Defined tasks as WBS task dicts, in file order of first reference."""
+        deps: List[List[str]] = [[] for _ in self.ids]
+        for task, dep in zip(self.dep_task, self.dep_on):
+            deps[task].append(self.ids[dep])
+        for i, task_id in enumerate(self.ids):
+            if not self.defined[i]:
+                continue
+            task: Dict[str, Any] = {"id": task_id, "name": self.task_name(i)}
+            if not math.isnan(self.duration[i]):
+                task["duration"] = self.duration[i]
+            if not math.isnan(self.effort_hours[i]):
+                task["effort_hours"] = self.effort_hours[i]
+            if self.team[i] >= 0:
+                task["assigned_to"] = self.teams[self.team[i]]
+            task["dependencies"] = deps[i]
+            yield task
+
+    def to_wbs(self) -> Dict[str, Any]:
+        """Nested ``project -> phases -> tasks`` WBS as used by PlanningAgent."""
+        grouped: Dict[int, List[Dict[str, Any]]] = {}
+        for i, task in zip((i for i, flag in enumerate(self.defined) if flag), self.tasks()):
+            grouped.setdefault(self.phase[i], []).append(task)
+        phases = [
+            {"id": self.phases[p][0], "name": self.phases[p][1], "tasks": grouped[p]}
+            for p in range(len(self.phases)) if p in grouped
+        ]
+        if -1 in grouped:
+            phases.append({"id": "0", "name": "Unphased", "tasks": grouped[-1]})
+        return {"project": {"name": self.name, "phases": phases}}
+
+
+class _PlanBuilder:
+    """Appends tasks and edges to an ImportedPlan, interning ids and names."""
+
+    def __init__(self, fmt: str):
+        self.plan = ImportedPlan(stats=ImportStats(fmt))
+        self._ids = _Interner()
+        self._teams = _Interner()
+        self._phases: Dict[str, int] = {}
+
+    def _row(self, task_id: str) -> int:
+        row = self._ids(task_id)
+        plan = self.plan
+        if row == len(plan.ids):
+            plan.ids.append(self._ids.values[row])
+            plan.name_offset.append(0)
+            plan.name_length.append(0)
+            plan.phase.append(-1)
+            plan.team.append(-1)
+            plan.duration.append(math.nan)
+            plan.effort_hours.append(math.nan)
+            plan.defined.append(0)
+        return row
+
+    def phase(self, phase_id: str, name: str = "") -> int:
+        phase_id = str(phase_id)
+        code = self._phases.get(phase_id)
+        if code is None:
+            code = self._phases[phase_id] = len(self.plan.phases)
+            self.plan.phases.append((sys.intern(phase_id), name or phase_id))
+        elif name and self.plan.phases[code][1] == phase_id:
+            self.plan.phases[code] = (self.plan.phases[code][0], name)
+        return code
+
+    def add_task(
+        self,
+        task_id: Any,
+        name: str = "",
+        phase: int = -1,
+        team: Optional[str] = None,
+        duration: Optional[float] = None,
+        effort_hours: Optional[float] = None,
+        dependencies: Any = (),
+    ):
+        plan = self.plan
+        row = self._row(str(task_id).strip())
+        if plan.defined[row]:
+            raise ValueError(f"Duplicate task id: {task_id}")
+        plan.defined[row] = 1
+        if name:
+            encoded = str(name).encode("utf-8")
+            plan.name_offset[row] = len(plan.name_data)
+            plan.name_length[row] = len(encoded)
+            plan.name_data += encoded
+        plan.phase[row] = phase
+        if team:
+            plan.team[row] = self._teams(str(team).strip())
+        if duration is not None:
+            plan.duration[row] = float(duration)
+        if effort_hours is not None:
+            plan.effort_hours[row] = float(effort_hours)
+        self.add_dependencies(row, dependencies)
+        plan.stats.tasks += 1
+
+    def add_dependencies(self, row: int, dependencies: Iterable[Any]):
+        """Append the edges of the task in ``row``."""
+        for dep in dependencies or ():
+            self.plan.dep_task.append(row)
+            self.plan.dep_on.append(self._row(str(dep).strip()))
+
+    def row_of(self, task_id: str) -> int:
+        """Row of an already imported task."""
+        return self._ids.codes[task_id]
+
+    def assign(self, task_id: str, team: str):
+        """Set the team of an already imported task."""
+        row = self._ids.codes.get(task_id)
+        if row is not None and self.plan.defined[row]:
+            self.plan.team[row] = self._teams(team)
+
+    def finish(self, started: float, size: int) -> ImportedPlan:
+        plan = self.plan
+        plan.teams = self._teams.values
+        plan.stats.bytes = size
+        plan.stats.dependencies = len(plan.dep_task)
+        plan.stats.seconds = time.perf_counter() - started
+        return plan
+
+
+class _CountingReader(io.RawIOBase):
+    """Binary stream wrapper counting the bytes read."""
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self.count += len(data)
+        return len(data)
+
+
+# Hours per duration unit, matched by prefix ("mo" before "m" for minutes)
+_UNIT_HOURS = {"h": 1.0, "d": HOURS_PER_DAY, "w": 5 * HOURS_PER_DAY, "mo": 20 * HOURS_PER_DAY, "m": 1 / 60}
+
+
+def _quantity(value: Any, default_unit: str) -> Optional[float]:
+    """Parse 5, "5", "5 days", "40 hrs" or "3w" into ``default_unit`` ("h" or "d")."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    match = _QUANTITY.match(str(value))
+    if not match:
+        raise ValueError(f"Not a duration: {value}")
+    amount, unit = float(match.group(1)), match.group(2).lower()
+    if not unit:
+        return amount
+    for prefix, hours in _UNIT_HOURS.items():
+        if unit.startswith(prefix):
+            return amount * hours / _UNIT_HOURS[default_unit]
+    raise ValueError(f"Unknown duration unit: {value}")
+
+
+def _predecessors(value: Any) -> List[str]:
+    """Task references of a dependency list or an MS Project "3FS+2d;5" string."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return _PREDECESSOR.findall(str(value))
+
+
+# --- CSV ---
+
+def _import_csv(stream: IO[bytes], builder: _PlanBuilder):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = [h.strip().lower() for h in header]
+    columns: Dict[str, int] = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in lowered:
+                columns[key] = lowered.index(alias)
+                break
+    if "id" not in columns:
+        raise ValueError(f"CSV has no task id column (one of {', '.join(CSV_COLUMNS['id'])})")
+
+    # Missing columns read the empty cell appended to every row
+    width = len(header)
+    fields = operator.itemgetter(*(columns.get(key, -1) for key in CSV_COLUMNS))
+    padding = [""] * width
+
+    for line, row in enumerate(reader, start=2):
+        if not row or not any(row):
+            continue
+        if len(row) < width:
+            row.extend(padding[len(row):])
+        row.append("")
+        task_id, name, phase, duration, effort, team, dependencies = fields(row)
+        try:
+            builder.add_task(
+                task_id,
+                name=name.strip(),
+                phase=builder.phase(phase.strip()) if phase else -1,
+                team=team,
+                duration=_quantity(duration, "d"),
+                effort_hours=_quantity(effort, "h"),
+                dependencies=_predecessors(dependencies),
+            )
+        except ValueError as e:
+            raise ValueError(f"CSV line {line}: {e}")
+
+
+# --- MS Project XML ---
+
+def _iso_hours(value: Optional[str]) -> Optional[float]:
+    """MS Project durations ("PT40H0M0S", "P2DT4H") in hours."""
+    if not value:
+        return None
+    match = _ISO_DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f"Not a duration: {value}")
+    days, hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return days * 24 + hours + minutes / 60 + seconds / 3600
+
+
+def _import_msp_xml(stream: IO[bytes], builder: _PlanBuilder):
+    resources: Dict[str, str] = {}
+    assignments: Dict[str, str] = {}
+    uid_to_id: Dict[str, str] = {}
+    # Links are resolved once every task is known, since they may point to
+    # summary tasks, which are not imported as tasks
+    links: Dict[str, List[str]] = {}
+    summary_links: Dict[str, List[str]] = {}
+    summaries: Dict[str, str] = {}
+    outlines: List[Tuple[str, str]] = []
+    current_phase = -1
+    path: List[ET.Element] = []
+    ns = ""
+
+    def text(elem: ET.Element, child: str) -> Optional[str]:
+        return elem.findtext(ns + child)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if not path and elem.tag.startswith("{"):
+                ns = elem.tag[:elem.tag.index("}") + 1]
+            path.append(elem)
+            continue
+        path.pop()
+        if not path:
+            break
+        parent = path[-1]
+        tag = elem.tag[len(ns):]
+        parent_tag = parent.tag[len(ns):]
+
+        if tag == "Name" and len(path) == 1 and elem.text:
+            builder.plan.name = elem.text.strip()
+        elif tag == "Task" and parent_tag == "Tasks":
+            uid = text(elem, "UID")
+            # UID 0 is the project summary task
+            if uid is not None and uid != "0":
+                task_id = text(elem, "ID") or uid
+                name = text(elem, "Name") or ""
+                outline = text(elem, "OutlineNumber")
+                uid_to_id[uid] = task_id
+                predecessors = [
+                    text(link, "PredecessorUID") for link in elem.iterfind(ns + "PredecessorLink")
+                ]
+                if text(elem, "Summary") == "1":
+                    current_phase = builder.phase(outline or task_id, name)
+                    if outline:
+                        summaries[uid] = outline
+                        if predecessors:
+                            summary_links[uid] = predecessors
+                else:
+                    duration = _iso_hours(text(elem, "Duration"))
+                    builder.add_task(
+                        uid,
+                        name=name,
+                        phase=current_phase,
+                        duration=duration / HOURS_PER_DAY if duration is not None else None,
+                        effort_hours=_iso_hours(text(elem, "Work")),
+                    )
+                    if predecessors:
+                        links[uid] = predecessors
+                    if outline:
+                        outlines.append((uid, outline))
+        elif tag == "Resource" and parent_tag == "Resources":
+            uid, name = text(elem, "UID"), text(elem, "Name")
+            if uid is not None and name:
+                resources[uid] = name
+        elif tag == "Assignment" and parent_tag == "Assignments":
+            task_uid, resource_uid = text(elem, "TaskUID"), text(elem, "ResourceUID")
+            # The first assignment of a task names its team
+            if task_uid is not None and resource_uid is not None:
+                assignments.setdefault(task_uid, resource_uid)
+        else:
+            continue
+        # Drop consumed records so the tree never holds more than one
+        parent.remove(elem)
+
+    # Tasks under each summary task with links, found by outline number prefix;
+    # they inherit the summary's predecessors
+    linked = {
+        dep for deps in (*links.values(), *summary_links.values()) for dep in deps if dep in summaries
+    }
+    members: Dict[str, List[str]] = {uid: [] for uid in linked}
+    by_outline = {summaries[uid]: uid for uid in linked.union(summary_links)}
+    if by_outline:
+        for uid, outline in outlines:
+            parts = outline.split(".")
+            for depth in range(1, len(parts)):
+                summary = by_outline.get(".".join(parts[:depth]))
+                if summary is None:
+                    continue
+                if summary in members:
+                    members[summary].append(uid)
+                if summary in summary_links:
+                    links.setdefault(uid, []).extend(summary_links[summary])
+    for uid, deps in links.items():
+        resolved: List[str] = []
+        for dep in deps:
+            if dep in members:
+                resolved.extend(member for member in members[dep] if member != uid)
+            else:
+                resolved.append(dep)
+        builder.add_dependencies(builder.row_of(uid), dict.fromkeys(resolved))
+
+    # Assignments refer to tasks and resources by UID and may come last
+    for task_uid, resource_uid in assignments.items():
+        if resource_uid in resources:
+            builder.assign(task_uid, resources[resource_uid])
+    # Tasks are keyed by UID while reading since links use UIDs; expose display ids
+    builder.plan.ids = [uid_to_id.get(uid, uid) for uid in builder.plan.ids]
+
+
+# --- YAML ---
+
+def _yaml_scalar(event: yaml.ScalarEvent) -> Any:
+    value = event.value
+    if event.style is not None:
+        return value
+    lowered = value.lower()
+    if lowered in ("", "~", "null"):
+        return None
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _import_yaml(stream: IO[bytes], builder: _PlanBuilder):
+    """
+    Build mappings and sequences from parser events, except that each mapping
+    in a "tasks" sequence is handed to the builder as soon as it is complete
+    instead of being attached to its parent.
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    # Stack of [container, pending key, key of the container in its parent]
+    stack: List[List[Any]] = []
+    phase_code = -1
+
+    def attach(value: Any):
+        if not stack:
+            return
+        top = stack[-1]
+        if isinstance(top[0], list):
+            top[0].append(value)
+        elif top[1] is None:
+            top[1] = value
+        else:
+            top[0][top[1]] = value
+            # Project name: top-level "name" or "project: {name: ...}"
+            if top[1] == "name" and (len(stack) == 1 or top[2] == "project") and value is not None:
+                builder.plan.name = str(value)
+            top[1] = None
+
+    for event in yaml.parse(stream, Loader=loader):
+        if isinstance(event, yaml.AliasEvent):
+            raise ValueError("YAML aliases are not supported in imported plans")
+        if isinstance(event, yaml.ScalarEvent):
+            attach(_yaml_scalar(event))
+        elif isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            parent_key = stack[-1][1] if stack and isinstance(stack[-1][0], dict) else None
+            if isinstance(event, yaml.SequenceStartEvent) and parent_key == "tasks":
+                # Tasks of a phase (a mapping in a list, e.g. "phases"): the
+                # enclosing mapping holds the phase fields read so far
+                enclosing = stack[-1][0]
+                if len(stack) >= 2 and isinstance(stack[-2][0], list) and ("id" in enclosing or "name" in enclosing):
+                    phase_code = builder.phase(enclosing.get("id", enclosing.get("name")), enclosing.get("name", ""))
+                else:
+                    phase_code = -1
+            stack.append([{} if isinstance(event, yaml.MappingStartEvent) else [], None, parent_key])
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            container, _, key = stack.pop()
+            if isinstance(event, yaml.MappingEndEvent) and stack and stack[-1][2] == "tasks":
+                builder.add_task(
+                    container.get("id"),
+                    name=container.get("name", ""),
+                    phase=phase_code,
+                    team=container.get("assigned_to"),
+                    duration=_quantity(container.get("duration"), "d"),
+                    effort_hours=_quantity(container.get("effort_hours"), "h"),
+                    dependencies=container.get("dependencies", container.get("depends_on")),
+                )
+                continue
+            # Imported tasks are not kept in the parsed document
+            attach([] if key == "tasks" else container)
+
+
+# --- Entry points ---
+
+def detect_format(filename: str) -> str:
+    """Import format from a file name."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".xml", ".mspdi"):
+        return "xml"
+    if extension in (".yaml", ".yml"):
+        return "yaml"
+    raise ValueError(f"Cannot tell the plan format of {filename}; use one of {', '.join(FORMATS)}")
+
+
+def import_plan(source: Union[str, IO[bytes]], fmt: Optional[str] = None) -> ImportedPlan:
+    """
+    Stream a plan file into an ImportedPlan.
+
+    Args:
+        source: Path or binary file object
+        fmt: "csv", "xml" or "yaml" (default: from the file extension)
+
+    Returns:
+        Imported plan with import statistics
+
+    Raises:
+        ValueError: On unknown formats or malformed content
+    """
+    if isinstance(source, str):
+        fmt = fmt or detect_format(source)
+        with open(source, "rb") as f:
+            return import_plan(f, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown plan format: {fmt}")
+
+    started = time.perf_counter()
+    reader = _CountingReader(source)
+    stream = io.BufferedReader(reader, buffer_size=1 << 20)
+    builder = _PlanBuilder(fmt)
+    try:
+        if fmt == "csv":
+            _import_csv(stream, builder)
+        elif fmt == "xml":
+            _import_msp_xml(stream, builder)
+        else:
+            _import_yaml(stream, builder)
+    except (ET.ParseError, yaml.YAMLError, csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed {fmt} plan: {e}")
+
+    plan = builder.finish(started, reader.count)
+    logger.info(f"Imported plan: {plan.stats.to_dict()}")
+    return plan
+
+
+def _summary(plan: ImportedPlan, report: Any, max_items: int) -> Dict[str, Any]:
+    return {
+        "project": plan.name,
+        "tasks": plan.task_count,
+        "phases": len(plan.phases),
+        "teams": plan.teams[:max_items],
+        "team_count": len(plan.teams),
+        "stats": plan.stats.to_dict(),
+        "graph": report.to_dict(max_items),
+    }
+
+
+def import_summary(path: str, fmt: Optional[str] = None, max_items: int = 20) -> Dict[str, Any]:
+    """
+    Import a plan file and validate its dependency graph.
+
+    Module-level so it can run in a ComputeService worker.
+
+    Args:
+        path: Plan file
+        fmt: "csv", "xml" or "yaml" (default: from the file extension)
+        max_items: Problems listed per kind in the validation report
+
+    Returns:
+        Project name, phase and team counts, import statistics and the
+        dependency graph report
+    """
+    plan = import_plan(path, fmt)
+    return _summary(plan, validate_wbs(plan.tasks()), max_items)
+
+
+def import_timeline(
+    path: str,
+    fmt: Optional[str] = None,
+    start_date: Optional[date] = None,
+    max_items: int = 20,
+) -> Tuple[Dict[str, Any], Optional[TimelineIndex]]:
+    """
+    Import a plan file and schedule it as a timeline.
+
+    Module-level so it can run in a ComputeService worker.
+
+    Args:
+        path: Plan file
+        fmt: "csv", "xml" or "yaml" (default: from the file extension)
+        start_date: Project start date
+        max_items: Problems listed per kind in the validation report
+
+    Returns:
+        Import summary (see ``import_summary``) and the scheduled timeline,
+        or None if the dependency graph is invalid
+    """
+    plan = import_plan(path, fmt)
+    report = validate_wbs(plan.tasks())
+    index = build_timeline(plan.to_wbs(), start_date) if report.valid else None
+    return _summary(plan, report, max_items), index
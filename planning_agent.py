@@ -9,14 +9,21 @@ This agent is responsible for:
 - Critical path analysis
 """
 
+import asyncio
 import logging
 import yaml
-from typing import Any, Dict, List
-from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date, datetime, timedelta
 
+import numpy as np
 from langchain.tools import Tool
 
+from . import analytics, timeline
 from .base_agent import BaseAgent
+from .scenarios import Scenario, compare_scenarios
+from .tool_executor import cpu_bound, io_bound
+from .velocity_forecaster import VelocityForecaster, format_forecast
+from .wbs_graph import validate_wbs
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +38,24 @@ class PlanningAgent(BaseAgent):
     - Dependency analysis
     """
     
+    # Plans of near-duplicate projects are reused as drafts
+    reuse_results = True
+    
+    # Planning is the first pipeline stage and works from the request alone
+    context_exclude_keys = BaseAgent.context_exclude_keys | {"upstream"}
+    
+    # Velocity forecasts change as sprints are recorded
+    impure_tools = frozenset({"forecast_velocity"})
+    
     def __init__(self, **kwargs):
         super().__init__(
             name="Planning",
             description="Generates project plans, WBS, and schedules using PM best practices",
             **kwargs
         )
+        
+        # Online per-team velocity model, persisted in the shared state store
+        self.velocity_forecaster = VelocityForecaster(state_store=self.state_store)
     
     def get_system_prompt(self) -> str:
         """System prompt for planning agent."""
@@ -92,10 +111,22 @@ Be realistic about timelines and include appropriate buffers.
                 func=self._allocate_resources,
                 description="Suggest resource allocation for tasks"
             ),
+            Tool(
+                name="forecast_velocity",
+                func=self._forecast_velocity,
+                description="Forecast team sprint velocity with prediction intervals. Input: JSON or YAML with \"teams\" (names), optional \"record\" (team -> velocity of a just-closed sprint), \"horizon\" (sprints) and \"backlog_points\""
+            ),
+            Tool(
+                name="validate_wbs",
+                func=self._validate_wbs,
+                description="Check a WBS (YAML or JSON) for dependency cycles, missing task references and redundant dependencies"
+            ),
         ]
         return tools
     
-    def _generate_wbs(self, project_description: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _generate_wbs(project_description: str) -> str:
         """
         Generate Work Breakdown Structure.
         
@@ -226,7 +257,46 @@ Be realistic about timelines and include appropriate buffers.
         
         return yaml.dump(wbs, default_flow_style=False, sort_keys=False)
     
-    def _estimate_effort(self, task_info: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _validate_wbs(wbs_text: str) -> str:
+        """
+        Validate the dependency graph of a WBS.
+        
+        Args:
+            wbs_text: WBS as YAML or JSON
+            
+        Returns:
+            Validation summary
+        """
+        try:
+            wbs = yaml.safe_load(wbs_text)
+        except yaml.YAMLError as e:
+            return f"WBS could not be parsed: {e}"
+        if not isinstance(wbs, (dict, list)):
+            return "WBS could not be parsed: expected a mapping or a task list"
+        
+        report = validate_wbs(wbs, reduce=True)
+        summary = report.to_dict(max_items=10)
+        lines = [
+            f"WBS validation: {'valid' if report.valid else 'INVALID'} "
+            f"({report.task_count} tasks, {report.edge_count} dependencies)"
+        ]
+        for task_id in summary["duplicate_ids"]:
+            lines.append(f"- Duplicate task id: {task_id}")
+        for task_id, dep in summary["dangling"]:
+            lines.append(f"- Task {task_id} depends on missing task {dep}")
+        for cycle in summary["cycles"]:
+            lines.append(f"- Dependency cycle: {' -> '.join(cycle)}")
+        for task_id, dep in summary["redundant_edges"]:
+            lines.append(f"- Redundant dependency {task_id} -> {dep} (implied by other dependencies)")
+        if report.valid and not report.reduced:
+            lines.append("- Redundant dependencies not checked (graph too large)")
+        return "\n".join(lines)
+    
+    @staticmethod
+    @cpu_bound
+    def _estimate_effort(task_info: str) -> str:
         """
         Estimate effort for a task.
         
@@ -254,7 +324,54 @@ Factors considered:
 
 Recommendation: Allocate 3 sprints with 1 developer"""
     
-    def _calculate_critical_path(self, dependencies: str) -> str:
+    @io_bound
+    def _forecast_velocity(self, request: str) -> str:
+        """
+        Record closed sprints and forecast team velocity.
+        
+        Args:
+            request: YAML/JSON with "teams", optional "record", "horizon"
+                and "backlog_points"; a plain team name also works
+            
+        Returns:
+            Per-team velocity forecasts with prediction intervals
+        """
+        try:
+            spec = yaml.safe_load(request)
+        except yaml.YAMLError as e:
+            return f"Request could not be parsed: {e}"
+        if not isinstance(spec, dict):
+            spec = {"teams": [str(request).strip()]}
+        
+        record = spec.get("record") or {}
+        try:
+            if record:
+                self.velocity_forecaster.observe_batch(
+                    [str(team) for team in record], [float(v) for v in record.values()]
+                )
+            teams = spec.get("teams") or list(record)
+            # A single team may be given by name
+            teams = [str(teams)] if isinstance(teams, (str, int, float)) else [str(team) for team in teams]
+            horizon = int(spec.get("horizon", 3))
+            backlog = float(spec["backlog_points"]) if spec.get("backlog_points") else None
+        except (TypeError, ValueError) as e:
+            return f"Invalid velocity request: {e}"
+        
+        forecasts = [self.velocity_forecaster.forecast(team, horizon) for team in teams]
+        lines = [format_forecast(forecasts)]
+        if backlog is not None:
+            for team in teams:
+                counts = self.velocity_forecaster.sprints_to_complete(team, backlog)
+                if counts:
+                    lines.append(
+                        f"{team}: {backlog:g} points in ~{counts['expected']} sprints "
+                        f"(range {counts['optimistic']}-{counts['pessimistic']})"
+                    )
+        return "\n".join(lines)
+    
+    @staticmethod
+    @cpu_bound
+    def _calculate_critical_path(dependencies: str) -> str:
         """
         Calculate critical path.
         
@@ -275,7 +392,9 @@ Recommendations:
 3. Monitor critical path closely
 4. Fast-track where possible"""
     
-    def _allocate_resources(self, task_list: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _allocate_resources(task_list: str) -> str:
         """
         Suggest resource allocation.
         
@@ -388,3 +507,155 @@ Format as professional markdown document."""
             raci_matrix["tasks"].append(task_raci)
         
         return raci_matrix
+    
+    async def analyze_schedule(
+        self,
+        tasks: List[Dict[str, Any]],
+        capacity: Optional[Dict[str, float]] = None,
+        iterations: int = 10000,
+        seed: Optional[int] = None,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Critical path, resource leveling and Monte Carlo schedule risk.
+        
+        The analyses run concurrently on the compute service's worker
+        processes; duration estimates are shared with the workers through
+        shared memory.
+        
+        Args:
+            tasks: Task dicts with "id", "duration" (days), optional
+                "optimistic"/"pessimistic" durations, "depends_on" (task ids)
+                and "resources" (units per day by resource name)
+            capacity: Units available per day by resource name; enables leveling
+            iterations: Monte Carlo iterations
+            seed: Random seed for reproducible simulations
+            progress: Called with the completed fraction of the simulation
+            
+        Returns:
+            Schedule analysis keyed by task id
+        """
+        logger.info(f"Analyzing schedule of {len(tasks)} tasks")
+        
+        # Validation and network construction also run off the event loop
+        resources = sorted(capacity or {})
+        inputs = await self.compute_service.run(analytics.schedule_inputs, tasks, resources)
+        ids = inputs["ids"]
+        
+        service = self.compute_service
+        shared = [
+            service.share(inputs[key])
+            for key in ("optimistic", "most_likely", "pessimistic", "pred_ptr", "pred_idx")
+        ]
+        o, m, p, ptr, idx = shared
+        try:
+            jobs = [
+                service.run(analytics.critical_path, m, ptr, idx),
+                service.run(
+                    analytics.monte_carlo_schedule, o, m, p, ptr, idx,
+                    iterations=iterations, seed=seed, progress=progress
+                ),
+            ]
+            if resources:
+                limits = np.array([float(capacity[r]) for r in resources])
+                jobs.append(service.run(analytics.level_resources, m, inputs["demands"], limits, ptr, idx))
+            
+            results = await asyncio.gather(*jobs)
+        finally:
+            service.release(*shared)
+        
+        cpm, simulation = results[0], results[1]
+        analysis = {
+            "duration": cpm["duration"],
+            "critical_path": [ids[i] for i in cpm["critical"]],
+            "tasks": {
+                task_id: {
+                    "early_start": float(cpm["early_start"][i]),
+                    "early_finish": float(cpm["early_finish"][i]),
+                    "late_start": float(cpm["late_start"][i]),
+                    "late_finish": float(cpm["late_finish"][i]),
+                    "slack": float(cpm["slack"][i]),
+                    "criticality": float(simulation["criticality"][i]),
+                }
+                for i, task_id in enumerate(ids)
+            },
+            "monte_carlo": {
+                "iterations": simulation["iterations"],
+                "mean": simulation["mean"],
+                "std": simulation["std"],
+                **simulation["percentiles"],
+            },
+        }
+        
+        if len(results) > 2:
+            leveled = results[2]
+            analysis["leveled"] = {
+                "duration": leveled["duration"],
+                "peak_usage": dict(zip(resources, leveled["peak_usage"].tolist())),
+                "start": dict(zip(ids, leveled["start"].tolist())),
+            }
+        
+        return analysis
+    
+    async def build_timeline(
+        self,
+        wbs: Any,
+        start_date: Optional[date] = None
+    ) -> "timeline.TimelineIndex":
+        """
+        Schedule a WBS and index it for timeline queries.
+        
+        Scheduling runs on the compute service, so large programs do not
+        block the event loop.
+        
+        Args:
+            wbs: WBS as generated by generate_wbs (mapping, task list or YAML text)
+            start_date: Project start date
+            
+        Returns:
+            TimelineIndex for timeline.timeline_bars
+        """
+        if isinstance(wbs, str):
+            try:
+                wbs = yaml.safe_load(wbs)
+            except yaml.YAMLError as e:
+                raise ValueError(f"WBS could not be parsed: {e}")
+        if not isinstance(wbs, (dict, list)):
+            raise ValueError("WBS must be a mapping or a task list")
+        return await self.compute_service.run(timeline.build_timeline, wbs, start_date)
+    
+    async def compare_scenarios(
+        self,
+        wbs: Any,
+        scenarios: List[Dict[str, Any]],
+        teams: Optional[Dict[str, float]] = None,
+        rates: Optional[Dict[str, float]] = None,
+        start_date: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare what-if variants of a plan side by side.
+        
+        Args:
+            wbs: Base WBS as generated by generate_wbs (mapping or YAML text)
+            scenarios: Dicts with "name" and "patches" (see agents.scenarios)
+            teams: Base headcount per team
+            rates: Base hourly rate per team
+            start_date: Project start date
+            
+        Returns:
+            Finish date, cost and critical path of the base plan and each scenario
+        """
+        if isinstance(wbs, str):
+            try:
+                wbs = yaml.safe_load(wbs)
+            except yaml.YAMLError as e:
+                raise ValueError(f"WBS could not be parsed: {e}")
+        return await compare_scenarios(
+            self.compute_service,
+            wbs,
+            [Scenario(name=str(s.get("name", f"scenario {i + 1}")), patches=s.get("patches") or [])
+             for i, s in enumerate(scenarios)],
+            teams=teams,
+            rates=rates,
+            start_date=start_date
+        )
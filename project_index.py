@@ -0,0 +1,320 @@
+"""
+Similar-Project Retrieval Index for AutoPMO
+
+Many projects are near-duplicates of earlier ones (cloud migrations,
+OpenShift moves). ``ProjectIndex`` stores past project descriptions with the
+plan or risk register generated for them so agents can reuse a close match
+instead of regenerating it through the LLM.
+
+Descriptions are embedded locally as hashed word and character-trigram
+vectors (no model server round trip) and compared by cosine similarity:
+
+- up to ``ivf_threshold`` entries: exact brute-force search (one mat-vec)
+- beyond that: an inverted-file (IVF) index; entries are clustered by
+  k-means and a query scans only the ``n_probe`` closest clusters
+
+Clusters are rebuilt on a background thread whenever the index doubles;
+until the new clusters are ready, entries are assigned to the old ones.
+Searches and adds block on numpy and file I/O, so async callers run them
+with ``asyncio.to_thread``.
+
+An index directory holds an append-only ``entries.jsonl`` (text and payload
+per entry) and an ``index.npz`` snapshot of the vectors and clusters, so a
+restart only embeds entries added since the last snapshot.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+ENTRIES_FILE = "entries.jsonl"
+SNAPSHOT_FILE = "index.npz"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def embed(text: str, dim: int = 1024) -> np.ndarray:
+    """
+    Hashed bag-of-features embedding of a text, L2-normalized.
+
+    Features are lowercase words and character trigrams of each word;
+    crc32 hashing keeps vectors stable across processes and restarts.
+
+    Args:
+        text: Text to embed
+        dim: Vector dimension
+
+    Returns:
+        float32 vector of length ``dim``
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _WORD.findall(text.lower()):
+        vector[zlib.crc32(word.encode()) % dim] += 2.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % dim] += 1.0
+    # Dampen repeated features so long texts are not dominated by common words
+    np.sqrt(vector, out=vector)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means; returns (centroids, assignment per vector)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = (vectors @ centroids.T).argmax(axis=1)
+        for c in range(k):
+            members = vectors[assignments == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids, (vectors @ centroids.T).argmax(axis=1)
+
+
+class ProjectIndex:
+    """
+    Vector index of past projects and their generated artifacts.
+
+    Attributes:
+        path: Index directory, or None for an in-memory index
+        dim: Embedding dimension
+        ivf_threshold: Entry count above which search becomes approximate
+        n_probe: Clusters scanned per approximate search
+        snapshot_every: Entries added between automatic snapshots
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dim: int = 1024,
+        ivf_threshold: int = 5000,
+        n_probe: int = 8,
+        snapshot_every: int = 500,
+    ):
+        self.path = path
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.snapshot_every = snapshot_every
+
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._entries: List[Dict[str, Any]] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._ivf_size = 0
+        self._snapshot_size = 0
+        self._rebuilding = False
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    # --- Persistence ---
+
+    def _load(self):
+        entries_path = os.path.join(self.path, ENTRIES_FILE)
+        if not os.path.exists(entries_path):
+            return
+        with open(entries_path, "rb") as f:
+            entries = [loads(line) for line in f if line.strip()]
+
+        vectors = np.zeros((0, self.dim), dtype=np.float32)
+        snapshot_path = os.path.join(self.path, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with np.load(snapshot_path) as snapshot:
+                if snapshot["vectors"].shape[1] == self.dim and len(snapshot["vectors"]) <= len(entries):
+                    vectors = snapshot["vectors"]
+                    if snapshot["centroids"].size:
+                        self._centroids = snapshot["centroids"]
+                        self._assignments = snapshot["assignments"]
+                        self._ivf_size = len(self._assignments)
+        self._snapshot_size = len(vectors)
+
+        # Entries appended after the snapshot are embedded again
+        missing = [embed(e["text"], self.dim) for e in entries[len(vectors):]]
+        if missing:
+            vectors = np.vstack([vectors, np.stack(missing)])
+        self._entries = entries
+        self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._size = len(entries)
+        assignments = np.zeros(len(self._vectors), dtype=np.int32)
+        assignments[:self._ivf_size] = self._assignments
+        self._assignments = assignments
+        if self._centroids is not None and self._ivf_size < self._size:
+            tail = self._vectors[self._ivf_size:self._size]
+            self._assignments[self._ivf_size:self._size] = (tail @ self._centroids.T).argmax(axis=1)
+        logger.info(f"Loaded project index {self.path}: {self._size} entries")
+
+    def save(self):
+        """Write a snapshot of the vectors and clusters."""
+        if not self.path:
+            return
+        with self._save_lock:
+            # Rows below _size are never rewritten in place (growth and
+            # rebuilds swap in new arrays), so the views can be written
+            # without holding the index lock
+            with self._lock:
+                size = self._size
+                vectors = self._vectors[:size]
+                centroids = self._centroids
+                assignments = self._assignments[:size]
+            tmp = os.path.join(self.path, SNAPSHOT_FILE + ".tmp.npz")
+            np.savez(
+                tmp,
+                vectors=vectors,
+                centroids=centroids if centroids is not None else np.zeros((0, self.dim), np.float32),
+                assignments=assignments,
+            )
+            os.replace(tmp, os.path.join(self.path, SNAPSHOT_FILE))
+            with self._lock:
+                self._snapshot_size = max(self._snapshot_size, size)
+
+    # --- Indexing ---
+
+    def add(self, text: str, payload: Dict[str, Any]) -> int:
+        """
+        Add a project description with its generated artifacts.
+
+        Args:
+            text: Project description (the retrieval key)
+            payload: JSON-serializable data returned on a match
+
+        Returns:
+            Entry id
+        """
+        vector = embed(text, self.dim)
+        entry = {"text": text, "payload": payload}
+        with self._lock:
+            if self.path:
+                with open(os.path.join(self.path, ENTRIES_FILE), "ab") as f:
+                    f.write(dumps(entry) + b"\n")
+
+            if self._size == len(self._vectors):
+                capacity = max(64, 2 * self._size)
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:self._size] = self._vectors[:self._size]
+                self._vectors = grown
+                assignments = np.zeros(capacity, dtype=np.int32)
+                assignments[:self._size] = self._assignments[:self._size]
+                self._assignments = assignments
+            self._vectors[self._size] = vector
+            self._entries.append(entry)
+            entry_id = self._size
+            self._size += 1
+
+            if self._centroids is not None:
+                self._assignments[entry_id] = (self._centroids @ vector).argmax()
+            self._maybe_rebuild_ivf()
+            snapshot_due = self.path and self._size - self._snapshot_size >= self.snapshot_every
+
+        if snapshot_due:
+            self.save()
+        return entry_id
+
+    def _maybe_rebuild_ivf(self):
+        # Clusters are rebuilt whenever the index doubles past the threshold
+        if self._rebuilding or self._size < self.ivf_threshold or self._size < 2 * self._ivf_size:
+            return
+        self._rebuilding = True
+        threading.Thread(
+            target=self._rebuild_ivf, args=(self._size,), name="project-index-ivf", daemon=True
+        ).start()
+
+    def _rebuild_ivf(self, size: int):
+        try:
+            # k-means runs unlocked over rows that are no longer written
+            with self._lock:
+                vectors = self._vectors[:size]
+            k = max(1, int(math.sqrt(size)))
+            centroids, assignments = _kmeans(vectors, k)
+
+            with self._lock:
+                # Entries added during the rebuild join the new clusters
+                assignments_all = np.zeros(len(self._vectors), dtype=np.int32)
+                assignments_all[:size] = assignments
+                tail = self._vectors[size:self._size]
+                if len(tail):
+                    assignments_all[size:self._size] = (tail @ centroids.T).argmax(axis=1)
+                self._centroids = centroids
+                self._assignments = assignments_all
+                self._ivf_size = size
+                self._rebuilding = False
+                # The index may have doubled again while clustering
+                self._maybe_rebuild_ivf()
+            logger.info(f"Rebuilt project index clusters: {size} entries, {k} lists")
+        except Exception as e:
+            logger.error(f"Project index cluster rebuild failed: {e}", exc_info=True)
+            with self._lock:
+                self._rebuilding = False
+
+    # --- Search ---
+
+    def search(self, text: str, k: int = 1, min_score: float = 0.0) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Most similar past projects.
+
+        Args:
+            text: Query description
+            k: Maximum number of matches
+            min_score: Minimum cosine similarity (0-1)
+
+        Returns:
+            (similarity, payload) pairs, best first
+        """
+        query = embed(text, self.dim)
+        with self._lock:
+            if not self._size:
+                return []
+            vectors = self._vectors[:self._size]
+            if self._centroids is not None and self._size >= self.ivf_threshold:
+                probe = np.argsort(self._centroids @ query)[-self.n_probe:]
+                candidates = np.flatnonzero(np.isin(self._assignments[:self._size], probe))
+                scores = vectors[candidates] @ query
+            else:
+                candidates = np.arange(self._size)
+                scores = vectors @ query
+
+            top = np.argsort(scores)[::-1][:k]
+            return [
+                (float(scores[i]), self._entries[candidates[i]]["payload"])
+                for i in top if scores[i] >= min_score
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "entries": self._size,
+            "mode": "ivf" if self._centroids is not None and self._size >= self.ivf_threshold else "exact",
+            "lists": 0 if self._centroids is None else len(self._centroids),
+        }
+
+
+_indexes: Dict[str, ProjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_index(path: str, **kwargs: Any) -> ProjectIndex:
+    """Process-wide index per directory, shared by all agent instances."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = ProjectIndex(path, **kwargs)
+        return index
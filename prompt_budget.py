@@ -0,0 +1,289 @@
+"""
+Prompt Budgeting for AutoPMO
+
+Assembles agent and synthesis prompts from named sections, each with a token
+budget. Structured context is serialized as compact JSON, and sections that
+exceed their budget are summarized (extractively) or trimmed. Every assembly
+reports how many prompt tokens were saved versus the naive prompt.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import PROMPT_TOKENS, PROMPT_TOKENS_SAVED, agent_label
+
+logger = logging.getLogger(__name__)
+
+# Words, punctuation, and line breaks with their indentation
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\n[ \t]*")
+
+# Lines containing these words are kept first when summarizing agent output
+SUMMARY_KEYWORDS = (
+    "risk", "critical", "recommend", "mitigation", "total", "duration",
+    "cost", "budget", "deadline", "security", "blocker", "next step", "priority",
+)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the token count of text.
+
+    Counts words, punctuation and indented line breaks, which tracks BPE
+    tokenizers closely enough for budgeting without loading a tokenizer.
+    """
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _prune(value: Any, drop_keys: Iterable[str]) -> Any:
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            if key in drop_keys or (isinstance(key, str) and key.startswith("_")):
+                continue
+            item = _prune(item, drop_keys)
+            if item is None or item == {} or item == [] or item == "":
+                continue
+            pruned[key] = item
+        return pruned
+    if isinstance(value, (list, tuple)):
+        return [_prune(item, drop_keys) for item in value if item is not None]
+    return value
+
+
+def compact_json(data: Any, drop_keys: Iterable[str] = ()) -> str:
+    """
+    Serialize data as compact JSON for a prompt.
+
+    Drops null/empty values, private (underscore) keys and ``drop_keys``,
+    and uses no indentation or extra separators.
+
+    Args:
+        data: JSON-serializable data
+        drop_keys: Keys to remove at any depth
+
+    Returns:
+        Compact JSON string
+    """
+    drop = set(drop_keys)
+    return json.dumps(_prune(data, drop), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def truncate_to_budget(text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+    """
+    Trim text to a token budget, keeping the head and the tail.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget
+        head_ratio: Share of the budget given to the beginning of the text
+
+    Returns:
+        Text within budget with an omission marker in the middle
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    # Token density is roughly uniform, so cut by character share and shrink until it fits
+    keep = max_tokens
+    while keep > 0:
+        chars_per_token = len(text) / total
+        head_chars = int(keep * head_ratio * chars_per_token)
+        tail_chars = int(keep * (1 - head_ratio) * chars_per_token)
+        omitted = total - keep
+        trimmed = (
+            text[:head_chars].rstrip()
+            + f"\n[... ~{omitted} tokens omitted ...]\n"
+            + (text[-tail_chars:].lstrip() if tail_chars else "")
+        )
+        if count_tokens(trimmed) <= max_tokens:
+            return trimmed
+        keep = int(keep * 0.9)
+
+    return ""
+
+
+def extractive_summary(text: str, max_tokens: int) -> str:
+    """
+    Summarize text to a token budget by keeping its most informative lines.
+
+    Headings and lines mentioning risk, cost, schedule or recommendations are
+    kept first, then the remaining lines in document order. The original line
+    order is preserved in the output.
+
+    Args:
+        text: Text to summarize
+        max_tokens: Token budget
+
+    Returns:
+        Summary within budget
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = [line for line in text.splitlines() if line.strip()]
+
+    def priority(line: str) -> int:
+        lowered = line.lower()
+        if line.lstrip().startswith("#") or line.rstrip().endswith(":"):
+            return 0
+        if any(keyword in lowered for keyword in SUMMARY_KEYWORDS):
+            return 1
+        return 2
+
+    ranked = sorted(range(len(lines)), key=lambda i: (priority(lines[i]), i))
+
+    selected = set()
+    used = count_tokens("[summary]")
+    for index in ranked:
+        cost = count_tokens(lines[index]) + 1
+        if used + cost > max_tokens:
+            continue
+        selected.add(index)
+        used += cost
+
+    if not selected:
+        return truncate_to_budget(text, max_tokens)
+
+    return "[summary]\n" + "\n".join(lines[i] for i in sorted(selected))
+
+
+@dataclass
+class PromptSection:
+    """One named part of a prompt with its budget."""
+    name: str
+    text: str
+    original_tokens: int
+    budget: Optional[int] = None
+    strategy: str = "truncate"
+    final_tokens: int = 0
+
+
+@dataclass
+class PromptReport:
+    """Token accounting for an assembled prompt."""
+    original_tokens: int = 0
+    final_tokens: int = 0
+    sections: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.final_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "original_tokens": self.original_tokens,
+            "final_tokens": self.final_tokens,
+            "saved_tokens": self.saved_tokens,
+            "sections": self.sections,
+        }
+
+
+class PromptAssembler:
+    """
+    Builds a prompt from budgeted sections.
+
+    Example:
+        assembler = PromptAssembler("planning")
+        assembler.add_json("context", context, budget=1000)
+        assembler.add("task", task)
+        text, report = assembler.build("Context:\\n{context}\\n\\nTask:\\n{task}")
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self.sections: List[PromptSection] = []
+
+    def add(
+        self,
+        name: str,
+        text: str,
+        budget: Optional[int] = None,
+        strategy: str = "truncate",
+        original: Optional[str] = None,
+    ) -> "PromptAssembler":
+        """
+        Add a text section.
+
+        Args:
+            name: Section name (used as a template field in build())
+            text: Section content
+            budget: Token budget; None means unbounded
+            strategy: "truncate" or "summarize" when over budget
+            original: What the naive prompt would have contained, for savings
+        """
+        self.sections.append(PromptSection(
+            name=name,
+            text=text,
+            original_tokens=count_tokens(original if original is not None else text),
+            budget=budget,
+            strategy=strategy,
+        ))
+        return self
+
+    def add_json(
+        self,
+        name: str,
+        data: Any,
+        budget: Optional[int] = None,
+        drop_keys: Iterable[str] = (),
+    ) -> "PromptAssembler":
+        """Add structured data serialized with compact_json()."""
+        naive = json.dumps(data, indent=2, default=str)
+        return self.add(name, compact_json(data, drop_keys), budget, "truncate", original=naive)
+
+    def render_sections(self) -> Dict[str, str]:
+        """Apply budgets and return the final text of each section."""
+        rendered = {}
+        for section in self.sections:
+            text = section.text
+            if section.budget is not None and count_tokens(text) > section.budget:
+                if section.strategy == "summarize":
+                    text = extractive_summary(text, section.budget)
+                else:
+                    text = truncate_to_budget(text, section.budget)
+            section.final_tokens = count_tokens(text)
+            rendered[section.name] = text
+        return rendered
+
+    def report(self) -> PromptReport:
+        """Token accounting for the sections rendered so far."""
+        report = PromptReport()
+        for section in self.sections:
+            report.original_tokens += section.original_tokens
+            report.final_tokens += section.final_tokens
+            report.sections[section.name] = {
+                "original_tokens": section.original_tokens,
+                "final_tokens": section.final_tokens,
+            }
+        return report
+
+    def build(self, template: str) -> Tuple[str, PromptReport]:
+        """
+        Render all sections into a template and record savings metrics.
+
+        Args:
+            template: str.format template with one field per section name
+
+        Returns:
+            Tuple of (prompt text, report)
+        """
+        prompt = template.format(**self.render_sections())
+        report = self.record()
+        return prompt, report
+
+    def record(self) -> PromptReport:
+        """Compute the report and export it as metrics."""
+        report = self.report()
+        component = agent_label(self.component)
+        PROMPT_TOKENS.labels(component=component).inc(report.final_tokens)
+        PROMPT_TOKENS_SAVED.labels(component=component).inc(report.saved_tokens)
+        if report.saved_tokens:
+            logger.debug(
+                f"{self.component} prompt: {report.final_tokens} tokens "
+                f"({report.saved_tokens} saved)"
+            )
+        return report
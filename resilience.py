@@ -0,0 +1,340 @@
+"""
+Circuit Breakers and Retries for LLM Calls
+
+When a model server is degraded, calls should fail in milliseconds instead
+of each waiting out the client timeout:
+
+- ``CircuitBreaker`` (one per endpoint): after ``failure_threshold``
+  consecutive endpoint failures the circuit opens and calls fail immediately
+  with ``CircuitOpenError``. After ``reset_timeout`` seconds a limited number
+  of trial calls are let through (half-open); a success closes the circuit,
+  a failure opens it again for twice as long (up to ``max_reset_timeout``).
+- ``RetryPolicy``: bounded retries of endpoint failures with full-jitter
+  exponential backoff, so synchronized clients do not retry in waves.
+- ``RetryBudget``: retries are capped at a fraction of recent calls (plus a
+  small floor), so an outage does not multiply load on the model servers.
+
+Only endpoint failures (connection errors, timeouts, 5xx; see
+``is_endpoint_failure``) trip breakers and are retried. Breaker state, state
+changes, fast-failed calls and retry outcomes are exported as metrics.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from .llm_balancer import is_endpoint_failure
+from .metrics import (
+    LLM_CIRCUIT_REJECTED,
+    LLM_CIRCUIT_STATE,
+    LLM_CIRCUIT_TRANSITIONS,
+    LLM_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"LLM endpoint {endpoint} unavailable (circuit open), retry later")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one endpoint.
+
+    Attributes:
+        endpoint: Endpoint label
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial call
+        max_reset_timeout: Upper bound on the open period after repeated
+            failed trials
+        half_open_calls: Trial calls allowed at once while half-open
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_reset_timeout: float = 120.0,
+        half_open_calls: int = 1,
+    ):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.open_seconds = 0.0
+        self.trials = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        LLM_CIRCUIT_STATE.labels(endpoint=endpoint).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"Circuit for LLM endpoint {self.endpoint}: {self.state} -> {state}")
+        self.state = state
+        LLM_CIRCUIT_STATE.labels(endpoint=self.endpoint).set(_STATE_VALUES[state])
+        LLM_CIRCUIT_TRANSITIONS.labels(endpoint=self.endpoint, state=state).inc()
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a trial call through."""
+        return max(0.0, self.opened_until - time.monotonic())
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through."""
+        with self._lock:
+            if self.state == OPEN:
+                return self.opened_until <= time.monotonic()
+            return self.state == CLOSED or self.trials < self.half_open_calls
+
+    def before_call(self):
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all
+                trial calls in flight
+        """
+        with self._lock:
+            if self.state == OPEN and self.opened_until <= time.monotonic():
+                self._transition(HALF_OPEN)
+                self.trials = 0
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self.trials < self.half_open_calls:
+                self.trials += 1
+                return
+            self.rejected += 1
+        LLM_CIRCUIT_REJECTED.labels(endpoint=self.endpoint).inc()
+        raise CircuitOpenError(self.endpoint, self.retry_after() or self.reset_timeout)
+
+    def on_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.open_seconds = 0.0
+                self._transition(CLOSED)
+
+    def on_failure(self, error: BaseException):
+        """Record a failed call; only endpoint failures count."""
+        if not is_endpoint_failure(error):
+            # The endpoint answered (e.g. 400), so it is healthy
+            self.on_success()
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open(min(self.max_reset_timeout, 2 * (self.open_seconds or self.reset_timeout)))
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open(self.reset_timeout)
+
+    def on_cancel(self):
+        """Record a cancelled call; a cancelled trial says nothing about the endpoint."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.trials = max(0, self.trials - 1)
+
+    def _open(self, seconds: float):
+        self.open_seconds = seconds
+        self.opened_until = time.monotonic() + seconds
+        self._transition(OPEN)
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Run ``func`` through the breaker."""
+        self.before_call()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self.on_cancel()
+            raise
+        except Exception as e:
+            self.on_failure(e)
+            raise
+        self.on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 3) if self.state == OPEN else 0.0,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent calls.
+
+    Attributes:
+        ratio: Retries allowed per call over the window
+        min_retries_per_second: Retries always allowed, so low traffic can
+            still retry
+        window: Sliding window in seconds
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window = window
+        self._calls: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        for events in (self._calls, self._retries):
+            while events and events[0] <= now - self.window:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget if available."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = self.min_retries_per_second * self.window + self.ratio * len(self._calls)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+class RetryPolicy:
+    """
+    Bounded retries with full-jitter exponential backoff.
+
+    Attributes:
+        max_attempts: Attempts per call, including the first
+        base_delay: Backoff cap of the first retry in seconds
+        max_delay: Upper bound of the backoff cap
+        budget: Shared retry budget
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, retry: int) -> float:
+        """Delay before the given retry (1-based): uniform in [0, cap]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``func``, retrying endpoint failures within the budget.
+
+        CircuitOpenError and client errors (4xx) are not retried.
+        """
+        self.budget.record_call()
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not is_endpoint_failure(e):
+                    raise
+                if attempt >= self.max_attempts:
+                    LLM_RETRIES.labels(outcome="exhausted").inc()
+                    raise
+                if not self.budget.try_acquire():
+                    LLM_RETRIES.labels(outcome="budget_exceeded").inc()
+                    raise
+                delay = self.backoff(attempt)
+                LLM_RETRIES.labels(outcome="retried").inc()
+                logger.warning(f"LLM call failed ({e}); retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+def policy_from_env() -> Dict[str, Any]:
+    """
+    Breaker and retry settings from the environment.
+
+    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS, LLM_MAX_ATTEMPTS and
+    LLM_RETRY_BUDGET_RATIO.
+    """
+    return {
+        "failure_threshold": int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        "reset_timeout": float(os.getenv("LLM_BREAKER_RESET_SECONDS", "10")),
+        "max_attempts": int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+        "budget_ratio": float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2")),
+    }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Process-wide breaker per endpoint, shared by every agent's client."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            settings = policy_from_env()
+            breaker = _breakers[endpoint] = CircuitBreaker(
+                endpoint,
+                failure_threshold=settings["failure_threshold"],
+                reset_timeout=settings["reset_timeout"],
+            )
+        return breaker
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Process-wide retry policy; its budget is shared by every LLM call."""
+    global _retry_policy
+    with _breakers_lock:
+        if _retry_policy is None:
+            settings = policy_from_env()
+            _retry_policy = RetryPolicy(
+                max_attempts=settings["max_attempts"],
+                budget=RetryBudget(ratio=settings["budget_ratio"]),
+            )
+        return _retry_policy
+
+
+def breaker_stats() -> List[Dict[str, Any]]:
+    """State of every circuit breaker."""
+    with _breakers_lock:
+        return [breaker.stats() for breaker in _breakers.values()]
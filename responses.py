@@ -0,0 +1,26 @@
+"""
+JSON Responses for the AutoPMO APIs
+
+Both the full API (main.py) and the MVP API (api/main.py) answer with
+``FastJSONResponse``, so they encode NaN, NumPy values, dates and models the
+same way whether or not orjson is installed (see ``serialization``).
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from .serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with agents.serialization.dumps (orjson when available).
+    
+    The default response class. Endpoints that return trusted, already-shaped
+    data return it directly, which skips FastAPI's ``jsonable_encoder`` pass
+    and response-model re-validation.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -5,12 +5,15 @@ This agent identifies, assesses, and prioritizes project risks using ML models.
 """
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 import json
 
+import numpy as np
 from langchain.tools import Tool
 
+from . import analytics
 from .base_agent import BaseAgent
+from .tool_executor import cpu_bound
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,9 @@ class RiskAgent(BaseAgent):
     Uses ML models to predict risk probability and impact.
     """
     
+    # Risk assessments of near-duplicate projects are reused as drafts
+    reuse_results = True
+    
     def __init__(self, **kwargs):
         super().__init__(
             name="Risk",
@@ -96,7 +102,9 @@ Focus on actionable mitigations.
         ]
         return tools
     
-    def _predict_risk(self, project_json: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _predict_risk(project_json: str) -> str:
         """
         Predict risk using ML model.
         
@@ -133,13 +141,15 @@ Focus on actionable mitigations.
                     "team_experience": experience_factor
                 },
                 "recommendation": "High risk - recommend experienced tech lead"
-            }, indent=2)
+            }, separators=(",", ":"))
             
         except Exception as e:
             logger.error(f"Risk prediction failed: {e}")
             return json.dumps({"error": str(e)})
     
-    def _calculate_risk_score(self, risk_params: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _calculate_risk_score(risk_params: str) -> str:
         """
         Calculate risk score.
         
@@ -167,7 +177,9 @@ Focus on actionable mitigations.
         except Exception as e:
             return f"Error calculating score: {e}"
     
-    def _generate_risk_register(self, project_description: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _generate_risk_register(project_description: str) -> str:
         """
         Generate risk register.
         
@@ -223,9 +235,11 @@ Focus on actionable mitigations.
             }
         ]
         
-        return json.dumps({"risks": risks}, indent=2)
+        return json.dumps({"risks": risks}, separators=(",", ":"))
     
-    def _suggest_mitigation(self, risk_description: str) -> str:
+    @staticmethod
+    @cpu_bound
+    def _suggest_mitigation(risk_description: str) -> str:
         """
         Suggest mitigation strategies.
         
@@ -282,12 +296,13 @@ Focus on actionable mitigations.
         """
         logger.info("Performing project risk assessment")
         
-        # Get ML prediction
-        prediction = self._predict_risk(json.dumps(project_data))
+        # Get ML prediction (off the event loop, like the agent's tool calls)
+        offload = self.tool_executor.offload
+        prediction = await offload(self._predict_risk)(json.dumps(project_data))
         prediction_data = json.loads(prediction)
         
         # Generate risk register
-        risk_register = self._generate_risk_register(
+        risk_register = await offload(self._generate_risk_register)(
             project_data.get("description", "")
         )
         
@@ -317,3 +332,45 @@ Focus on actionable mitigations.
                 "Update risk register weekly"
             ]
         }
+    
+    async def simulate_risk_exposure(
+        self,
+        risks: List[Dict[str, Any]],
+        iterations: int = 10000,
+        seed: Optional[int] = None,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo aggregation of a risk register into cost exposure.
+        
+        Runs on the compute service's worker processes.
+        
+        Args:
+            risks: Risk dicts with "id", "probability" (0-1) and either
+                "impact" or an "impact_low"/"impact_high" range
+            iterations: Monte Carlo iterations
+            seed: Random seed for reproducible simulations
+            progress: Called with the completed fraction of the simulation
+            
+        Returns:
+            Expected exposure, percentiles and each risk's share of it
+        """
+        logger.info(f"Simulating exposure of {len(risks)} risks")
+        
+        probability = np.array([float(r.get("probability", 0)) for r in risks])
+        low = np.array([float(r.get("impact_low", r.get("impact", 0))) for r in risks])
+        high = np.array([float(r.get("impact_high", r.get("impact", 0))) for r in risks])
+        
+        result = await self.compute_service.run(
+            analytics.aggregate_risk, probability, low, high,
+            iterations=iterations, seed=seed, progress=progress
+        )
+        
+        ids = [str(r.get("id", i)) for i, r in enumerate(risks)]
+        return {
+            "iterations": result["iterations"],
+            "expected_exposure": result["mean"],
+            "probability_any": result["probability_any"],
+            **result["percentiles"],
+            "contribution": dict(zip(ids, result["contribution"].tolist())),
+        }
@@ -0,0 +1,409 @@
+"""
+What-If Scenario Evaluation for AutoPMO
+
+Compares variants of a plan ("add 2 devs to database_team", "drop task 4.3",
+"+20% effort on 3.2") without a separate agent run per variant. A scenario is
+a list of patch operations applied to a base WBS:
+
+    {"op": "add_staff", "team": "database_team", "count": 2}
+    {"op": "set_staff", "team": "qa_team", "count": 3}
+    {"op": "set_rate", "team": "qa_team", "rate": 85}
+    {"op": "scale_effort", "task": "3.2", "factor": 1.2}
+    {"op": "set_effort", "task": "3.2", "hours": 240}
+    {"op": "remove_task", "task": "4.3"}
+    {"op": "add_dependency", "task": "4.2", "depends_on": "3.3"}
+    {"op": "remove_dependency", "task": "4.1", "depends_on": "3.3"}
+
+Schedule model: a task's duration in working days is its effort divided by
+the daily hours of its assigned team (headcount x ``hours_per_day``). Each
+team is paid from its first task's start to its last task's finish, so extra
+staff shortens the schedule but is not free; task "cost" values of the tasks
+a scenario keeps are added as fixed costs. Finish dates skip weekends.
+
+The base network is built and validated once, on the compute service. Scenarios
+that only change effort, staffing or rates keep its structure and are
+evaluated together by one vectorized critical path pass (split across the
+compute service's workers); only scenarios that change dependencies get a
+network of their own, built in a worker as well.
+"""
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import analytics
+from .wbs_graph import extract_tasks, validate_wbs
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_DAY = 8.0
+DEFAULT_HOURLY_RATE = 100.0
+
+STRUCTURAL_OPS = {"remove_task", "add_dependency", "remove_dependency"}
+PATCH_OPS = STRUCTURAL_OPS | {"add_staff", "set_staff", "set_rate", "scale_effort", "set_effort"}
+
+
+@dataclass
+class Scenario:
+    """
+    Named set of patch operations.
+
+    Attributes:
+        name: Label in the comparison table
+        patches: Patch operations, applied in order
+    """
+    name: str
+    patches: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class BasePlan:
+    """Base WBS encoded for evaluation; arrays follow the topological order."""
+    ids: List[str]
+    position: Dict[str, int]
+    dependencies: Dict[str, List[str]]
+    pred_ptr: np.ndarray
+    pred_idx: np.ndarray
+    effort: np.ndarray
+    team: np.ndarray
+    cost: np.ndarray
+    teams: List[str]
+    headcount: np.ndarray
+    rates: np.ndarray
+
+
+def build_base_plan(
+    wbs: Any,
+    teams: Optional[Dict[str, float]] = None,
+    rates: Optional[Dict[str, float]] = None,
+    hours_per_day: float = HOURS_PER_DAY,
+) -> BasePlan:
+    """
+    Validate a WBS and encode it for scenario evaluation.
+
+    Args:
+        wbs: WBS mapping or task list; tasks have "id", "effort_hours" (or a
+            "duration" in days), "assigned_to", "dependencies" and "cost"
+        teams: Headcount per team (default 1)
+        rates: Hourly rate per team (default DEFAULT_HOURLY_RATE)
+        hours_per_day: Working hours per person per day
+
+    Returns:
+        Encoded base plan
+
+    Raises:
+        ValueError: If the WBS dependency graph is invalid
+    """
+    tasks = extract_tasks(wbs)
+    report = validate_wbs(tasks)
+    if not report.valid:
+        raise ValueError(f"Invalid task graph: {report.to_dict(max_items=5)}")
+
+    ids, pred_ptr, pred_idx = analytics.build_network(tasks)
+    by_id = {str(task["id"]): task for task in tasks}
+    ordered = [by_id[task_id] for task_id in ids]
+
+    team_names = sorted({str(t["assigned_to"]) for t in ordered if t.get("assigned_to")} | set(teams or {}))
+    team_index = {name: i for i, name in enumerate(team_names)}
+    headcount = np.array([float((teams or {}).get(name, 1)) for name in team_names])
+    if (headcount <= 0).any():
+        raise ValueError("Team headcount must be positive")
+    hourly = np.array([float((rates or {}).get(name, DEFAULT_HOURLY_RATE)) for name in team_names])
+
+    team = np.array([team_index.get(str(t.get("assigned_to")), -1) for t in ordered], dtype=np.int64)
+    effort = np.empty(len(ordered))
+    for i, t in enumerate(ordered):
+        if t.get("effort_hours") is not None:
+            effort[i] = float(t["effort_hours"])
+        else:
+            staff = headcount[team[i]] if team[i] >= 0 else 1.0
+            effort[i] = float(t.get("duration", 0)) * hours_per_day * staff
+
+    return BasePlan(
+        ids=ids,
+        position={task_id: i for i, task_id in enumerate(ids)},
+        dependencies={
+            str(t["id"]): [str(d) for d in t.get("dependencies", t.get("depends_on")) or []]
+            for t in ordered
+        },
+        pred_ptr=pred_ptr,
+        pred_idx=pred_idx,
+        effort=effort,
+        team=team,
+        cost=np.array([float(t.get("cost") or 0) for t in ordered]),
+        teams=team_names,
+        headcount=headcount,
+        rates=hourly,
+    )
+
+
+@dataclass
+class _Variant:
+    effort: np.ndarray
+    headcount: np.ndarray
+    rates: np.ndarray
+    removed: set = field(default_factory=set)
+    dependencies: Optional[Dict[str, List[str]]] = None
+
+    @property
+    def structural(self) -> bool:
+        return self.dependencies is not None
+
+
+def _apply_patches(base: BasePlan, patches: Sequence[Dict[str, Any]]) -> _Variant:
+    variant = _Variant(base.effort.copy(), base.headcount.copy(), base.rates.copy())
+
+    def task_index(patch: Dict[str, Any], key: str = "task") -> int:
+        task_id = str(patch.get(key))
+        if task_id not in base.position or task_id in variant.removed:
+            raise ValueError(f"Unknown task: {task_id}")
+        return base.position[task_id]
+
+    def team_index(patch: Dict[str, Any]) -> int:
+        name = str(patch.get("team"))
+        if name not in base.teams:
+            raise ValueError(f"Unknown team: {name}")
+        return base.teams.index(name)
+
+    for patch in patches:
+        op = patch.get("op")
+        if op not in PATCH_OPS:
+            raise ValueError(f"Unknown patch operation: {op}")
+        if op in STRUCTURAL_OPS and variant.dependencies is None:
+            variant.dependencies = {k: list(v) for k, v in base.dependencies.items()}
+        deps = variant.dependencies
+
+        if op == "add_staff":
+            variant.headcount[team_index(patch)] += float(patch.get("count", 1))
+        elif op == "set_staff":
+            variant.headcount[team_index(patch)] = float(patch["count"])
+        elif op == "set_rate":
+            variant.rates[team_index(patch)] = float(patch["rate"])
+        elif op == "scale_effort":
+            variant.effort[task_index(patch)] *= float(patch["factor"])
+        elif op == "set_effort":
+            variant.effort[task_index(patch)] = float(patch["hours"])
+        elif op == "remove_task":
+            removed = base.ids[task_index(patch)]
+            variant.removed.add(removed)
+            # Dependents keep the removed task's own dependencies
+            inherited = deps.pop(removed)
+            for task_id, task_deps in deps.items():
+                if removed in task_deps:
+                    task_deps.remove(removed)
+                    task_deps.extend(d for d in inherited if d not in task_deps)
+        elif op == "add_dependency":
+            task_id = base.ids[task_index(patch)]
+            dep = base.ids[task_index(patch, "depends_on")]
+            if dep not in deps[task_id]:
+                deps[task_id].append(dep)
+        elif op == "remove_dependency":
+            task_id = base.ids[task_index(patch)]
+            dep = str(patch.get("depends_on"))
+            if dep in deps[task_id]:
+                deps[task_id].remove(dep)
+
+    if (variant.headcount <= 0).any():
+        raise ValueError("Team headcount must be positive")
+    return variant
+
+
+def evaluate_batch(
+    effort: np.ndarray,
+    headcount: np.ndarray,
+    rates: np.ndarray,
+    team: np.ndarray,
+    pred_ptr: np.ndarray,
+    pred_idx: np.ndarray,
+    hours_per_day: float = HOURS_PER_DAY,
+) -> Dict[str, np.ndarray]:
+    """
+    Duration, team cost and critical tasks of several variants of one network.
+
+    Args:
+        effort: (variants x tasks) effort hours
+        headcount: (variants x teams) staff per team
+        rates: (variants x teams) hourly rate per team
+        team: Team index per task (-1: unassigned, one person, no cost)
+        pred_ptr: CSR offsets of each task's predecessors
+        pred_idx: Predecessor indices
+        hours_per_day: Working hours per person per day
+
+    Returns:
+        Per-variant duration (days) and team cost, and the critical task mask
+    """
+    effort = np.atleast_2d(effort)
+    staff = np.ones_like(effort)
+    assigned = team >= 0
+    staff[:, assigned] = headcount[:, team[assigned]]
+    cpm = analytics.critical_path_batch(effort / (staff * hours_per_day), pred_ptr, pred_idx)
+
+    cost = np.zeros(len(effort))
+    for t in range(headcount.shape[1]):
+        members = team == t
+        if members.any():
+            span = cpm["early_finish"][:, members].max(axis=1) - cpm["early_start"][:, members].min(axis=1)
+            cost += headcount[:, t] * rates[:, t] * hours_per_day * span
+    return {"duration": cpm["duration"], "cost": cost, "critical": cpm["critical"]}
+
+
+def evaluate_network(
+    ids: List[str],
+    dependencies: Dict[str, List[str]],
+    effort: np.ndarray,
+    headcount: np.ndarray,
+    rates: np.ndarray,
+    team: np.ndarray,
+    hours_per_day: float = HOURS_PER_DAY,
+) -> Dict[str, Any]:
+    """
+    Build the network of a variant with changed dependencies and evaluate it.
+
+    Args:
+        ids: Task ids kept by the variant
+        dependencies: Dependency ids per task id
+        effort: Effort hours per task, in ``ids`` order
+        headcount: Staff per team
+        rates: Hourly rate per team
+        team: Team index per task, in ``ids`` order
+        hours_per_day: Working hours per person per day
+
+    Returns:
+        evaluate_batch result for one variant, plus the task "ids" in
+        topological order (the order of the critical mask)
+
+    Raises:
+        ValueError: If the changed dependencies form a cycle
+    """
+    ordered_ids, pred_ptr, pred_idx = analytics.build_network(
+        [{"id": task_id, "depends_on": dependencies[task_id]} for task_id in ids]
+    )
+    position = {task_id: i for i, task_id in enumerate(ids)}
+    order = np.array([position[task_id] for task_id in ordered_ids], dtype=np.int64)
+    result = evaluate_batch(
+        effort[order], headcount[None], rates[None], team[order], pred_ptr, pred_idx, hours_per_day
+    )
+    result["ids"] = ordered_ids
+    return result
+
+
+def _finish_date(start: date, days: float) -> str:
+    return str(np.busday_offset(start, math.ceil(days - 1e-9), roll="forward"))
+
+
+async def compare_scenarios(
+    service: Any,
+    wbs: Any,
+    scenarios: Sequence[Scenario],
+    teams: Optional[Dict[str, float]] = None,
+    rates: Optional[Dict[str, float]] = None,
+    start_date: Optional[date] = None,
+    hours_per_day: float = HOURS_PER_DAY,
+) -> Dict[str, Any]:
+    """
+    Evaluate scenarios against a base plan.
+
+    Args:
+        service: ComputeService running the evaluation jobs
+        wbs: Base WBS (see build_base_plan)
+        scenarios: Scenarios to compare
+        teams: Base headcount per team
+        rates: Base hourly rate per team
+        start_date: Project start (default: today)
+        hours_per_day: Working hours per person per day
+
+    Returns:
+        Comparison table: the base plan first, then one row per scenario with
+        finish date, duration, cost, critical path and deltas to the base;
+        scenarios whose patches are invalid carry an "error" instead
+
+    Raises:
+        ValueError: If the base WBS is invalid
+    """
+    base = await service.run(build_base_plan, wbs, teams, rates, hours_per_day)
+    start = start_date or date.today()
+    logger.info(f"Evaluating {len(scenarios)} scenarios over {len(base.ids)} tasks")
+
+    rows: List[Dict[str, Any]] = [{"scenario": s.name} for s in scenarios]
+    shared_structure: List[int] = []
+    variants: Dict[int, _Variant] = {}
+    for i, scenario in enumerate(scenarios):
+        try:
+            variants[i] = _apply_patches(base, scenario.patches)
+        except (KeyError, TypeError, ValueError) as e:
+            rows[i]["error"] = f"Invalid patch: {e}"
+            continue
+        if not variants[i].structural:
+            shared_structure.append(i)
+
+    # Base plan plus every same-structure scenario in one batch, split across workers
+    batch = [None] + shared_structure
+    effort = np.stack([base.effort] + [variants[i].effort for i in shared_structure])
+    headcount = np.stack([base.headcount] + [variants[i].headcount for i in shared_structure])
+    hourly = np.stack([base.rates] + [variants[i].rates for i in shared_structure])
+    chunks = np.array_split(np.arange(len(batch)), min(len(batch), service.workers))
+
+    async def run_structural(i: int, variant: _Variant) -> Optional[Dict[str, Any]]:
+        kept = np.array(
+            [k for k, task_id in enumerate(base.ids) if task_id not in variant.removed], dtype=np.int64
+        )
+        try:
+            result = await service.run(
+                evaluate_network, [base.ids[k] for k in kept], variant.dependencies,
+                variant.effort[kept], variant.headcount, variant.rates, base.team[kept], hours_per_day
+            )
+        except ValueError as e:
+            rows[i]["error"] = f"Invalid patch: {e}"
+            return None
+        # Removed tasks no longer add their fixed cost
+        result["fixed_cost"] = float(base.cost[kept].sum())
+        return result
+
+    ptr, idx = service.share(base.pred_ptr), service.share(base.pred_idx)
+    try:
+        jobs = [
+            service.run(
+                evaluate_batch, effort[c], headcount[c], hourly[c], base.team, ptr, idx, hours_per_day
+            )
+            for c in chunks
+        ]
+        structural = [i for i, variant in variants.items() if variant.structural]
+        jobs.extend(run_structural(i, variants[i]) for i in structural)
+        results = await asyncio.gather(*jobs)
+    finally:
+        service.release(ptr, idx)
+
+    def summarize(result: Dict[str, np.ndarray], row: int, ids: List[str], fixed_cost: float) -> Dict[str, Any]:
+        duration = float(result["duration"][row])
+        return {
+            "finish_date": _finish_date(start, duration),
+            "duration_days": round(duration, 2),
+            "cost": round(float(result["cost"][row]) + fixed_cost, 2),
+            "critical_path": [ids[k] for k in np.flatnonzero(result["critical"][row])],
+        }
+
+    base_fixed_cost = float(base.cost.sum())
+    evaluated: Dict[Optional[int], Dict[str, Any]] = {}
+    for chunk, result in zip(chunks, results):
+        for row, k in enumerate(chunk):
+            evaluated[batch[k]] = summarize(result, row, base.ids, base_fixed_cost)
+    for i, result in zip(structural, results[len(chunks):]):
+        if result is not None:
+            evaluated[i] = summarize(result, 0, result["ids"], result["fixed_cost"])
+
+    baseline = evaluated.pop(None)
+    for i, summary in evaluated.items():
+        rows[i].update(summary)
+        rows[i]["delta_days"] = round(summary["duration_days"] - baseline["duration_days"], 2)
+        rows[i]["delta_cost"] = round(summary["cost"] - baseline["cost"], 2)
+
+    return {
+        "start_date": str(start),
+        "base": {"scenario": "base", **baseline},
+        "scenarios": rows,
+    }
@@ -0,0 +1,88 @@
+"""
+Fast JSON Serialization for AutoPMO
+
+API responses, job snapshots and stored history are encoded with orjson when
+it is installed (several times faster than the standard library and emits
+compact UTF-8 directly) and with compact ``json`` otherwise. Both paths give
+the same JSON for the values the API produces: NaN and infinities become
+``null``, dates and datetimes are ISO 8601, and pydantic models, NumPy arrays
+and scalars, dataclasses, enums and sets are converted before encoding;
+anything else is encoded as its ``str()``.
+
+The APIs' ``FastJSONResponse`` (in responses.py) renders responses with ``dumps``.
+This module has no web-framework dependency, so agent-side modules can use it.
+"""
+
+import dataclasses
+import json
+import math
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+HAVE_ORJSON = orjson is not None
+
+if HAVE_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):  # pydantic models
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "tolist"):  # NumPy arrays and scalars
+        return value.tolist()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def _finite(value: Any) -> Any:
+    """Copy of ``value`` with NaN and infinities replaced by None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (str, int)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return _finite(_default(value))
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON encoding of ``value``."""
+    if HAVE_ORJSON:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    try:
+        text = json.dumps(
+            value, separators=(",", ":"), ensure_ascii=False, default=_default, allow_nan=False
+        )
+    except ValueError:
+        # NaN is not JSON; emit null as orjson does
+        text = json.dumps(
+            _finite(value), separators=(",", ":"), ensure_ascii=False, default=_default, allow_nan=False
+        )
+    return text.encode("utf-8")
+
+
+def dumps_str(value: Any) -> str:
+    """Compact JSON encoding of ``value`` as text (e.g. for TEXT columns)."""
+    return dumps(value).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or bytes."""
+    if HAVE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
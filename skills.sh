@@ -1,6 +1,6 @@
 #!/bin/bash
 # skills.sh - One-Command Deployment for AutoPMO
-# Usage: ./skills.sh [demo|cluster|dev|test|reset]
+# Usage: ./skills.sh [demo|cluster|dev|test|loadtest|reset]
 
 set -e
 
@@ -382,6 +382,23 @@ run_tests() {
     log_info "Coverage report: htmlcov/index.html"
 }
 
+# Load test against a local API and stub LLM (extra arguments go to the load generator)
+run_loadtest() {
+    log_info "Running load test..."
+    
+    # Activate virtual environment
+    if [ -d "venv" ]; then
+        source venv/bin/activate
+    fi
+    
+    mkdir -p reports
+    local report="reports/loadtest-$(date +%Y%m%d-%H%M%S).json"
+    python3 -m benchmarks.loadgen --output "$report" "$@"
+    
+    log_success "Load test complete!"
+    log_info "Report: $report"
+}
+
 # Reset/cleanup
 reset_demo() {
     log_warning "This will delete all AutoPMO data!"
@@ -451,10 +468,11 @@ main() {
             cluster) deploy_cluster ;;
             dev) deploy_dev ;;
             test) run_tests ;;
+            loadtest) shift; run_loadtest "$@" ;;
             reset) reset_demo ;;
             *)
                 log_error "Unknown command: $1"
-                echo "Usage: ./skills.sh [demo|cluster|dev|test|reset]"
+                echo "Usage: ./skills.sh [demo|cluster|dev|test|loadtest|reset]"
                 exit 1
                 ;;
         esac
@@ -0,0 +1,418 @@
+"""
+Shared State Backends for AutoPMO
+
+Agent history, job status and caches live behind the StateStore interface so
+that several API worker processes see the same state. Backends:
+
+- memory://              per-process (default, single worker)
+- sqlite:///path/to/db   file-based, shared by processes on one host
+- redis://host:6379/0    shared across pods
+
+SQLite and Redis calls block on disk or network I/O; async code runs them
+through ``StateStore.offload`` so they do not stall the event loop.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .serialization import dumps, dumps_str, loads
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = 24 * 3600
+
+
+class StateStore(ABC):
+    """Interface for state shared between API workers."""
+
+    # Calls do disk or network I/O and are run on a thread from async code
+    blocking = True
+
+    async def offload(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call a store method from async code without blocking the event loop.
+
+        Args:
+            func: Store method (or a function that calls one)
+            *args, **kwargs: Passed to ``func``
+
+        Returns:
+            Whatever ``func`` returns
+        """
+        if not self.blocking:
+            return func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    # --- Agent execution history ---
+
+    @abstractmethod
+    def append_history(self, agent: str, record: Dict[str, Any], max_entries: int):
+        """Append a record, keeping at most ``max_entries`` per agent."""
+
+    @abstractmethod
+    def get_history(self, agent: str, limit: int) -> List[Dict[str, Any]]:
+        """Most recent ``limit`` records for an agent, oldest first."""
+
+    @abstractmethod
+    def history_count(self, agent: str) -> int:
+        """Number of stored records for an agent."""
+
+    @abstractmethod
+    def clear_history(self, agent: str):
+        """Delete all records for an agent."""
+
+    # --- Job status ---
+
+    @abstractmethod
+    def save_job(self, job_id: str, data: Dict[str, Any], ttl: int = JOB_TTL_SECONDS):
+        """Store a job snapshot."""
+
+    @abstractmethod
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job snapshot, or None if unknown/expired."""
+
+    # --- Caches ---
+
+    @abstractmethod
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing/expired."""
+
+    @abstractmethod
+    def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None):
+        """Cache a JSON-serializable value, optionally with a TTL in seconds."""
+
+    def cache_get_many(self, namespace: str, keys: Sequence[str]) -> List[Optional[Any]]:
+        """Cached values of several keys (None where missing/expired)."""
+        return [self.cache_get(namespace, key) for key in keys]
+
+    @abstractmethod
+    def cache_update(
+        self,
+        namespace: str,
+        keys: Sequence[str],
+        update: Callable[[List[Optional[Any]]], List[Any]],
+        ttl: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Atomically replace the values of several keys.
+
+        ``update`` receives the current values (None where missing) and
+        returns the new ones; it may be called again if another worker wrote
+        the keys concurrently. Returns the values written.
+        """
+
+
+class InMemoryStateStore(StateStore):
+    """Per-process store; state is not shared between workers."""
+
+    blocking = False
+
+    def __init__(self, max_cache_entries: int = 10000):
+        self.max_cache_entries = max_cache_entries
+        self._history: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._jobs: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def append_history(self, agent: str, record: Dict[str, Any], max_entries: int):
+        with self._lock:
+            entries = self._history.get(agent)
+            if entries is None or entries.maxlen != max_entries:
+                entries = self._history[agent] = deque(entries or (), maxlen=max_entries)
+            entries.append(record)
+
+    def get_history(self, agent: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._history.get(agent, ()))
+        return entries[-limit:] if limit > 0 else []
+
+    def history_count(self, agent: str) -> int:
+        return len(self._history.get(agent, ()))
+
+    def clear_history(self, agent: str):
+        with self._lock:
+            self._history.pop(agent, None)
+
+    def save_job(self, job_id: str, data: Dict[str, Any], ttl: int = JOB_TTL_SECONDS):
+        with self._lock:
+            self._jobs[job_id] = (time.time() + ttl, data)
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job_id)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._cache.get((namespace, key))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.time():
+                del self._cache[(namespace, key)]
+                return None
+            self._cache.move_to_end((namespace, key))
+            return value
+
+    def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None):
+        with self._lock:
+            self._cache[(namespace, key)] = (time.time() + ttl if ttl else None, value)
+            self._cache.move_to_end((namespace, key))
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def cache_update(
+        self,
+        namespace: str,
+        keys: Sequence[str],
+        update: Callable[[List[Optional[Any]]], List[Any]],
+        ttl: Optional[int] = None,
+    ) -> List[Any]:
+        with self._update_lock:
+            values = update(self.cache_get_many(namespace, keys))
+            for key, value in zip(keys, values):
+                self.cache_set(namespace, key, value, ttl)
+            return values
+
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite-backed store for several worker processes on one host (and tests).
+
+    Uses WAL mode so readers in one worker do not block writers in another.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                agent TEXT NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS history_agent ON history (agent, id);
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL,
+                PRIMARY KEY (namespace, key)
+            );
+        """)
+
+    def append_history(self, agent: str, record: Dict[str, Any], max_entries: int):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO history (agent, record) VALUES (?, ?)", (agent, dumps_str(record))
+            )
+            conn.execute(
+                """DELETE FROM history WHERE agent = ? AND id <= (
+                       SELECT id FROM history WHERE agent = ?
+                       ORDER BY id DESC LIMIT 1 OFFSET ?
+                   )""",
+                (agent, agent, max_entries)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_history(self, agent: str, limit: int) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT record FROM history WHERE agent = ? ORDER BY id DESC LIMIT ?",
+            (agent, max(0, limit))
+        ).fetchall()
+        return [loads(row[0]) for row in reversed(rows)]
+
+    def history_count(self, agent: str) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM history WHERE agent = ?", (agent,)
+        ).fetchone()
+        return row[0]
+
+    def clear_history(self, agent: str):
+        self._conn().execute("DELETE FROM history WHERE agent = ?", (agent,))
+
+    def save_job(self, job_id: str, data: Dict[str, Any], ttl: int = JOB_TTL_SECONDS):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO jobs (id, data, expires) VALUES (?, ?, ?)",
+            (job_id, dumps_str(data), time.time() + ttl)
+        )
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT data FROM jobs WHERE id = ? AND expires >= ?", (job_id, time.time())
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            """SELECT value FROM cache WHERE namespace = ? AND key = ?
+               AND (expires IS NULL OR expires >= ?)""",
+            (namespace, key, time.time())
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (namespace, key, dumps_str(value), time.time() + ttl if ttl else None)
+        )
+
+    def cache_update(
+        self,
+        namespace: str,
+        keys: Sequence[str],
+        update: Callable[[List[Optional[Any]]], List[Any]],
+        ttl: Optional[int] = None,
+    ) -> List[Any]:
+        conn = self._conn()
+        # The write lock is taken before reading, so no other writer interleaves
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            values = update(self.cache_get_many(namespace, keys))
+            expires = time.time() + ttl if ttl else None
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+                [(namespace, key, dumps_str(value), expires) for key, value in zip(keys, values)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return values
+
+
+class RedisStateStore(StateStore):
+    """Redis-backed store shared by every worker and pod."""
+
+    def __init__(self, url: str, prefix: str = "autopmo"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def append_history(self, agent: str, record: Dict[str, Any], max_entries: int):
+        key = self._key("history", agent)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, dumps(record))
+        pipe.ltrim(key, -max_entries, -1)
+        pipe.execute()
+
+    def get_history(self, agent: str, limit: int) -> List[Dict[str, Any]]:
+        if limit <= 0:
+            return []
+        items = self.client.lrange(self._key("history", agent), -limit, -1)
+        return [loads(item) for item in items]
+
+    def history_count(self, agent: str) -> int:
+        return self.client.llen(self._key("history", agent))
+
+    def clear_history(self, agent: str):
+        self.client.delete(self._key("history", agent))
+
+    def save_job(self, job_id: str, data: Dict[str, Any], ttl: int = JOB_TTL_SECONDS):
+        self.client.set(self._key("job", job_id), dumps(data), ex=ttl)
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self._key("job", job_id))
+        return loads(value) if value else None
+
+    def cache_get(self, namespace: str, key: str) -> Optional[Any]:
+        value = self.client.get(self._key("cache", namespace, key))
+        return loads(value) if value else None
+
+    def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None):
+        self.client.set(self._key("cache", namespace, key), dumps(value), ex=ttl)
+
+    def cache_get_many(self, namespace: str, keys: Sequence[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        values = self.client.mget([self._key("cache", namespace, key) for key in keys])
+        return [loads(value) if value else None for value in values]
+
+    def cache_update(
+        self,
+        namespace: str,
+        keys: Sequence[str],
+        update: Callable[[List[Optional[Any]]], List[Any]],
+        ttl: Optional[int] = None,
+    ) -> List[Any]:
+        from redis.exceptions import WatchError
+
+        redis_keys = [self._key("cache", namespace, key) for key in keys]
+        with self.client.pipeline() as pipe:
+            # Optimistic transaction: retried if a watched key changes
+            while True:
+                try:
+                    pipe.watch(*redis_keys)
+                    values = update([loads(value) if value else None for value in pipe.mget(redis_keys)])
+                    pipe.multi()
+                    for key, value in zip(redis_keys, values):
+                        pipe.set(key, dumps(value), ex=ttl)
+                    pipe.execute()
+                    return values
+                except WatchError:
+                    continue
+
+
+def create_state_store(url: Optional[str] = None) -> StateStore:
+    """
+    Create a state store from a URL.
+
+    Args:
+        url: memory://, sqlite:///path or redis://host:port/db
+
+    Returns:
+        State store instance
+    """
+    if not url or url.startswith("memory://"):
+        return InMemoryStateStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateStore(url)
+    raise ValueError(f"Unsupported state store URL: {url}")
+
+
+_default_store: Optional[StateStore] = None
+
+
+def get_default_state_store() -> StateStore:
+    """Process-wide in-memory store used when an agent is given none."""
+    global _default_store
+    if _default_store is None:
+        _default_store = InMemoryStateStore()
+    return _default_store
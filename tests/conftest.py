@@ -0,0 +1,19 @@
+"""
+Shared pytest setup.
+
+The repository root is the ``agents`` package. When the checkout directory
+has another name it is registered under ``agents`` so modules import the
+same way they do in the application.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+if importlib.util.find_spec("agents") is None:
+    spec = importlib.util.spec_from_loader("agents", loader=None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [str(ROOT)]
+    sys.modules["agents"] = package
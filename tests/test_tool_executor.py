@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+from langchain.tools import Tool
+
+from agents.base_agent import BaseAgent
+from agents.tool_executor import CPU, ToolExecutor, cpu_bound
+
+# CPU time per tool call; a tool run on the loop would stall it this long
+CALL_SECONDS = 0.2
+TICK_SECONDS = 0.005
+
+
+@cpu_bound
+def _spin(seconds: float) -> int:
+    """Pure-Python busy loop (holds the GIL)."""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+async def _loop_lag(calls) -> List[float]:
+    """Wake-up delays of a ticker running while ``calls`` are awaited."""
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        expected = time.perf_counter() + TICK_SECONDS
+        while not stop.is_set():
+            await asyncio.sleep(max(0.0, expected - time.perf_counter()))
+            now = time.perf_counter()
+            lags.append(max(0.0, now - expected))
+            expected = now + TICK_SECONDS
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK_SECONDS)
+    await asyncio.gather(*calls)
+    stop.set()
+    await task
+    return lags
+
+
+def test_inline_tool_stalls_loop():
+    async def inline():
+        return _spin(CALL_SECONDS)
+
+    lags = asyncio.run(_loop_lag([inline()]))
+    assert max(lags) > CALL_SECONDS / 2
+
+
+# Pure-Python tools on threads still share the GIL with the loop, which then
+# waits about one switch interval (5 ms) per busy thread; processes do not
+@pytest.mark.parametrize("cpu_executor,concurrency", [("thread", 2), ("process", 4)])
+def test_offloaded_cpu_tool_keeps_loop_responsive(cpu_executor, concurrency):
+    executor = ToolExecutor(cpu_workers=concurrency, cpu_executor=cpu_executor)
+    call = executor.offload(_spin, CPU)
+
+    async def run():
+        # Start the pool before measuring
+        await call(0.0)
+        return await _loop_lag([call(CALL_SECONDS) for _ in range(concurrency)])
+
+    try:
+        lags = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    lags.sort()
+    assert len(lags) > 10
+    assert lags[int(0.99 * (len(lags) - 1))] < 0.05
+    assert lags[-1] < CALL_SECONDS / 2
+
+
+def test_prepared_agent_tool_runs_off_the_loop():
+    class SpinAgent(BaseAgent):
+        def get_system_prompt(self) -> str:
+            return ""
+
+        def register_tools(self):
+            return [Tool(name="spin", func=_spin, description="Busy loop")]
+
+    # Only the attributes _prepare_tools reads; no LLM client is needed
+    agent = SpinAgent.__new__(SpinAgent)
+    agent.name = "Spin Agent"
+    agent.tool_executor = ToolExecutor(cpu_workers=2)
+    agent.tool_cache_size = 0
+    agent.tool_caches = {}
+    (tool,) = agent._prepare_tools(agent.register_tools())
+
+    try:
+        lags = asyncio.run(_loop_lag([tool.coroutine(CALL_SECONDS) for _ in range(2)]))
+    finally:
+        agent.tool_executor.shutdown()
+
+    assert max(lags) < CALL_SECONDS / 2
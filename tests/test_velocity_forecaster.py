@@ -0,0 +1,26 @@
+import pytest
+
+from agents.state_store import InMemoryStateStore
+from agents.velocity_forecaster import VelocityForecaster
+
+
+def test_interval_spread_matches_holt_variance():
+    alpha, beta = 0.4, 0.1
+    forecaster = VelocityForecaster(alpha=alpha, beta=beta, state_store=InMemoryStateStore())
+    for velocity in (30, 34, 29, 36, 31, 33):
+        forecaster.observe("core", velocity)
+
+    result = forecaster.forecast_batch(["core"], horizon=4)
+    spread = (result["upper"] - result["mean"])[0]
+
+    # Var(h) / Var(1) = 1 + sum_{j=1}^{h-1} (alpha * (1 + j * beta)) ** 2
+    expected = [1.0]
+    for h in range(2, 5):
+        expected.append(1 + sum((alpha * (1 + j * beta)) ** 2 for j in range(1, h)))
+    assert (spread / spread[0]) ** 2 == pytest.approx(expected)
+    assert expected[2] == pytest.approx(1.424)
+
+
+def test_unknown_team_has_no_forecast():
+    forecaster = VelocityForecaster(state_store=InMemoryStateStore())
+    assert forecaster.forecast("new", horizon=2)["forecast"] == []
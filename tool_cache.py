@@ -0,0 +1,149 @@
+"""
+Tool Result Memoization for AutoPMO
+
+Most agent tools are deterministic functions of their input string, and the
+agent loop often calls them repeatedly with identical inputs within and
+across requests. ``memoize_tool`` wraps a tool callable with a bounded LRU
+cache whose entries expire after a TTL; hits and misses are exported as
+metrics and marked on the active trace span.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .metrics import TOOL_CACHE_ENTRIES, TOOL_CACHE_REQUESTS, agent_label, tool_label
+from .tracing import current_span
+
+_MISSING = object()
+
+
+class ToolCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+
+    Attributes:
+        maxsize: Maximum number of entries
+        ttl: Seconds an entry stays valid; None means no expiry
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value, or ``_MISSING`` if absent or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires >= time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def _cache_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def memoize_tool(
+    agent_name: str,
+    tool_name: str,
+    func: Callable,
+    cache: ToolCache,
+) -> Callable:
+    """
+    Wrap a deterministic tool callable with a result cache.
+
+    Calls with unhashable arguments and calls that raise are not cached.
+    Works for both plain functions and coroutine functions.
+
+    Args:
+        agent_name: Owning agent name
+        tool_name: Tool name as registered with LangChain
+        func: Tool implementation
+        cache: Cache holding this tool's results
+
+    Returns:
+        Memoized callable with the same signature
+    """
+    labels = {"agent": agent_label(agent_name), "tool": tool_label(tool_name)}
+    hits = TOOL_CACHE_REQUESTS.labels(result="hit", **labels)
+    misses = TOOL_CACHE_REQUESTS.labels(result="miss", **labels)
+    entries = TOOL_CACHE_ENTRIES.labels(**labels)
+
+    def lookup(key: Optional[Hashable]) -> Any:
+        value = cache.get(key) if key is not None else _MISSING
+        span = current_span()
+        if span is not None:
+            span.set_attribute("cache_hit", value is not _MISSING)
+        (misses if value is _MISSING else hits).inc()
+        return value
+
+    def store(key: Optional[Hashable], value: Any):
+        if key is not None:
+            cache.set(key, value)
+            entries.set(len(cache))
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = _cache_key(args, kwargs)
+            value = lookup(key)
+            if value is _MISSING:
+                value = await func(*args, **kwargs)
+                store(key, value)
+            return value
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = _cache_key(args, kwargs)
+        value = lookup(key)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            store(key, value)
+        return value
+    return wrapper
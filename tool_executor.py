@@ -0,0 +1,174 @@
+"""
+Tool Execution Modes for AutoPMO
+
+Agent tools declare how they should run so the agent loop never blocks the
+event loop:
+
+- async: the tool is a coroutine function and is awaited directly
+- io:    blocking I/O; runs on a thread pool (default for plain functions)
+- cpu:   CPU-bound work (YAML/JSON generation, scheduling math); runs on a
+         dedicated thread pool or, with ``cpu_executor="process"``, on a
+         process pool so it does not compete with the event loop for the GIL
+
+Declare the mode with the ``io_bound`` / ``cpu_bound`` decorators on the
+tool implementation. Process-pool dispatch requires a picklable callable
+(module-level function or staticmethod); other callables fall back to the
+CPU thread pool.
+
+Pool sizes come from AUTOPMO_TOOL_IO_WORKERS, AUTOPMO_TOOL_CPU_WORKERS and
+AUTOPMO_TOOL_CPU_EXECUTOR (thread|process).
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .metrics import TOOL_POOL_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+ASYNC = "async"
+IO = "io"
+CPU = "cpu"
+
+_MODE_ATTRIBUTE = "_autopmo_tool_mode"
+
+
+def io_bound(func: Callable) -> Callable:
+    """Mark a tool implementation as blocking on I/O."""
+    setattr(func, _MODE_ATTRIBUTE, IO)
+    return func
+
+
+def cpu_bound(func: Callable) -> Callable:
+    """Mark a tool implementation as CPU-bound."""
+    setattr(func, _MODE_ATTRIBUTE, CPU)
+    return func
+
+
+def tool_mode(func: Callable) -> str:
+    """Declared execution mode of a tool callable (bound methods included)."""
+    if asyncio.iscoroutinefunction(func):
+        return ASYNC
+    target = getattr(func, "__func__", func)
+    return getattr(target, _MODE_ATTRIBUTE, IO)
+
+
+class ToolExecutor:
+    """
+    Thread and process pools that run blocking tools off the event loop.
+
+    Attributes:
+        io_workers: Threads for I/O-bound tools
+        cpu_workers: Threads or processes for CPU-bound tools
+        cpu_executor: "thread" or "process"
+    """
+
+    def __init__(
+        self,
+        io_workers: int = 16,
+        cpu_workers: Optional[int] = None,
+        cpu_executor: str = "thread",
+    ):
+        if cpu_executor not in ("thread", "process"):
+            raise ValueError(f"Unknown CPU executor: {cpu_executor}")
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.cpu_executor = cpu_executor
+
+        self._pools: Dict[str, Executor] = {}
+        self._picklable: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, name: str) -> Executor:
+        pool = self._pools.get(name)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(name)
+                if pool is None:
+                    if name == "process":
+                        pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+                    else:
+                        workers = self.io_workers if name == IO else self.cpu_workers
+                        pool = ThreadPoolExecutor(
+                            max_workers=workers, thread_name_prefix=f"autopmo-tool-{name}"
+                        )
+                    self._pools[name] = pool
+        return pool
+
+    def _can_pickle(self, func: Callable) -> bool:
+        key = id(getattr(func, "__func__", func))
+        if key not in self._picklable:
+            try:
+                pickle.dumps(func)
+                self._picklable[key] = True
+            except Exception:
+                logger.warning(
+                    f"Tool {getattr(func, '__qualname__', func)} is not picklable; "
+                    f"running it on the CPU thread pool instead of the process pool"
+                )
+                self._picklable[key] = False
+        return self._picklable[key]
+
+    def offload(self, func: Callable, mode: Optional[str] = None) -> Callable:
+        """
+        Wrap a synchronous tool so awaiting it runs it on the pool for its mode.
+
+        Thread-pool calls keep the caller's context (trace spans, admission
+        scope); process-pool calls only receive their arguments.
+
+        Args:
+            func: Synchronous tool implementation
+            mode: Execution mode; defaults to the declared mode
+
+        Returns:
+            Coroutine function with the same signature
+        """
+        mode = mode or tool_mode(func)
+        if mode == ASYNC:
+            return func
+
+        use_process = mode == CPU and self.cpu_executor == "process" and self._can_pickle(func)
+        pool_name = "process" if use_process else mode
+        in_flight = TOOL_POOL_IN_FLIGHT.labels(pool=pool_name)
+
+        @functools.wraps(func)
+        async def run(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            if not use_process:
+                call = functools.partial(contextvars.copy_context().run, call)
+            in_flight.inc()
+            try:
+                return await loop.run_in_executor(self._pool(pool_name), call)
+            finally:
+                in_flight.dec()
+        return run
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=wait)
+            self._pools.clear()
+
+
+_default_executor: Optional[ToolExecutor] = None
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Process-wide tool executor configured from the environment."""
+    global _default_executor
+    if _default_executor is None:
+        cpu_workers = os.getenv("AUTOPMO_TOOL_CPU_WORKERS")
+        _default_executor = ToolExecutor(
+            io_workers=int(os.getenv("AUTOPMO_TOOL_IO_WORKERS", "16")),
+            cpu_workers=int(cpu_workers) if cpu_workers else None,
+            cpu_executor=os.getenv("AUTOPMO_TOOL_CPU_EXECUTOR", "thread"),
+        )
+    return _default_executor
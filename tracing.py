@@ -0,0 +1,281 @@
+"""
+Request-Scoped Tracing for AutoPMO
+
+Lightweight spans propagated through the orchestrator, agents, tools and LLM
+calls via ``contextvars``. Finished traces are kept in an in-memory ring
+buffer (and optionally appended to a JSON-lines file) so a slow request can
+be inspected on ``/debug/traces/{trace_id}``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import LLMResult
+
+from .metrics import token_usage
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+    trace_id: str
+    span_id: str
+    name: str
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("_started")
+        return data
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("autopmo_current_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Tracer:
+    """
+    Creates spans and keeps the most recent traces.
+
+    Attributes:
+        max_traces: Number of traces retained in the ring buffer
+        export_path: Optional JSON-lines file every finished span is appended to
+    """
+
+    def __init__(self, max_traces: int = 500, export_path: Optional[str] = None):
+        self.max_traces = max_traces
+        self.export_path = export_path
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        trace_id: Optional[str] = None,
+        **attributes: Any
+    ) -> Span:
+        """
+        Start a span without making it current.
+
+        Args:
+            name: Operation name
+            parent: Parent span; defaults to the current span
+            trace_id: Explicit trace id for new root spans (e.g. from a header)
+            **attributes: Initial span attributes
+
+        Returns:
+            The started span
+        """
+        parent = parent if parent is not None else _current_span.get()
+        if parent is not None:
+            trace_id = parent.trace_id
+        return Span(
+            trace_id=trace_id or uuid.uuid4().hex,
+            span_id=_new_id(),
+            name=name,
+            parent_id=parent.span_id if parent else None,
+            attributes=dict(attributes),
+        )
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        """Finish a span and hand it to the exporters."""
+        span.duration_ms = (time.perf_counter() - span._started) * 1000.0
+        if error is not None:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+        self._export(span)
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """
+        Context manager that makes a new span current for its duration.
+
+        Safe to use from coroutines: each asyncio task sees its own context.
+        """
+        span = self.start_span(name, trace_id=trace_id, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            _current_span.reset(token)
+
+    def _export(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+            if self.export_path:
+                try:
+                    with open(self.export_path, "a") as f:
+                        f.write(json.dumps(span.to_dict(), default=str) + "\n")
+                except OSError as e:
+                    logger.warning(f"Trace export failed: {e}")
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get all finished spans of a trace, ordered by start time.
+
+        Returns:
+            Trace summary and spans, or None if unknown/evicted
+        """
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        if not spans:
+            return None
+
+        spans.sort(key=lambda s: s.start_time)
+        roots = [s for s in spans if s.parent_id is None]
+        return {
+            "trace_id": trace_id,
+            "duration_ms": max((s.duration_ms or 0.0) for s in roots) if roots else None,
+            "span_count": len(spans),
+            "llm_calls": sum(1 for s in spans if s.name == "llm.call"),
+            "prompt_tokens": sum(s.attributes.get("prompt_tokens", 0) for s in spans),
+            "completion_tokens": sum(s.attributes.get("completion_tokens", 0) for s in spans),
+            "spans": [s.to_dict() for s in spans],
+        }
+
+    def recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent traces with their root span name and duration."""
+        with self._lock:
+            items = list(self._traces.items())[-limit:]
+
+        summaries = []
+        for trace_id, spans in reversed(items):
+            root = next((s for s in spans if s.parent_id is None), None)
+            summaries.append({
+                "trace_id": trace_id,
+                "root": root.name if root else None,
+                "duration_ms": root.duration_ms if root else None,
+                "span_count": len(spans),
+            })
+        return summaries
+
+
+_tracer = Tracer(
+    max_traces=int(os.getenv("AUTOPMO_TRACE_BUFFER", "500")),
+    export_path=os.getenv("AUTOPMO_TRACE_FILE") or None,
+)
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    """Span active in the current context, if any."""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id active in the current context, if any."""
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def trace_tool(agent_name: str, tool_name: str, func: Callable) -> Callable:
+    """
+    Wrap a tool callable so each invocation is recorded as a span.
+
+    Args:
+        agent_name: Owning agent name
+        tool_name: Tool name as registered with LangChain
+        func: Tool implementation
+
+    Returns:
+        Traced callable with the same signature
+    """
+    tracer = get_tracer()
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with tracer.span("tool.call", agent=agent_name, tool=tool_name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with tracer.span("tool.call", agent=agent_name, tool=tool_name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class TracingCallback(BaseCallbackHandler):
+    """
+    LangChain callback recording every LLM call as a child span of whatever
+    span is current when the call starts, with token usage attributes.
+    """
+
+    run_inline = True
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, serialized: Dict[str, Any]):
+        span = get_tracer().start_span("llm.call", agent=self.agent_name)
+        model = (serialized or {}).get("kwargs", {}).get("model_name")
+        if model:
+            span.set_attribute("model", model)
+        self._spans[run_id] = span
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs):
+        self._start(run_id, serialized)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs):
+        self._start(run_id, serialized)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        prompt_tokens, completion_tokens = token_usage(response.llm_output)
+        span.set_attribute("prompt_tokens", prompt_tokens)
+        span.set_attribute("completion_tokens", completion_tokens)
+        get_tracer().end_span(span)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            get_tracer().end_span(span, error=error)
@@ -0,0 +1,235 @@
+"""
+Online Team Velocity Forecasting for AutoPMO
+
+Forecasts sprint velocity per team with Holt's linear exponential smoothing
+(a level and a trend) plus an exponentially weighted variance of the
+one-step forecast errors. Each closed sprint updates a team's state in
+constant time; no history is kept or refit.
+
+State per team is four numbers (level, trend, error variance, sprint count)
+kept in the StateStore cache, which is the only copy: forecasts read it and
+updates are atomic read-modify-writes, so every API worker sees the same
+forecasts and concurrent sprint updates are not lost. The states of a batch
+of teams are loaded into one NumPy array, so thousands of teams can be
+updated or forecast in one vectorized call.
+
+Prediction intervals use the Holt h-step error variance
+``s2 * (1 + sum_{j=1}^{h-1} (alpha * (1 + j * beta)) ** 2)`` with normal quantiles,
+truncated at zero.
+"""
+
+import logging
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .state_store import StateStore, get_default_state_store
+
+logger = logging.getLogger(__name__)
+
+STATE_NAMESPACE = "velocity"
+
+# Error spread assumed before a team has enough sprints (fraction of level)
+PRIOR_CV = 0.25
+
+
+class VelocityForecaster:
+    """
+    Per-team online velocity model.
+
+    Attributes:
+        alpha: Level smoothing factor (0-1)
+        beta: Trend smoothing factor (0-1)
+        gamma: Error variance smoothing factor (0-1)
+        state_store: Store the per-team state is persisted in
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.4,
+        beta: float = 0.1,
+        gamma: float = 0.2,
+        state_store: Optional[StateStore] = None,
+    ):
+        for name, value in (("alpha", alpha), ("beta", beta), ("gamma", gamma)):
+            if not 0 < value <= 1:
+                raise ValueError(f"{name} must be in (0, 1]")
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.state_store = state_store or get_default_state_store()
+
+    # --- State ---
+
+    @staticmethod
+    def _as_array(stored: Sequence[Optional[List[float]]]) -> np.ndarray:
+        """(teams x 4) level, trend, variance, sprints; zeros for new teams."""
+        state = np.zeros((len(stored), 4))
+        for row, values in enumerate(stored):
+            if values:
+                state[row] = values
+        return state
+
+    def _load(self, teams: Sequence[str]) -> np.ndarray:
+        return self._as_array(self.state_store.cache_get_many(STATE_NAMESPACE, list(teams)))
+
+    def state(self, team: str) -> Dict[str, float]:
+        """Current model state of a team."""
+        level, trend, variance, sprints = self._load([team])[0]
+        return {"level": level, "trend": trend, "variance": variance, "sprints": int(sprints)}
+
+    # --- Updates ---
+
+    def observe(self, team: str, velocity: float):
+        """Record a closed sprint's velocity (constant time)."""
+        self.observe_batch([team], [velocity])
+
+    def observe_batch(self, teams: Sequence[str], velocities: Sequence[float]):
+        """
+        Record one closed sprint for each of several teams.
+
+        Args:
+            teams: Team names (each at most once per call)
+            velocities: Completed story points per team
+        """
+        if len(set(teams)) != len(teams):
+            raise ValueError("Each team may appear once per batch")
+        velocity = np.asarray(velocities, dtype=np.float64)
+
+        def update(stored: List[Optional[List[float]]]) -> List[List[float]]:
+            level, trend, variance, sprints = self._as_array(stored).T
+
+            error = velocity - (level + trend)
+            # Average the first errors evenly so early variance is not understated
+            weight = np.maximum(self.gamma, 1.0 / np.maximum(sprints, 1))
+            new_variance = np.where(sprints >= 1, (1 - weight) * variance + weight * error ** 2, 0.0)
+            new_level = self.alpha * velocity + (1 - self.alpha) * (level + trend)
+            new_trend = self.beta * (new_level - level) + (1 - self.beta) * trend
+
+            first = sprints == 0
+            return np.column_stack([
+                np.where(first, velocity, new_level),
+                np.where(first, 0.0, new_trend),
+                new_variance,
+                sprints + 1,
+            ]).tolist()
+
+        # Atomic, so sprints recorded by other workers are not overwritten
+        self.state_store.cache_update(STATE_NAMESPACE, list(teams), update)
+
+    # --- Forecasts ---
+
+    def forecast_batch(
+        self,
+        teams: Sequence[str],
+        horizon: int = 3,
+        confidence: float = 0.8,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Velocity forecasts for several teams.
+
+        Args:
+            teams: Team names
+            horizon: Sprints ahead
+            confidence: Central prediction interval coverage (0-1)
+
+        Returns:
+            (teams x horizon) "mean", "lower" and "upper" arrays and the
+            "sprints" observed per team; teams without history forecast NaN
+        """
+        level, trend, variance, sprints = self._load(teams).T
+
+        steps = np.arange(1, horizon + 1)
+        mean = level[:, None] + trend[:, None] * steps
+        # Until errors have been seen, assume a spread proportional to the level
+        variance = np.where(sprints >= 3, variance, np.maximum(variance, (PRIOR_CV * level) ** 2))
+        growth = np.r_[0.0, np.cumsum((self.alpha * (1 + self.beta * np.arange(1, horizon))) ** 2)]
+        spread = np.sqrt(variance[:, None] * (1 + growth))
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        unknown = sprints == 0
+        mean[unknown] = np.nan
+        return {
+            "mean": np.maximum(mean, 0.0),
+            "lower": np.maximum(mean - z * spread, 0.0),
+            "upper": np.maximum(mean + z * spread, 0.0),
+            "sprints": sprints.astype(np.int64),
+        }
+
+    def forecast(self, team: str, horizon: int = 3, confidence: float = 0.8) -> Dict[str, Any]:
+        """
+        Velocity forecast for one team.
+
+        Args:
+            team: Team name
+            horizon: Sprints ahead
+            confidence: Central prediction interval coverage (0-1)
+
+        Returns:
+            Per-sprint mean and interval bounds, or an empty forecast if the
+            team has no recorded sprints
+        """
+        result = self.forecast_batch([team], horizon, confidence)
+        if not result["sprints"][0]:
+            return {"team": team, "sprints_observed": 0, "forecast": []}
+        return {
+            "team": team,
+            "sprints_observed": int(result["sprints"][0]),
+            "confidence": confidence,
+            "forecast": [
+                {
+                    "sprint": h + 1,
+                    "velocity": round(float(result["mean"][0, h]), 1),
+                    "lower": round(float(result["lower"][0, h]), 1),
+                    "upper": round(float(result["upper"][0, h]), 1),
+                }
+                for h in range(horizon)
+            ],
+        }
+
+    def sprints_to_complete(
+        self,
+        team: str,
+        points: float,
+        confidence: float = 0.8,
+        max_sprints: int = 52,
+    ) -> Optional[Dict[str, Optional[int]]]:
+        """
+        Sprints needed to burn down a backlog at the forecast velocity.
+
+        Args:
+            team: Team name
+            points: Remaining story points
+            confidence: Interval coverage of the optimistic/pessimistic bounds
+            max_sprints: Forecast horizon searched
+
+        Returns:
+            Expected, optimistic and pessimistic sprint counts (None where the
+            backlog is not finished within max_sprints), or None if the team
+            has no recorded sprints
+        """
+        result = self.forecast_batch([team], max_sprints, confidence)
+        if not result["sprints"][0]:
+            return None
+        counts: Dict[str, Optional[int]] = {}
+        for key, series in (("expected", "mean"), ("optimistic", "upper"), ("pessimistic", "lower")):
+            done = np.flatnonzero(np.cumsum(result[series][0]) >= points)
+            counts[key] = int(done[0]) + 1 if len(done) else None
+        return counts
+
+
+def format_forecast(forecasts: List[Dict[str, Any]]) -> str:
+    """Render forecasts as short text for agent tools."""
+    lines = []
+    for f in forecasts:
+        if not f["forecast"]:
+            lines.append(f"{f['team']}: no sprint history")
+            continue
+        steps = ", ".join(
+            f"S+{s['sprint']} {s['velocity']} ({s['lower']}-{s['upper']})" for s in f["forecast"]
+        )
+        lines.append(
+            f"{f['team']} ({f['sprints_observed']} sprints, {int(f['confidence'] * 100)}% interval): {steps}"
+        )
+    return "\n".join(lines)